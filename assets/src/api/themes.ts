@@ -1,4 +1,5 @@
 import { getCookie } from '@/utils/getCookie';
+import { bootstrapFetch } from '@/lib/bootstrap';
 
 // Types for theme API responses
 export interface ThemeApiResponse {
@@ -41,7 +42,7 @@ class ThemeApiService {
   private baseUrl = '/api/v1';
 
   private async makeRequest(url: string, options: RequestInit = {}) {
-    const response = await fetch(`${this.baseUrl}${url}`, {
+    const response = await bootstrapFetch(`${this.baseUrl}${url}`, {
       credentials: 'include',
       ...options,
     });
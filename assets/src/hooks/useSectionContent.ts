@@ -1,5 +1,6 @@
 import { useEffect, useState, useRef } from 'react';
 import { useCMSPreview } from '@/components/admin/CMSPreviewContext';
+import { fetchSection } from '@/lib/sections';
 
 interface UseSectionContentReturn<T> {
   content: T;
@@ -53,7 +54,7 @@ export function useSectionContent<T>(
           setError(null);
         }
         
-        let response = await fetch(`/public/sections/${sectionId}/`);
+        let response = await fetchSection(sectionId);
         
         if (!mountedRef.current) return;
         
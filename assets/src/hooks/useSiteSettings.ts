@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { bootstrapFetch } from '@/lib/bootstrap';
 
 interface SiteSettings {
   // Company Information
@@ -84,7 +85,7 @@ export const useSiteSettings = () => {
   useEffect(() => {
     const fetchSettings = async () => {
       try {
-        const response = await fetch('/public/');
+        const response = await bootstrapFetch('/public/');
         if (response.ok) {
           const data = await response.json();
           setSettings(data);
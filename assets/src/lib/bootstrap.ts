@@ -0,0 +1,87 @@
+/**
+ * Data the server inlines into the HTML shell (src/config/bootstrap.py):
+ * the page, site settings, current theme and the page's sections, in the
+ * shapes their API endpoints return.
+ *
+ * bootstrapFetch() answers the GET requests the payload covers with a
+ * synthetic Response and falls through to fetch() otherwise, so the first
+ * render needs no API round trips. An entry only serves the render pass
+ * that first reads it; it is dropped on the next task, so components
+ * mounted later (and refreshes after edits) fetch fresh data.
+ */
+
+interface BootstrapPayload {
+  slug: string | null;
+  page: { sections?: Array<{ id?: string }> } | null;
+  settings: unknown;
+  theme: unknown | null;
+  sections: Record<string, unknown>;
+}
+
+interface BootstrapEntry {
+  found: boolean;
+  data?: unknown;
+}
+
+let payload: BootstrapPayload | null | undefined;
+const expired = new Set<string>();
+
+function readPayload(): BootstrapPayload | null {
+  if (payload === undefined) {
+    const element = document.getElementById('bootstrap-data');
+    try {
+      payload = element?.textContent ? JSON.parse(element.textContent) : null;
+    } catch {
+      payload = null;
+    }
+  }
+  return payload ?? null;
+}
+
+function findEntry(data: BootstrapPayload, path: string): BootstrapEntry | undefined {
+  if (data.slug && path === `/api/v1/pages/by-slug/${data.slug}/`) {
+    return data.page ? { found: true, data: data.page } : { found: false };
+  }
+  if (path === '/public/') {
+    return { found: true, data: data.settings };
+  }
+  if (path === '/api/v1/themes/current/') {
+    return data.theme ? { found: true, data: data.theme } : undefined;
+  }
+  const section = path.match(/^\/public\/sections\/([^/]+)\/$/);
+  if (section && data.page) {
+    const id = decodeURIComponent(section[1]);
+    if (id in data.sections) {
+      return { found: true, data: data.sections[id] };
+    }
+    // Listed on the page but not created yet
+    if (data.page.sections?.some((entry) => entry.id === id)) {
+      return { found: false };
+    }
+  }
+  return undefined;
+}
+
+/** The payload's answer to a GET of `url`, or undefined when it has none. */
+export function bootstrapResponse(url: string): Response | undefined {
+  const data = readPayload();
+  if (!data || expired.has(url)) {
+    return undefined;
+  }
+  const entry = findEntry(data, url.split('?')[0]);
+  if (!entry) {
+    return undefined;
+  }
+  setTimeout(() => expired.add(url), 0);
+  const body = entry.found ? entry.data : { error: 'Not found' };
+  return new Response(JSON.stringify(body), {
+    status: entry.found ? 200 : 404,
+    headers: { 'Content-Type': 'application/json' },
+  });
+}
+
+export function bootstrapFetch(url: string, init?: RequestInit): Promise<Response> {
+  const method = (init?.method || 'GET').toUpperCase();
+  const response = method === 'GET' ? bootstrapResponse(url) : undefined;
+  return response ? Promise.resolve(response) : fetch(url, init);
+}
@@ -0,0 +1,77 @@
+import { bootstrapResponse } from '@/lib/bootstrap';
+
+/**
+ * Batched section loading.
+ *
+ * Every section component asks for its own content as it mounts. Requests
+ * made in the same task are collected and sent as one
+ * `GET /public/sections/?ids=a,b,c` (src/sections/bulk.py), and each caller
+ * gets a Response shaped like `GET /public/sections/<id>/` would return:
+ * 200 with the section, or 404 when it has not been created yet. Sections
+ * in the inlined bootstrap payload are answered without any request.
+ */
+
+const MAX_BATCH = 200;
+
+interface SectionData {
+  section_id: string;
+  [key: string]: unknown;
+}
+
+interface Pending {
+  resolve: (response: Response) => void;
+  reject: (error: unknown) => void;
+}
+
+let queue = new Map<string, Pending[]>();
+
+function jsonResponse(body: unknown, status: number): Response {
+  return new Response(JSON.stringify(body), {
+    status,
+    headers: { 'Content-Type': 'application/json' },
+  });
+}
+
+async function flush(batch: Map<string, Pending[]>): Promise<void> {
+  const ids = Array.from(batch.keys());
+  for (let start = 0; start < ids.length; start += MAX_BATCH) {
+    const chunk = ids.slice(start, start + MAX_BATCH);
+    try {
+      const query = chunk.map(encodeURIComponent).join(',');
+      const response = await fetch(`/public/sections/?ids=${query}`);
+      if (!response.ok) {
+        throw new Error(`Failed to fetch sections: ${response.status}`);
+      }
+      const data: { sections: SectionData[] } = await response.json();
+      const found = new Map(data.sections.map((section) => [section.section_id, section]));
+      for (const id of chunk) {
+        const section = found.get(id);
+        const reply = () => section
+          ? jsonResponse(section, 200)
+          : jsonResponse({ error: 'Section not found' }, 404);
+        batch.get(id)?.forEach((pending) => pending.resolve(reply()));
+      }
+    } catch (error) {
+      chunk.forEach((id) => batch.get(id)?.forEach((pending) => pending.reject(error)));
+    }
+  }
+}
+
+export function fetchSection(sectionId: string): Promise<Response> {
+  const inlined = bootstrapResponse(`/public/sections/${sectionId}/`);
+  if (inlined) {
+    return Promise.resolve(inlined);
+  }
+  return new Promise((resolve, reject) => {
+    if (queue.size === 0) {
+      setTimeout(() => {
+        const batch = queue;
+        queue = new Map();
+        flush(batch);
+      }, 0);
+    }
+    const waiting = queue.get(sectionId) ?? [];
+    waiting.push({ resolve, reject });
+    queue.set(sectionId, waiting);
+  });
+}
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Navigate } from 'react-router-dom';
 import { PageRenderer } from './PageRenderer';
+import { bootstrapFetch } from '@/lib/bootstrap';
 
 interface PageData {
   id: string;
@@ -29,7 +30,7 @@ export const CMSHomepage: React.FC = () => {
   useEffect(() => {
     const fetchHomepage = async () => {
       try {
-        const response = await fetch('/api/v1/pages/by-slug/home/');
+        const response = await bootstrapFetch('/api/v1/pages/by-slug/home/');
         
         if (!response.ok) {
           if (response.status === 404) {
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { useParams, Navigate } from 'react-router-dom';
 import { PageRenderer } from './PageRenderer';
+import { bootstrapFetch } from '@/lib/bootstrap';
 
 interface PageData {
   id: string;
@@ -36,7 +37,7 @@ export const CMSPageRoute: React.FC = () => {
 
     const fetchPage = async () => {
       try {
-        const response = await fetch(`/api/v1/pages/by-slug/${slug}/`);
+        const response = await bootstrapFetch(`/api/v1/pages/by-slug/${slug}/`);
         
         if (!response.ok) {
           if (response.status === 404) {
@@ -0,0 +1,57 @@
+"""
+Bootstrap payload inlined into the SPA shell.
+
+Without it the React app fetches the page, the site settings, the current
+theme and then each of the page's sections after it boots. IndexView embeds
+the same data as ``<script id="bootstrap-data" type="application/json">``,
+in the shapes those endpoints return, so the first render needs no API
+calls; the frontend (assets/src/lib/bootstrap.ts) falls back to fetching
+anything the payload does not cover.
+
+The payload costs at most five queries whatever the number of sections, and
+is cached with the rendered shell (config.shell), which saves of the models
+it is built from invalidate.
+"""
+from typing import Optional
+
+from pages.models import Page
+from pages.serializers import PageSerializer
+from sections.models import Section
+from sections.serializers import SectionSerializer
+from settings.models import SiteSettings
+from settings.serializers import SiteSettingsSerializer
+from themes.models import Theme, ThemeSetting
+from themes.serializers import ThemeSerializer
+
+
+def current_theme():
+    setting = ThemeSetting.objects.select_related('current_theme').first()
+    if setting:
+        return setting.current_theme
+    return Theme.objects.filter(is_active=True).first()
+
+
+def build_payload(slug: Optional[str]) -> dict:
+    """
+    Everything the app fetches to render ``slug`` on first load.
+    Without a slug (paths that are not published pages) only the site
+    settings and theme are included.
+
+    Returns:
+        Dict with the slug, the published page (or None), site settings, the
+        current theme (or None) and the page's existing sections by id. A
+        listed section missing from ``sections`` does not exist yet.
+    """
+    page = Page.objects.filter(slug=slug, is_published=True).first() if slug else None
+    sections = {}
+    if page is not None:
+        for section in Section.objects.filter(section_id__in=page.section_ids()):
+            sections[section.section_id] = SectionSerializer(section).data
+    theme = current_theme()
+    return {
+        'slug': slug,
+        'page': PageSerializer(page).data if page is not None else None,
+        'settings': SiteSettingsSerializer(SiteSettings.get_settings()).data,
+        'theme': ThemeSerializer(theme).data if theme is not None else None,
+        'sections': sections,
+    }
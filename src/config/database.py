@@ -0,0 +1,76 @@
+"""
+Database connection settings for the supported pooling modes.
+
+``DATABASE_POOL_MODE``:
+    persistent  One connection per thread, reused for CONN_MAX_AGE seconds and
+                health-checked before reuse (default).
+    pool        Django's native psycopg pool (requires psycopg-pool), one per
+                process. Connections return to the pool after each request,
+                so idle workers stop pinning Postgres backends.
+    pgbouncer   Through PgBouncer in transaction pooling mode: server-side
+                cursors and prepared statements are disabled, since
+                consecutive transactions may land on different server
+                connections.
+"""
+import dj_database_url
+
+POOL_MODES = ('persistent', 'pool', 'pgbouncer')
+
+
+def database_config(
+    url: str,
+    mode: str = 'persistent',
+    pool_min_size: int = 1,
+    pool_max_size: int = 1,
+    pool_timeout: float = 10.0,
+    conn_max_age: int = 600,
+) -> dict:
+    """
+    Build a DATABASES entry for ``url``.
+
+    Args:
+        url: Database URL (dj_database_url syntax)
+        mode: One of POOL_MODES
+        pool_min_size: Connections the pool keeps open per process (pool mode)
+        pool_max_size: Upper bound per process; one per serving thread is enough (pool mode)
+        pool_timeout: Seconds to wait for a free pooled connection before failing (pool mode)
+        conn_max_age: Seconds to keep persistent connections (persistent and pgbouncer modes)
+
+    Returns:
+        Django database settings dict
+    """
+    if mode not in POOL_MODES:
+        raise ValueError(f"DATABASE_POOL_MODE must be one of {', '.join(POOL_MODES)}, not {mode!r}")
+
+    config = dj_database_url.parse(url, conn_max_age=conn_max_age, conn_health_checks=True)
+    if config['ENGINE'] != 'django.db.backends.postgresql':
+        return config
+
+    options = config.setdefault('OPTIONS', {})
+    if mode == 'pool':
+        # The pool owns connection lifetime; Django requires CONN_MAX_AGE=0 with it
+        config['CONN_MAX_AGE'] = 0
+        options['pool'] = {
+            'min_size': min(pool_min_size, pool_max_size),
+            'max_size': pool_max_size,
+            'timeout': pool_timeout,
+        }
+    elif mode == 'pgbouncer':
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+        options['prepare_threshold'] = None
+    return config
+
+
+def connection_pools() -> dict:
+    """Native connection pools created in this process, by database alias"""
+    # Imported here: this module is loaded while settings are still being read
+    from django.db import connections
+
+    pools = {}
+    for alias in connections:
+        if 'pool' not in connections.settings[alias].get('OPTIONS', {}):
+            continue
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            pools[alias] = pool
+    return pools
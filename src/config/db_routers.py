@@ -0,0 +1,88 @@
+"""
+Read-replica routing.
+
+Read-only queries for the apps in ``DATABASE_REPLICA_APPS`` go to one of the
+replicas in ``DATABASE_REPLICAS``; everything else, and all writes, go to the
+primary (``default``). A request that writes is pinned to the primary for the
+rest of the request, and a cookie keeps the client's next requests on the
+primary for ``DATABASE_REPLICA_STICKY_SECONDS`` so users read their own writes
+while replicas catch up.
+
+Queries inside an atomic block on the primary, ``select_for_update`` and
+``get_or_create`` always use the primary. Outside a request (management
+commands, Celery tasks) the first write pins the rest of the context.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary_pin'
+
+_pinned: ContextVar[bool] = ContextVar('db_primary_pinned', default=False)
+_wrote: ContextVar[bool] = ContextVar('db_primary_wrote', default=False)
+
+
+@contextmanager
+def use_primary():
+    """Route reads to the primary inside the block, e.g. for background jobs that act on fresh rows"""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    """Routes reads for replica-eligible apps to a random replica unless pinned"""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label not in settings.DATABASE_REPLICA_APPS:
+            return None
+        if _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Scopes primary pinning to a request and carries it across requests in a
+    short-lived cookie after a write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = _pinned.set(request.method not in ('GET', 'HEAD', 'OPTIONS') or PIN_COOKIE in request.COOKIES)
+        wrote = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            needs_pin = _wrote.get()
+        finally:
+            _pinned.reset(pinned)
+            _wrote.reset(wrote)
+
+        if needs_pin and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -15,3 +15,14 @@ threads = int(os.getenv("PYTHON_MAX_THREADS", 1))
 reload = bool(strtobool(os.getenv("WEB_RELOAD", "false")))
 
 timeout = int(os.getenv("WEB_TIMEOUT", 120))
+
+
+def on_starting(server):
+    # Each worker thread holds at most one database connection (see DATABASE_POOL_MODE)
+    per_worker = threads
+    if os.getenv("DATABASE_POOL_MODE", "persistent") == "pool":
+        per_worker = int(os.getenv("DATABASE_POOL_MAX_SIZE", threads))
+    server.log.info(
+        f"Database connections from web workers: up to {workers * per_worker} "
+        f"({workers} workers x {per_worker})"
+    )
@@ -15,7 +15,8 @@ import socket
 import sys
 from distutils.util import strtobool
 from pathlib import Path
-import dj_database_url # Ensure this import is present
+
+from config.database import database_config
 
 # Build paths inside the project like this: BASE_DIR / "subdir".
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -131,6 +132,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "gold_exchange.instrumentation.InstrumentationMiddleware",
+    "config.db_routers.ReplicaPinningMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -187,13 +190,45 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# Connection handling: 'persistent', 'pool' (native psycopg pool) or
+# 'pgbouncer' (transaction pooling); see config/database.py.
+DATABASE_POOL_MODE = os.getenv("DATABASE_POOL_MODE", "persistent")
+# Pools are per process and each gunicorn thread holds at most one connection,
+# so the default max is PYTHON_MAX_THREADS; Postgres sees up to
+# WEB_CONCURRENCY * DATABASE_POOL_MAX_SIZE connections from the web tier.
+DATABASE_POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", os.getenv("PYTHON_MAX_THREADS", "1")))
+DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "1"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "10"))
+DATABASE_OPTIONS = {
+    "mode": DATABASE_POOL_MODE,
+    "pool_min_size": DATABASE_POOL_MIN_SIZE,
+    "pool_max_size": DATABASE_POOL_MAX_SIZE,
+    "pool_timeout": DATABASE_POOL_TIMEOUT,
+}
+
 DATABASES = {
-    "default": dj_database_url.config(
-        conn_max_age=600, # Optional: set connection max age
-        default=os.getenv("DATABASE_URL", f"postgres://{os.getenv('POSTGRES_USER', 'helloweb')}:{os.getenv('POSTGRES_PASSWORD', 'password')}@{os.getenv('POSTGRES_HOST', 'postgres')}:{os.getenv('POSTGRES_PORT', '5432')}/{os.getenv('POSTGRES_DB', 'helloweb')}") # noqa E501
+    "default": database_config(
+        os.getenv("DATABASE_URL", f"postgres://{os.getenv('POSTGRES_USER', 'helloweb')}:{os.getenv('POSTGRES_PASSWORD', 'password')}@{os.getenv('POSTGRES_HOST', 'postgres')}:{os.getenv('POSTGRES_PORT', '5432')}/{os.getenv('POSTGRES_DB', 'helloweb')}"),  # noqa E501
+        **DATABASE_OPTIONS,
     )
 }
 
+# Read replicas (comma-separated DATABASE_URL-style URLs). Read-only queries for
+# DATABASE_REPLICA_APPS are spread across them; see config/db_routers.py.
+DATABASE_REPLICAS = []
+for index, url in enumerate(u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {**database_config(url, **DATABASE_OPTIONS), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["config.db_routers.ReplicaRouter"]
+DATABASE_REPLICA_APPS = ["gold_exchange", "pages", "sections", "themes"]
+# Keep a client on the primary this long after it writes, so it reads its own writes
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+
+# Covering indexes are PostgreSQL-only; SQLite (local dev, tests) builds them without INCLUDE columns
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -338,6 +373,29 @@ SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
 # Solana Configuration
 SOLANA_NETWORK = os.getenv('SOLANA_NETWORK', 'devnet')
 SOLANA_RPC_URL = os.getenv('SOLANA_RPC_URL', 'https://api.devnet.solana.com')
+# Optional endpoint pool (comma-separated). Reads are routed to the healthiest
+# endpoint and hedged when slow; writes go to SOLANA_RPC_WRITE_URLS if set.
+SOLANA_RPC_URLS = [url.strip() for url in os.getenv('SOLANA_RPC_URLS', '').split(',') if url.strip()]
+SOLANA_RPC_WRITE_URLS = [url.strip() for url in os.getenv('SOLANA_RPC_WRITE_URLS', '').split(',') if url.strip()]
+SOLANA_RPC_TIMEOUT = float(os.getenv('SOLANA_RPC_TIMEOUT', '10'))
+SOLANA_RPC_HEDGE = bool(strtobool(os.getenv('SOLANA_RPC_HEDGE', 'true')))
+# WebSocket endpoint for manage.py ingest_wallet_activity; derived from SOLANA_RPC_URL when unset
+SOLANA_WS_URL = os.getenv('SOLANA_WS_URL', '')
+# Signer service (manage.py run_signer): 'host:port' or a Unix socket path.
+# When unset, each process signs in-process with the mint authority key.
+SOLANA_SIGNER_ADDRESS = os.getenv('SOLANA_SIGNER_ADDRESS', '')
+SOLANA_SIGNER_AUTHKEY = os.getenv('SOLANA_SIGNER_AUTHKEY', '')
+# Durable nonce accounts (comma-separated) owned by the signer service
+SOLANA_NONCE_ACCOUNTS = [a.strip() for a in os.getenv('SOLANA_NONCE_ACCOUNTS', '').split(',') if a.strip()]
+# Priority fees for backend-signed transactions: the given percentile of
+# recent prioritization fees, clamped to [MIN, MAX] micro-lamports per CU.
+SOLANA_PRIORITY_FEE_PERCENTILE = float(os.getenv('SOLANA_PRIORITY_FEE_PERCENTILE', '75'))
+SOLANA_PRIORITY_FEE_MIN = int(os.getenv('SOLANA_PRIORITY_FEE_MIN', '1000'))
+SOLANA_PRIORITY_FEE_MAX = int(os.getenv('SOLANA_PRIORITY_FEE_MAX', '2000000'))
+# Compute unit limit = simulated units * margin
+SOLANA_COMPUTE_UNIT_MARGIN = float(os.getenv('SOLANA_COMPUTE_UNIT_MARGIN', '1.2'))
+# Seconds between rebroadcasts of unconfirmed transactions
+SOLANA_REBROADCAST_INTERVAL = float(os.getenv('SOLANA_REBROADCAST_INTERVAL', '2'))
 SGOLD_MINT_ADDRESS = os.getenv('SGOLD_MINT_ADDRESS', '')
 MINT_AUTHORITY_KEYPAIR = os.getenv('MINT_AUTHORITY_KEYPAIR', '')
 TREASURY_WALLET = os.getenv('TREASURY_WALLET', '')
@@ -350,3 +408,54 @@ BUY_FEE_TREASURY = int(os.getenv('BUY_FEE_TREASURY', '300'))
 BUY_FEE_DEV = int(os.getenv('BUY_FEE_DEV', '200'))
 SELL_FEE_TREASURY = int(os.getenv('SELL_FEE_TREASURY', '300'))
 SELL_FEE_BURN = int(os.getenv('SELL_FEE_BURN', '200'))
+
+# Settled transactions older than this move to the archive table
+# (manage.py archive_transactions)
+GOLD_ARCHIVE_AFTER_DAYS = int(os.getenv('GOLD_ARCHIVE_AFTER_DAYS', '90'))
+
+# Uploaded images are streamed from the database in slices of this many bytes
+IMAGE_STREAM_CHUNK_SIZE = int(os.getenv('IMAGE_STREAM_CHUNK_SIZE', str(256 * 1024)))
+# Tiered image cache (images.cache). Memory: per-worker budget (0 disables the
+# cache) and the largest image kept in memory. Disk: directory shared by the
+# workers on a host ('' disables the tier) and its budget. Hits are served
+# without a query for IMAGE_CACHE_TTL seconds, then revalidated.
+IMAGE_CACHE_MEMORY_BYTES = int(os.getenv('IMAGE_CACHE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+IMAGE_CACHE_MEMORY_MAX_ITEM = int(os.getenv('IMAGE_CACHE_MEMORY_MAX_ITEM', str(256 * 1024)))
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', '')
+IMAGE_CACHE_DISK_BYTES = int(os.getenv('IMAGE_CACHE_DISK_BYTES', str(1024 * 1024 * 1024)))
+IMAGE_CACHE_TTL = float(os.getenv('IMAGE_CACHE_TTL', '300'))
+# Responsive renditions (images.renditions): width steps, modern formats in
+# order of preference (skipped when Pillow cannot encode them), encoder
+# quality, and encoder processes per web worker when Celery is not configured
+IMAGE_RENDITION_WIDTHS = [int(w) for w in os.getenv('IMAGE_RENDITION_WIDTHS', '320,640,1024,1600').split(',') if w.strip()]
+IMAGE_RENDITION_FORMATS = [f.strip() for f in os.getenv('IMAGE_RENDITION_FORMATS', 'image/avif,image/webp').split(',') if f.strip()]
+IMAGE_RENDITION_QUALITY = int(os.getenv('IMAGE_RENDITION_QUALITY', '80'))
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', '1'))
+# Where new image bytes are written (images.storage): 'database'
+# (UploadedImage.image_data), 'filesystem' (content-addressed files under
+# IMAGE_STORAGE_ROOT; leave IMAGE_CACHE_DIR empty, the files are already local)
+# or 's3' (any S3-compatible service). Existing blobs are moved with
+# manage.py move_images_to_storage.
+IMAGE_STORAGE = os.getenv('IMAGE_STORAGE', 'database')
+IMAGE_STORAGE_ROOT = os.getenv('IMAGE_STORAGE_ROOT', os.path.join(BASE_DIR.parent, 'image_store'))
+IMAGE_S3_ENDPOINT_URL = os.getenv('IMAGE_S3_ENDPOINT_URL', '')
+IMAGE_S3_BUCKET = os.getenv('IMAGE_S3_BUCKET', '')
+IMAGE_S3_ACCESS_KEY = os.getenv('IMAGE_S3_ACCESS_KEY', '')
+IMAGE_S3_SECRET_KEY = os.getenv('IMAGE_S3_SECRET_KEY', '')
+IMAGE_S3_REGION = os.getenv('IMAGE_S3_REGION', 'us-east-1')
+# Image uploads (images.uploads): size limit, staging directory for resumable
+# uploads (shared by the workers that may receive a session's chunks) and how
+# long an unfinished upload can be resumed
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv('IMAGE_UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+IMAGE_UPLOAD_DIR = os.getenv('IMAGE_UPLOAD_DIR', os.path.join(BASE_DIR.parent, 'image_uploads'))
+IMAGE_UPLOAD_SESSION_TTL = int(os.getenv('IMAGE_UPLOAD_SESSION_TTL', str(24 * 60 * 60)))
+
+# Rendered SPA shells (config.shell) are re-rendered at least this often,
+# besides on Page saves and new builds
+SPA_SHELL_CACHE_TTL = int(os.getenv('SPA_SHELL_CACHE_TTL', '300'))
+
+# Instrumentation: responses under these prefixes get a Server-Timing header.
+# /metrics requires "Authorization: Bearer <METRICS_TOKEN>"; without a token it is
+# only served when DEBUG is on.
+SERVER_TIMING_PATHS = ['/api/v1/gold/']
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
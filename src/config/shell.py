@@ -0,0 +1,206 @@
+"""
+Cached rendering of the single-page-app HTML shell (IndexView).
+
+Every non-API route answers with the same small document, differing only in
+the page's title and description. Outside DEBUG it is rendered once per
+page slug and kept in memory with its gzip and brotli encodings and ETags,
+so a hit costs no query, template rendering, compression or disk read.
+
+- The Vite manifest is parsed once and re-read only when its mtime changes;
+  a new build also retires the shells rendered from the old one.
+- Saving or deleting a Page, or anything else in the inlined bootstrap
+  payload (config.bootstrap), bumps a generation number in the default
+  cache (shared by the workers when it is Redis), which retires every
+  worker's shells. Entries also expire after SPA_SHELL_CACHE_TTL seconds, for pages
+  changed without signals.
+- Only published pages get a shell of their own. Every other path on the
+  catch-all route (client-side routes, typos, scanners) shares one
+  "not found" shell, so arbitrary URLs cannot render, compress or evict
+  anything. The published slugs are loaded once per generation.
+- The cache is an LRU of MAX_ENTRIES slugs.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, FrozenSet, Optional, Tuple
+
+import brotli
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from pages.models import Page
+from sections.models import Section
+from settings.models import SiteSettings
+from themes.models import Theme, ThemeSetting
+
+GENERATION_KEY = 'spa_shell_generation'
+
+# Most shells kept per process
+MAX_ENTRIES = 512
+
+# Shells are compressed on the request path, where brotli's top levels cost
+# far more CPU than the few bytes they save on a small document
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+ACCEPTS_BR_RE = re.compile(r'\bbr\b(?!;\s*q=0(\.0*)?\b)')
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b(?!;\s*q=0(\.0*)?\b)')
+
+
+@dataclass
+class Shell:
+    """A rendered shell in each content encoding"""
+    body: bytes
+    gzip: bytes
+    br: bytes
+    etag: str
+    version: Tuple
+    created_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def build(cls, body: bytes, version: Tuple) -> 'Shell':
+        return cls(
+            body=body,
+            gzip=gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+            br=brotli.compress(body, quality=BROTLI_QUALITY),
+            etag=hashlib.sha256(body).hexdigest()[:32],
+            version=version,
+        )
+
+
+_manifest: Tuple[Optional[int], dict] = (None, {})
+_manifest_lock = threading.Lock()
+
+
+def load_manifest() -> Tuple[Optional[int], dict]:
+    """
+    The Vite build manifest, parsed once per change of the file.
+
+    Returns:
+        (mtime in ns, or None when there is no manifest; parsed manifest)
+    """
+    global _manifest
+    path = os.path.join(settings.STATIC_ROOT, 'manifest.json')
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None, {}
+    if _manifest[0] != mtime:
+        with _manifest_lock:
+            if _manifest[0] != mtime:
+                with open(path, 'r') as f:
+                    _manifest = (mtime, json.load(f))
+    return _manifest
+
+
+class ShellCache:
+    """Per-process LRU of rendered shells, keyed by page slug (None for the "not found" shell)"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Shell]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Optional[str], version: Tuple, render: Callable[[], bytes]) -> Shell:
+        """
+        The shell for ``key``, rendered with ``render`` unless a current one is cached.
+
+        Args:
+            key: Published page slug the shell was rendered for, or None
+            version: Manifest mtime and page generation the shell must match
+            render: Renders the shell's HTML
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if (entry is not None and entry.version == version
+                and time.monotonic() - entry.created_at < settings.SPA_SHELL_CACHE_TTL):
+            return entry
+
+        entry = Shell.build(render(), version)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+shell_cache = ShellCache()
+
+
+def generation() -> int:
+    return cache.get(GENERATION_KEY, 0)
+
+
+_published: Tuple[Optional[int], float, FrozenSet[str]] = (None, 0.0, frozenset())
+_published_lock = threading.Lock()
+
+
+def published_slugs(current_generation: int) -> FrozenSet[str]:
+    """Slugs of the published pages, loaded once per generation (and SPA_SHELL_CACHE_TTL)"""
+    global _published
+
+    def stale():
+        loaded_for, loaded_at, _ = _published
+        return loaded_for != current_generation or time.monotonic() - loaded_at >= settings.SPA_SHELL_CACHE_TTL
+
+    if stale():
+        with _published_lock:
+            if stale():
+                slugs = frozenset(Page.objects.filter(is_published=True).values_list('slug', flat=True))
+                _published = (current_generation, time.monotonic(), slugs)
+    return _published[2]
+
+
+def _invalidate_shells(sender, **kwargs):
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+    shell_cache.clear()
+
+
+# Models whose data is rendered into the shell
+for _model in (Page, Section, SiteSettings, Theme, ThemeSetting):
+    post_save.connect(_invalidate_shells, sender=_model, dispatch_uid=f'spa_shell_{_model.__name__}_saved')
+    post_delete.connect(_invalidate_shells, sender=_model, dispatch_uid=f'spa_shell_{_model.__name__}_deleted')
+
+
+def respond(request, shell: Shell) -> HttpResponse:
+    """
+    Serve a shell in the best encoding the client accepts, answering
+    revalidations with 304.
+    """
+    accept_encoding = request.headers.get('Accept-Encoding', '')
+    if ACCEPTS_BR_RE.search(accept_encoding):
+        body, encoding = shell.br, 'br'
+    elif ACCEPTS_GZIP_RE.search(accept_encoding):
+        body, encoding = shell.gzip, 'gzip'
+    else:
+        body, encoding = shell.body, None
+
+    response = HttpResponse(body, content_type='text/html; charset=utf-8')
+    etag = f'"{shell.etag}-{encoding}"' if encoding else f'"{shell.etag}"'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Content-Length'] = len(body)
+    response['ETag'] = etag
+    # Revalidate every time: a deploy or page edit must show up at once
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return get_conditional_response(request, etag=etag, response=response)
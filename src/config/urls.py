@@ -21,8 +21,9 @@ from django.urls import include
 from django.urls import path, re_path
 from django.views.generic import TemplateView
 from django.conf.urls.static import static
-from .views import IndexView, list_available_backgrounds, ImageUploadView, serve_media_file, serve_database_image
+from .views import IndexView, list_available_backgrounds, ImageUploadView, ImageUploadSessionView, ImageUploadSessionDetailView, serve_media_file, serve_database_image
 from .api_auth_views import LoginView, LogoutView, AuthStatusView, SignupView, get_csrf_token
+from gold_exchange.instrumentation import metrics_view
 from . import admin as custom_admin  # Import our custom admin configuration
 import logging
 from django.views.decorators.csrf import ensure_csrf_cookie
@@ -41,6 +42,8 @@ api_patterns = [
     path("csrf_token/", get_csrf_token, name="api_csrf_token"),
     path("backgrounds/", list_available_backgrounds, name="api_backgrounds"),
     path("upload/image/", ImageUploadView.as_view(), name="api_image_upload"),
+    path("upload/image/sessions/", ImageUploadSessionView.as_view(), name="api_image_upload_sessions"),
+    path("upload/image/sessions/<uuid:session_id>/", ImageUploadSessionDetailView.as_view(), name="api_image_upload_session"),
     path("images/<str:filename>", serve_database_image, name="api_serve_image"),
     # User URLs
     path("", include("users.urls")),
@@ -63,6 +66,7 @@ def csrf_token_view(request):
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("up/", include("up.urls")),
+    path("metrics", metrics_view, name="metrics"),
     
     # Public endpoints (no auth required)
     path("public/", include("settings.urls")),
@@ -2,10 +2,10 @@ from django.views.generic import TemplateView
 from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
-import json
 import os
 import glob
-import uuid
+from functools import partial
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
@@ -15,45 +15,59 @@ from rest_framework.permissions import AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import mimetypes
+from datetime import datetime, timezone as dt_timezone
 from django.http import FileResponse, Http404, HttpResponse
-from images.models import UploadedImage
-from pages.models import Page
+from images.delivery import conditional, serve_image
+from images import imaging, uploads
+from . import bootstrap, shell
 
 class IndexView(TemplateView):
     template_name = "index.html"
 
+    def get(self, request, *args, **kwargs):
+        self.slug = self.page_slug()
+        if settings.DEBUG:
+            # Assets come from the Vite dev server; nothing worth caching
+            return super().get(request, *args, **kwargs)
+        manifest_version, _ = shell.load_manifest()
+        current_generation = shell.generation()
+        if self.slug not in shell.published_slugs(current_generation):
+            # Every path that is not a published page shares one shell
+            self.slug = None
+        entry = shell.shell_cache.get(
+            self.slug,
+            (manifest_version, current_generation),
+            lambda: self.render_to_response(self.get_context_data(**kwargs)).render().content,
+        )
+        return shell.respond(request, entry)
+
+    def page_slug(self):
+        path = self.request.path.strip('/')
+        return path if path else 'home'  # Default to 'home' for root path
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["debug"] = settings.DEBUG
         
-        # Try to get page metadata based on the URL path
-        path = self.request.path.strip('/')
-        page_slug = path if path else 'home'  # Default to 'home' for root path
+        # Page, settings, theme and sections the app would otherwise fetch after booting
+        context["bootstrap"] = bootstrap.build_payload(self.slug)
         
-        # Try to fetch the page from database
-        try:
-            page = Page.objects.get(slug=page_slug, is_published=True)
-            context["page_title"] = page.meta_title or page.title
-            context["page_description"] = page.meta_description or f"Welcome to {page.title}"
-        except Page.DoesNotExist:
+        page = context["bootstrap"]["page"]
+        if page is not None:
+            context["page_title"] = page["meta_title"] or page["title"]
+            context["page_description"] = page["meta_description"] or f"Welcome to {page['title']}"
+        else:
             # Default metadata if page not found
             context["page_title"] = "Welcome"
             context["page_description"] = "Welcome to our website"
         
-        # In production, read the manifest to get hashed filenames
+        # In production, use the manifest to get hashed filenames (parsed once per build)
         if not settings.DEBUG:
-            manifest_path = os.path.join(settings.STATIC_ROOT, "manifest.json")
-            if os.path.exists(manifest_path):
-                with open(manifest_path, "r") as f:
-                    manifest = json.load(f)
-                    # The manifest uses "index.html" entry point which outputs to "index.js"
-                    context["main_js"] = manifest.get("index.html", {}).get("file", "index.js")
-                    # CSS is nested differently
-                    context["main_css"] = "index.css"
-            else:
-                # Fallback if manifest doesn't exist
-                context["main_js"] = "index.js"
-                context["main_css"] = "index.css"
+            _, manifest = shell.load_manifest()
+            # The manifest uses "index.html" entry point which outputs to "index.js"
+            context["main_js"] = manifest.get("index.html", {}).get("file", "index.js")
+            # CSS is nested differently
+            context["main_css"] = "index.css"
         
         return context 
 
@@ -101,45 +115,95 @@ class ImageUploadView(APIView):
         
         image_file = request.FILES['image']
         
-        # Validate file size (5MB limit)
-        if image_file.size > 5 * 1024 * 1024:  # 5MB in bytes
-            return Response({'error': 'File size exceeds 5MB limit'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Validate file type
-        content_type = image_file.content_type
-        if not content_type or not content_type.startswith('image/'):
-            return Response({'error': 'File must be an image'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Generate unique filename
-        file_extension = image_file.name.split('.')[-1].lower() if '.' in image_file.name else 'jpg'
-        unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
+        try:
+            uploads.check_size(image_file.size)
+            # Validate file type from its magic bytes, not the client's content type
+            content_type = uploads.detect_type(image_file.read(imaging.SNIFF_LENGTH))
+            image_file.seek(0)
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Read the entire image data into memory
-            image_data = image_file.read()
-            
-            # Save to database instead of filesystem
-            uploaded_image = UploadedImage.objects.create(
-                filename=unique_filename,
-                original_filename=image_file.name,
-                content_type=content_type,
-                size=image_file.size,
-                image_data=image_data
-            )
-            
-            # Return database-backed URL
-            file_url = f"/api/v1/images/{unique_filename}"
-            
-            return Response({
-                'success': True,
-                'url': file_url,
-                'filename': unique_filename,
-                'size': image_file.size
-            }, status=status.HTTP_201_CREATED)
+            # Streamed to the database, or to object storage when IMAGE_STORAGE is set
+            image = uploads.save_upload(image_file.name, content_type, image_file.size, image_file.chunks())
+            return Response(upload_response(image), status=status.HTTP_201_CREATED)
             
         except Exception as e:
             return Response({'error': f'Failed to save image: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+def upload_response(image):
+    """Response body for a completed upload, single-request or resumable"""
+    return {
+        'success': True,
+        'url': image.url,
+        'filename': image.filename,
+        'size': image.size
+    }
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ImageUploadSessionView(APIView):
+    """Start a resumable image upload (protocol in images.uploads)"""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return Response({'error': 'size is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            session = uploads.create_session(str(request.data.get('filename', '')), size)
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response({
+            'id': str(session.id),
+            'url': reverse('api:api_image_upload_session', args=[session.id]),
+            'offset': 0,
+            'size': session.size,
+        }, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ImageUploadSessionDetailView(APIView):
+    """Resume (GET), continue (PATCH) or abort (DELETE) a resumable image upload"""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get_session(self, session_id):
+        session = uploads.get_session(session_id)
+        if session is None:
+            raise Http404("Upload session not found")
+        return session
+
+    def get(self, request, session_id):
+        session = self.get_session(session_id)
+        offset = uploads.session_offset(session)
+        return Response({'offset': offset, 'size': session.size}, headers={'Upload-Offset': str(offset)})
+
+    def patch(self, request, session_id):
+        session = self.get_session(session_id)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return Response({'error': 'Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST)
+        # Read the body as it arrives; request.data would buffer it
+        body = iter(partial(request.read, uploads.READ_SIZE), b'')
+        try:
+            offset, image = uploads.append_chunk(session, offset, body)
+        except uploads.OffsetMismatch as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=e.status, headers={'Upload-Offset': str(e.offset)})
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        if image is not None:
+            return Response(upload_response(image), status=status.HTTP_201_CREATED)
+        return Response({'offset': offset, 'size': session.size}, headers={'Upload-Offset': str(offset)})
+
+    def delete(self, request, session_id):
+        uploads.discard_session(self.get_session(session_id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 def serve_media_file(request, path):
     """Serve media files in production when web server doesn't handle them"""
     file_path = os.path.join(settings.MEDIA_ROOT, path)
@@ -165,26 +229,16 @@ def serve_media_file(request, path):
         content_type=content_type,
         as_attachment=False
     )
-    return response
+    
+    # Validators from the file's mtime and size, as nginx computes them
+    stat = os.stat(file_path)
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    modified = datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc)
+    conditional_response = conditional(request, response, etag, modified)
+    if conditional_response is not response:
+        response.close()  # 304/412: release the file handle
+    return conditional_response
 
 def serve_database_image(request, filename):
-    """Serve images stored in the database"""
-    try:
-        # Fetch image from database
-        image = UploadedImage.objects.get(filename=filename)
-        
-        # Create HTTP response with image data
-        response = HttpResponse(
-            image.image_data,
-            content_type=image.content_type
-        )
-        
-        # Set appropriate headers
-        response['Content-Length'] = image.size
-        response['Cache-Control'] = 'public, max-age=31536000'  # Cache for 1 year
-        response['Content-Disposition'] = f'inline; filename="{image.original_filename}"'
-        
-        return response
-        
-    except UploadedImage.DoesNotExist:
-        raise Http404("Image not found")
\ No newline at end of file
+    """Serve images stored in the database, streamed in chunks (supports Range requests)"""
+    return serve_image(request, filename)
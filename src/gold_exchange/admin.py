@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import SystemWallet, GoldTransaction, ExchangeQuote
+from .admin_changelist import LargeTableAdmin
+from .models import SystemWallet, GoldTransaction, ArchivedGoldTransaction, ExchangeQuote
 
 
 @admin.register(SystemWallet)
@@ -15,7 +16,7 @@ class SystemWalletAdmin(admin.ModelAdmin):
 
 
 @admin.register(GoldTransaction)
-class GoldTransactionAdmin(admin.ModelAdmin):
+class GoldTransactionAdmin(LargeTableAdmin):
     list_display = [
         'id',
         'transaction_type',
@@ -34,7 +35,15 @@ class GoldTransactionAdmin(admin.ModelAdmin):
         'user_token_account',
     ]
     search_fields = ['user_wallet', 'tx_signature']
-    date_hierarchy = 'created_at'
+    changelist_fields = [
+        'id',
+        'transaction_type',
+        'user_wallet',
+        'token_amount',
+        'sol_amount',
+        'status',
+        'created_at',
+    ]
 
     fieldsets = (
         ('User Information', {
@@ -78,8 +87,35 @@ class GoldTransactionAdmin(admin.ModelAdmin):
     user_wallet_short.short_description = 'User Wallet'
 
 
+@admin.register(ArchivedGoldTransaction)
+class ArchivedGoldTransactionAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'transaction_type',
+        'user_wallet_short',
+        'token_amount',
+        'sol_amount',
+        'status',
+        'created_at',
+        'archived_at',
+    ]
+    list_filter = ['transaction_type', 'status']
+    # Exact matches use the tx_signature and user_wallet indexes
+    search_fields = ['=tx_signature', '=user_wallet']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def user_wallet_short(self, obj):
+        return f"{obj.user_wallet[:8]}...{obj.user_wallet[-8:]}"
+    user_wallet_short.short_description = 'User Wallet'
+
+
 @admin.register(ExchangeQuote)
-class ExchangeQuoteAdmin(admin.ModelAdmin):
+class ExchangeQuoteAdmin(LargeTableAdmin):
     list_display = [
         'quote_id_short',
         'action',
@@ -92,7 +128,16 @@ class ExchangeQuoteAdmin(admin.ModelAdmin):
     list_filter = ['action', 'used', 'created_at']
     readonly_fields = ['created_at', 'quote_id']
     search_fields = ['quote_id', 'user_wallet']
-    date_hierarchy = 'created_at'
+    search_help_text = 'Quote id or wallet address prefix (case-sensitive)'
+    changelist_fields = [
+        'quote_id',
+        'action',
+        'sol_amount',
+        'token_amount',
+        'used',
+        'expires_at',
+        'created_at',
+    ]
 
     fieldsets = (
         ('Quote Information', {
@@ -0,0 +1,198 @@
+"""
+Admin changelists that stay fast on large ledgers.
+
+The stock changelist runs ``COUNT(*)`` twice per page (filtered and total),
+pages with ``OFFSET`` and searches with ``ILIKE '%term%'``, all of which scan
+the table. ``LargeTableAdmin`` instead:
+
+- estimates counts from ``pg_class.reltuples`` (or the planner's row
+  estimate when filters are applied) on PostgreSQL, counting exactly only
+  when the estimate is small;
+- pages the default ordering by keyset ("Newer" / "Older" links carrying a
+  ``(created_at, pk)`` cursor), falling back to numbered pages when the
+  user sorts by another column;
+- searches base58 columns by exact match or case-sensitive prefix, which
+  the columns' btree (and ``varchar_pattern_ops``) indexes can answer;
+- loads only the listed columns, leaving the full row for the detail view.
+"""
+import json
+from datetime import datetime
+from typing import Optional
+
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters, ShowFacets
+from django.contrib.admin.views.main import ALL_VAR, ORDER_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'cursor'
+
+# Shorter search terms match exactly rather than scanning a wide prefix range
+MIN_PREFIX_LENGTH = 4
+
+
+def estimate_count(queryset) -> Optional[int]:
+    """
+    Planner estimate of a queryset's row count (PostgreSQL only).
+
+    Returns:
+        Estimated rows, or None where no estimate is available
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+            # -1 until the table is first vacuumed or analyzed
+            return row[0] if row and row[0] >= 0 else None
+
+        sql, params = queryset.order_by().query.get_compiler(using=queryset.db).as_sql()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting from planner estimates once tables are large"""
+
+    # Below this an exact COUNT(*) is cheap and estimates are at their least accurate
+    exact_count_threshold = 10_000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list) if hasattr(self.object_list, 'query') else None
+        self.is_estimate = estimate is not None and estimate >= self.exact_count_threshold
+        return estimate if self.is_estimate else super().count
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist paging its default ordering by (keyset_field, pk) cursors"""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering and searching start again from the newest page
+        if CURSOR_VAR not in (new_params or {}):
+            remove = [*(remove or []), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if self.model_admin.changelist_fields:
+            queryset = queryset.only(*self.model_admin.changelist_fields)
+        return queryset
+
+    def get_results(self, request):
+        cursor = self.params.pop(CURSOR_VAR, None)
+        self.keyset = ORDER_VAR not in self.params and ALL_VAR not in self.params
+        if not self.keyset:
+            super().get_results(request)
+            self.count_is_estimate = getattr(self.paginator, 'is_estimate', False)
+            return
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        rows, has_newer, has_older = self.keyset_page(cursor)
+
+        self.paginator = paginator
+        self.result_count = paginator.count
+        self.count_is_estimate = getattr(paginator, 'is_estimate', False)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_newer or has_older
+        self.first_url = self.get_query_string() if has_newer else None
+        self.newer_url = self.get_query_string({CURSOR_VAR: self.encode_cursor('b', rows[0])}) if has_newer else None
+        self.older_url = self.get_query_string({CURSOR_VAR: self.encode_cursor('a', rows[-1])}) if has_older else None
+
+    def keyset_page(self, cursor: Optional[str]):
+        """
+        One page of results around ``cursor``.
+
+        Returns:
+            Tuple of (rows newest first, has newer rows, has older rows)
+        """
+        field = self.model_admin.keyset_field
+        size = self.list_per_page
+        # get_ordering() ends the default ordering with -pk, so it is total
+        queryset = self.queryset
+        if cursor is None:
+            rows = list(queryset[:size + 1])
+            return rows[:size], False, len(rows) > size
+
+        direction, value, pk = self.decode_cursor(cursor)
+        if direction == 'a':
+            rows = list(queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))[:size + 1])
+            return rows[:size], True, len(rows) > size
+
+        rows = list(queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})).reverse()[:size + 1])
+        has_newer = len(rows) > size
+        return rows[:size][::-1], has_newer, True
+
+    def encode_cursor(self, direction: str, obj) -> str:
+        return f"{direction}{getattr(obj, self.model_admin.keyset_field).isoformat()}~{obj.pk}"
+
+    def decode_cursor(self, cursor: str):
+        try:
+            value, pk = cursor[1:].split('~', 1)
+            if cursor[0] not in 'ab':
+                raise ValueError(cursor)
+            return cursor[0], datetime.fromisoformat(value), self.lookup_opts.pk.to_python(pk)
+        except Exception:
+            raise IncorrectLookupParameters(f"Invalid cursor {cursor!r}")
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for tables too large for COUNT(*), OFFSET paging and
+    substring search. ``search_fields`` are matched exactly or by prefix.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = ShowFacets.NEVER
+    # Descending datetime column the default ordering sorts by
+    keyset_field = 'created_at'
+    # Columns loaded for the list; None loads whole rows
+    changelist_fields = None
+    search_help_text = 'Exact id, or a wallet address / signature prefix (case-sensitive)'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        query = Q()
+        pk_field = self.model._meta.pk
+        if term.isdigit() and pk_field.get_internal_type() in ('AutoField', 'BigAutoField', 'BigIntegerField'):
+            query |= Q(pk=int(term))
+        lookup = 'startswith' if len(term) >= MIN_PREFIX_LENGTH else 'exact'
+        for name in self.search_fields:
+            name = name.lstrip('^=@')
+            if lookup == 'exact':
+                # Skip columns the term cannot be a value of, e.g. a short string for a binary key
+                try:
+                    self.model._meta.get_field(name).get_prep_value(term)
+                except (ValidationError, ValueError):
+                    continue
+            query |= Q(**{f'{name}__{lookup}': term})
+        if not query:
+            return queryset.none(), False
+        return queryset.filter(query), False
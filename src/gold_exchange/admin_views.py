@@ -10,12 +10,16 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from solana.rpc.api import Client
 from solders.pubkey import Pubkey
 from solders.keypair import Keypair
 
+from .rpc import get_rpc_client
+from .signer import SignerError, get_signer
+from .submission import get_submitter
+from .holders import supply_totals, top_holders
 from .utils import PriceOracle
-from .models import GoldTransaction, ExchangeQuote
+from .validators import parse_pubkey
+from .models import GoldTransaction, ArchivedGoldTransaction, ExchangeQuote
 
 logger = logging.getLogger(__name__)
 
@@ -30,13 +34,20 @@ def admin_dashboard(request):
     GET /api/v1/gold/admin/dashboard
     """
     try:
-        client = Client(settings.SOLANA_RPC_URL)
+        client = get_rpc_client()
 
         # Get all wallet addresses from settings
-        # Mint authority is stored as keypair, extract pubkey
-        mint_authority_keypair = Keypair.from_bytes(base58.b58decode(settings.MINT_AUTHORITY_KEYPAIR))
-        mint_authority_pubkey = mint_authority_keypair.pubkey()
-        mint_authority_address = str(mint_authority_pubkey)
+        # Mint authority key is held by the signer, which reports its pubkey.
+        # A signer outage should not take the rest of the dashboard down.
+        signer = get_signer()
+        try:
+            mint_authority_pubkey = signer.pubkey
+            signer_info = {'available': True, **signer.describe()}
+        except SignerError as e:
+            logger.warning(f"Signer unavailable for admin dashboard: {e}")
+            mint_authority_pubkey = None
+            signer_info = {'available': False, 'error': str(e)}
+        mint_authority_address = str(mint_authority_pubkey) if mint_authority_pubkey else None
 
         treasury_pubkey = Pubkey.from_string(settings.TREASURY_WALLET)
         dev_fund_pubkey = Pubkey.from_string(settings.DEV_FUND_WALLET)
@@ -45,7 +56,9 @@ def admin_dashboard(request):
 
         # Get SOL balances for each wallet
         # Note: mint_authority also serves as liquidity wallet (combined for devnet)
-        mint_authority_balance = client.get_balance(mint_authority_pubkey).value / 1_000_000_000
+        mint_authority_balance = (
+            client.get_balance(mint_authority_pubkey).value / 1_000_000_000 if mint_authority_pubkey else None
+        )
         treasury_balance = client.get_balance(treasury_pubkey).value / 1_000_000_000
         dev_fund_balance = client.get_balance(dev_fund_pubkey).value / 1_000_000_000
         profit_balance = client.get_balance(profit_pubkey).value / 1_000_000_000
@@ -54,31 +67,29 @@ def admin_dashboard(request):
         # Get current prices
         gold_price, sol_price = PriceOracle.get_prices()
 
-        # Get transaction statistics
-        total_transactions = GoldTransaction.objects.count()
-        completed_transactions = GoldTransaction.objects.filter(status='completed').count()
-        pending_transactions = GoldTransaction.objects.filter(status='pending').count()
-        failed_transactions = GoldTransaction.objects.filter(status='failed').count()
-
-        # Get volume statistics
-        total_sol_volume = GoldTransaction.objects.filter(
-            status='completed'
-        ).aggregate(
-            total=models.Sum('sol_amount')
-        )['total'] or Decimal('0')
-
-        total_sgold_minted = GoldTransaction.objects.filter(
-            status='completed',
-            transaction_type='buy'
-        ).aggregate(
-            total=models.Sum('token_amount')
-        )['total'] or Decimal('0')
-
-        total_fees_collected = GoldTransaction.objects.filter(
-            status='completed'
-        ).aggregate(
-            total=models.Sum('fees_collected')
-        )['total'] or Decimal('0')
+        # Get transaction and volume statistics in one query per ledger
+        # (settled rows may have moved to the archive table)
+        completed = models.Q(status='completed')
+        ledger_stats = {
+            'total': models.Count('id'),
+            'completed': models.Count('id', filter=completed),
+            'pending': models.Count('id', filter=models.Q(status='pending')),
+            'failed': models.Count('id', filter=models.Q(status='failed')),
+            'sol_volume': models.Sum('sol_amount', filter=completed),
+            'sgold_minted': models.Sum('token_amount', filter=completed & models.Q(transaction_type='buy')),
+            'fees_collected': models.Sum('fees_collected', filter=completed),
+        }
+        hot = GoldTransaction.objects.aggregate(**ledger_stats)
+        archived = ArchivedGoldTransaction.objects.aggregate(**ledger_stats)
+        stats = {key: (hot[key] or 0) + (archived[key] or 0) for key in ledger_stats}
+
+        total_transactions = stats['total']
+        completed_transactions = stats['completed']
+        pending_transactions = stats['pending']
+        failed_transactions = stats['failed']
+        total_sol_volume = Decimal(stats['sol_volume'])
+        total_sgold_minted = Decimal(stats['sgold_minted'])
+        total_fees_collected = Decimal(stats['fees_collected'])
 
         # Get recent transactions
         recent_transactions = GoldTransaction.objects.order_by('-created_at')[:10]
@@ -88,12 +99,17 @@ def admin_dashboard(request):
                 'solana_network': settings.SOLANA_NETWORK,
                 'sgold_mint_address': settings.SGOLD_MINT_ADDRESS,
                 'system_initialized': bool(settings.SGOLD_MINT_ADDRESS),
+                'rpc_endpoints': client.snapshot(),
+                'signer': signer_info,
             },
             'wallets': {
                 'liquidity_mint': {
                     'address': mint_authority_address,
-                    'balance_sol': float(mint_authority_balance),
-                    'balance_usd': float(Decimal(str(mint_authority_balance)) * sol_price),
+                    'balance_sol': float(mint_authority_balance) if mint_authority_balance is not None else None,
+                    'balance_usd': (
+                        float(Decimal(str(mint_authority_balance)) * sol_price)
+                        if mint_authority_balance is not None else None
+                    ),
                     'description': 'Liquidity pool (83.76%) + Mint authority for sGOLD tokens',
                 },
                 'treasury': {
@@ -161,6 +177,42 @@ def admin_dashboard(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def token_holders(request):
+    """
+    Largest sGOLD holders and supply totals, from the off-chain holder index.
+    Only accessible to Django admin users (staff/superuser).
+
+    GET /api/v1/gold/admin/holders?limit=20
+    """
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, 500))
+
+    totals = supply_totals()
+    supply = totals['supply'] or 0
+    holders = top_holders(limit)
+
+    return Response({
+        'holder_count': totals['holders'],
+        'total_supply': float(Decimal(supply) / 100),
+        'synced_slot': totals['synced_slot'],
+        'top_holders': [
+            {
+                'owner': holder.owner,
+                'token_account': holder.token_account,
+                'balance': float(holder.ui_amount),
+                'share_pct': round(holder.amount * 100 / supply, 4) if supply else 0.0,
+                'updated_at': holder.updated_at,
+            }
+            for holder in holders
+        ],
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def withdraw_from_wallet(request):
@@ -193,15 +245,22 @@ def withdraw_from_wallet(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        dest_pubkey = parse_pubkey(destination)
+        if dest_pubkey is None:
+            return Response(
+                {'error': 'Invalid destination address'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         if amount_sol <= 0:
             return Response(
                 {'error': 'Amount must be greater than 0'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get the appropriate keypair
+        # Get the appropriate keypair (the liquidity wallet is signed for by the signer)
+        keypair = None
         if wallet_type == 'liquidity_mint':
-            keypair = Keypair.from_bytes(base58.b58decode(settings.MINT_AUTHORITY_KEYPAIR))
             wallet_name = 'Liquidity + Mint Authority'
         elif wallet_type == 'treasury':
             if not hasattr(settings, 'TREASURY_KEYPAIR'):
@@ -239,16 +298,14 @@ def withdraw_from_wallet(request):
             wallet_name = 'Transaction Fee'
 
         # Connect to Solana
-        from solana.rpc.api import Client
-        from solana.rpc.commitment import Confirmed
         from solders.system_program import transfer, TransferParams
-        from solders.transaction import Transaction
-        from solders.message import Message
 
-        client = Client(settings.SOLANA_RPC_URL, commitment=Confirmed)
+        client = get_rpc_client()
+        signer = get_signer()
+        source_pubkey = keypair.pubkey() if keypair else signer.pubkey
 
         # Check balance
-        balance_info = client.get_balance(keypair.pubkey())
+        balance_info = client.get_balance(source_pubkey)
         balance_lamports = balance_info.value
         balance_sol = Decimal(balance_lamports) / Decimal('1000000000')
 
@@ -263,29 +320,23 @@ def withdraw_from_wallet(request):
             )
 
         # Create transaction
-        dest_pubkey = Pubkey.from_string(destination)
-        recent_blockhash = client.get_latest_blockhash().value.blockhash
-
-        transfer_ix = transfer(
-            TransferParams(
-                from_pubkey=keypair.pubkey(),
-                to_pubkey=dest_pubkey,
-                lamports=amount_lamports
+        if keypair is None:
+            tx_signature = signer.transfer(dest_pubkey, amount_lamports)
+        else:
+            latest = client.get_latest_blockhash().value
+
+            transfer_ix = transfer(
+                TransferParams(
+                    from_pubkey=keypair.pubkey(),
+                    to_pubkey=dest_pubkey,
+                    lamports=amount_lamports
+                )
             )
-        )
-
-        message = Message.new_with_blockhash(
-            [transfer_ix],
-            keypair.pubkey(),
-            recent_blockhash
-        )
-
-        transaction = Transaction([keypair], message, recent_blockhash)
 
-        # Send transaction
-        tx_bytes = bytes(transaction)
-        result = client.send_raw_transaction(tx_bytes)
-        tx_signature = str(result.value)
+            # Send with a priority fee, rebroadcasting until it lands
+            submitter = get_submitter()
+            transaction = submitter.build([transfer_ix], [keypair], latest.blockhash)
+            tx_signature = submitter.send(transaction, latest.last_valid_block_height)
 
         logger.info(f"Admin withdrawal: {amount_sol} SOL from {wallet_name} to {destination}. Tx: {tx_signature}")
 
@@ -0,0 +1,105 @@
+"""
+Archival of settled exchange transactions.
+
+Moves completed, failed and cancelled GoldTransactions older than a cutoff
+into ArchivedGoldTransaction in batches, so the hot table and its indexes
+only hold recent and in-flight trades. On PostgreSQL the archive is
+partitioned by month; partitions are created here before rows land in them.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterable, Optional
+
+from django.db import connections, router, transaction as db_transaction
+
+from .models import ArchivedGoldTransaction, GoldTransaction
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start: datetime) -> datetime:
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{ArchivedGoldTransaction._meta.db_table}_p{start:%Y_%m}"
+
+
+def ensure_partitions(moments: Iterable[datetime], using: Optional[str] = None) -> int:
+    """
+    Create the monthly archive partitions covering ``moments`` (PostgreSQL only).
+
+    Returns:
+        Number of partitions created
+    """
+    using = using or router.db_for_write(ArchivedGoldTransaction)
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return 0
+
+    table = ArchivedGoldTransaction._meta.db_table
+    months = {month_start(moment.astimezone(dt_timezone.utc)) for moment in moments}
+    created = 0
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relname FROM pg_class WHERE relname LIKE %s", [f"{table}_p%"])
+        existing = {row[0] for row in cursor.fetchall()}
+        for start in sorted(months):
+            name = partition_name(start)
+            if name in existing:
+                continue
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [start, next_month(start)],
+            )
+            created += 1
+            logger.info(f"Created archive partition {name}")
+    return created
+
+
+def archive_transactions(before: datetime, batch_size: int = 1000, max_batches: Optional[int] = None) -> int:
+    """
+    Move settled transactions created before ``before`` to the archive.
+
+    Each batch is copied and deleted in one database transaction, so a row is
+    always in exactly one of the two tables.
+
+    Args:
+        before: Archive rows created before this time
+        batch_size: Rows per batch
+        max_batches: Stop after this many batches (None for all)
+
+    Returns:
+        Number of rows archived
+    """
+    using = router.db_for_write(GoldTransaction)
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with db_transaction.atomic(using=using):
+            rows = list(
+                GoldTransaction.objects.using(using)
+                .select_for_update(skip_locked=True)
+                .filter(status__in=ARCHIVABLE_STATUSES, created_at__lt=before)
+                .order_by('id')
+                .values(*ArchivedGoldTransaction.LEDGER_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+
+            ensure_partitions((row['created_at'] for row in rows), using=using)
+            ArchivedGoldTransaction.objects.using(using).bulk_create(
+                [ArchivedGoldTransaction(**row) for row in rows]
+            )
+            GoldTransaction.objects.using(using).filter(id__in=[row['id'] for row in rows]).delete()
+
+        archived += len(rows)
+        batches += 1
+        logger.info(f"Archived {archived} transactions so far (batch {batches})")
+    return archived
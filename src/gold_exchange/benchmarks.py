@@ -0,0 +1,333 @@
+"""
+Benchmark suite for the gold exchange hot paths.
+
+Each benchmark times one unit of per-request work (pricing a quote, building
+and serializing a transaction, the admin dashboard aggregation over a large
+``GoldTransaction`` table, ...) and counts the database queries it issues.
+Results are compared against a stored JSON baseline so regressions in
+per-request cost show up when code changes.
+
+Timings are machine dependent: record a baseline on the machine that runs the
+comparison (``bench_exchange --save``). Query counts are exact and compared
+strictly.
+"""
+import base64
+import json
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import base58
+from django.core.cache import cache
+from django.db import connection, transaction as db_transaction
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.transaction import Transaction as SolanaTransaction
+
+DEFAULT_BASELINE = Path(__file__).with_name('benchmark_baseline.json')
+
+BENCHMARKS: Dict[str, 'Benchmark'] = {}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable
+    description: str
+    # Inner iterations per timed round; raise for sub-microsecond work
+    number: int = 100
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rounds: int
+    number: int
+    median_us: float
+    min_us: float
+    stdev_us: float
+    queries: int
+
+
+def benchmark(name: str, number: int = 100):
+    """Register a benchmark. The decorated function receives a BenchContext."""
+    def decorator(func):
+        BENCHMARKS[name] = Benchmark(name, func, (func.__doc__ or '').strip(), number)
+        return func
+    return decorator
+
+
+class BenchContext:
+    """Fixtures shared by the benchmarks: a service, a wallet, an admin user"""
+
+    def __init__(self, rpc_url: str):
+        from .services import GoldTokenService
+
+        self.rpc_url = rpc_url
+        self.factory = APIRequestFactory()
+        self.service = GoldTokenService()
+        self.user_pubkey = Keypair().pubkey()
+        self.address = str(self.user_pubkey)
+        self.blockhash = Hash.default()
+        self.admin = get_user_model()(username='bench', is_staff=True, is_superuser=True, is_active=True)
+
+
+@contextmanager
+def bench_environment(rows: int = 10_000):
+    """
+    Run benchmarks against a local fake RPC node, generated wallets, cached
+    prices and ``rows`` seeded transactions. Everything written to the
+    database is rolled back on exit.
+    """
+    from .fake_rpc import FakeSolanaRpc
+    from .utils import PriceOracle
+
+    with FakeSolanaRpc(seed=1) as rpc, override_settings(
+        SOLANA_RPC_URL=rpc.url,
+        SOLANA_RPC_URLS=[],
+        SGOLD_MINT_ADDRESS=str(Keypair().pubkey()),
+        MINT_AUTHORITY_KEYPAIR=base58.b58encode(bytes(Keypair())).decode(),
+        TREASURY_WALLET=str(Keypair().pubkey()),
+        DEV_FUND_WALLET=str(Keypair().pubkey()),
+        PROFIT_WALLET=str(Keypair().pubkey()),
+        TRANSACTION_FEE_WALLET=str(Keypair().pubkey()),
+    ):
+        cache.set(PriceOracle.GOLD_CACHE_KEY, 2000.0, 3600)
+        cache.set(PriceOracle.SOL_CACHE_KEY, 100.0, 3600)
+        with db_transaction.atomic():
+            seed_transactions(rows)
+            try:
+                yield BenchContext(rpc.url)
+            finally:
+                db_transaction.set_rollback(True)
+
+
+def seed_transactions(rows: int, batch_size: int = 2_000):
+    """Bulk-insert a realistic mix of buys and sells across statuses"""
+    from .models import GoldTransaction
+
+    rng = random.Random(0)
+    wallets = [str(Keypair().pubkey()) for _ in range(max(1, rows // 20))]
+    batch = []
+    for i in range(rows):
+        sol_amount = Decimal(rng.randint(1_000_000, 10_000_000_000)) / Decimal(1_000_000_000)
+        batch.append(GoldTransaction(
+            user_wallet=rng.choice(wallets),
+            transaction_type=rng.choice(['buy', 'buy', 'sell']),
+            sol_amount=sol_amount,
+            token_amount=(sol_amount * 8).quantize(Decimal('0.01')) or Decimal('0.01'),
+            gold_price_usd=Decimal('2000.00'),
+            sol_price_usd=Decimal('100.00'),
+            fees_collected=(sol_amount * Decimal('0.1624')).quantize(Decimal('0.000000001')),
+            status=rng.choices(['completed', 'pending', 'failed'], weights=[90, 5, 5])[0],
+            tx_signature=base58.b58encode(rng.randbytes(64)).decode(),
+        ))
+        if len(batch) >= batch_size:
+            GoldTransaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        GoldTransaction.objects.bulk_create(batch)
+
+
+def run_benchmark(bench: Benchmark, ctx: BenchContext, rounds: int = 7) -> BenchmarkResult:
+    """Time ``rounds`` rounds of ``bench.number`` calls, after one warm-up call"""
+    bench.func(ctx)
+
+    with CaptureQueriesContext(connection) as queries:
+        bench.func(ctx)
+    query_count = len(queries)
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(bench.number):
+            bench.func(ctx)
+        timings.append((time.perf_counter() - started) / bench.number * 1_000_000)
+
+    return BenchmarkResult(
+        name=bench.name,
+        rounds=rounds,
+        number=bench.number,
+        median_us=round(statistics.median(timings), 2),
+        min_us=round(min(timings), 2),
+        stdev_us=round(statistics.stdev(timings), 2) if rounds > 1 else 0.0,
+        queries=query_count,
+    )
+
+
+def run_benchmarks(names: Optional[List[str]] = None, rows: int = 10_000, rounds: int = 7) -> List[BenchmarkResult]:
+    selected = [BENCHMARKS[name] for name in names] if names else list(BENCHMARKS.values())
+    with bench_environment(rows=rows) as ctx:
+        return [run_benchmark(bench, ctx, rounds=rounds) for bench in selected]
+
+
+def relation_sizes(model) -> Dict[str, int]:
+    """
+    On-disk bytes of ``model``'s table and each of its indexes.
+
+    Uses ``pg_relation_size`` on PostgreSQL and the ``dbstat`` table on SQLite;
+    empty where neither is available.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                """
+                SELECT relname, pg_relation_size(oid) FROM pg_class WHERE oid = %s::regclass
+                UNION ALL
+                SELECT i.relname, pg_relation_size(i.oid)
+                FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE x.indrelid = %s::regclass
+                """,
+                [table, table],
+            )
+        elif connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE tbl_name = %s) GROUP BY name",
+                    [table],
+                )
+            except Exception:
+                return {}
+        else:
+            return {}
+        return dict(sorted(cursor.fetchall()))
+
+
+def storage_report(rows: int = 10_000) -> Dict[str, int]:
+    """Table and index sizes of GoldTransaction after seeding ``rows`` rows (rolled back)"""
+    from .models import GoldTransaction
+
+    with bench_environment(rows=rows):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE "{GoldTransaction._meta.db_table}"')
+        return relation_sizes(GoldTransaction)
+
+
+def load_baseline(path: Path = DEFAULT_BASELINE) -> Dict[str, Dict]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())['benchmarks']
+
+
+def save_baseline(results: List[BenchmarkResult], path: Path = DEFAULT_BASELINE, rows: int = 10_000):
+    baseline = load_baseline(path)
+    baseline.update({result.name: asdict(result) for result in results})
+    path.write_text(json.dumps({'rows': rows, 'benchmarks': dict(sorted(baseline.items()))}, indent=2) + '\n')
+
+
+def compare(result: BenchmarkResult, baseline: Optional[Dict], tolerance: float = 0.25) -> List[str]:
+    """
+    Regressions of a result against its baseline entry.
+
+    Args:
+        result: Fresh benchmark result
+        baseline: Stored baseline entry for the same benchmark, if any
+        tolerance: Allowed slowdown of the median as a fraction (0.25 = 25%)
+
+    Returns:
+        Human-readable regression messages (empty if within budget)
+    """
+    if not baseline:
+        return []
+    regressions = []
+    if result.queries > baseline['queries']:
+        regressions.append(f"{result.name}: {result.queries} queries (baseline {baseline['queries']})")
+    budget = baseline['median_us'] * (1 + tolerance)
+    if result.median_us > budget:
+        regressions.append(
+            f"{result.name}: median {result.median_us:.1f}us exceeds {budget:.1f}us "
+            f"(baseline {baseline['median_us']:.1f}us +{tolerance:.0%})"
+        )
+    return regressions
+
+
+# --- Micro benchmarks -------------------------------------------------------
+
+@benchmark('quote_pricing', number=2_000)
+def bench_quote_pricing(ctx):
+    """USD -> SOL conversion, fee split and token amount for a $25 buy"""
+    sol_price = Decimal('100.00')
+    sol_amount = (Decimal('25') / sol_price).quantize(Decimal('0.000000001'))
+    ctx.service.calculate_fees(sol_amount, 'buy')
+    ctx.service.calculate_token_amount(sol_amount, Decimal('2000.00'), sol_price)
+
+
+@benchmark('service_construction', number=500)
+def bench_service_construction(ctx):
+    """GoldTokenService() - settings parsing and mint authority keypair decode"""
+    from .services import GoldTokenService
+    GoldTokenService()
+
+
+@benchmark('buy_instructions', number=500)
+def bench_buy_instructions(ctx):
+    """Fee split plus the four buy transfer instructions"""
+    fees = ctx.service.calculate_fees(Decimal('0.25'), 'buy')
+    ctx.service.create_buy_transaction_instructions(ctx.user_pubkey, Decimal('0.25'), *fees)
+
+
+@benchmark('transaction_serialization', number=500)
+def bench_transaction_serialization(ctx):
+    """Build an unsigned buy transaction and base64 encode it"""
+    fees = ctx.service.calculate_fees(Decimal('0.25'), 'buy')
+    instructions = ctx.service.create_buy_transaction_instructions(ctx.user_pubkey, Decimal('0.25'), *fees)
+    message = Message.new_with_blockhash(instructions, ctx.user_pubkey, ctx.blockhash)
+    base64.b64encode(bytes(SolanaTransaction.new_unsigned(message))).decode('utf-8')
+
+
+@benchmark('validate_solana_address', number=5_000)
+def bench_validate_solana_address(ctx):
+    """validate_solana_address on a valid wallet address (warm address cache)"""
+    from .utils import validate_solana_address
+    validate_solana_address(ctx.address)
+
+
+@benchmark('quote_request_serializer', number=1_000)
+def bench_quote_request_serializer(ctx):
+    """QuoteRequestSerializer validation of a typical request body"""
+    from .serializers import QuoteRequestSerializer
+    QuoteRequestSerializer(data={'action': 'buy', 'usd_amount': '25'}).is_valid(raise_exception=True)
+
+
+@benchmark('buy_initiate_serializer', number=1_000)
+def bench_buy_initiate_serializer(ctx):
+    """BuyInitiateSerializer validation (includes the wallet address check)"""
+    from .serializers import BuyInitiateSerializer
+    BuyInitiateSerializer(data={
+        'wallet_address': ctx.address,
+        'quote_id': '00000000-0000-0000-0000-000000000000',
+    }).is_valid(raise_exception=True)
+
+
+# --- Macro benchmarks -------------------------------------------------------
+
+@benchmark('quote_view', number=50)
+def bench_quote_view(ctx):
+    """POST /api/v1/gold/quote end to end, including the quote insert"""
+    from .views import get_quote
+    request = ctx.factory.post('/api/v1/gold/quote', {'action': 'buy', 'usd_amount': '25'}, format='json')
+    response = get_quote(request)
+    assert response.status_code == 200, response.data
+
+
+@benchmark('admin_dashboard', number=5)
+def bench_admin_dashboard(ctx):
+    """GET /api/v1/gold/admin/dashboard over the seeded transaction table"""
+    from .admin_views import admin_dashboard
+    request = ctx.factory.get('/api/v1/gold/admin/dashboard')
+    force_authenticate(request, user=ctx.admin)
+    response = admin_dashboard(request)
+    assert response.status_code == 200, response.data
@@ -0,0 +1,637 @@
+"""
+Local stand-in for a Solana JSON-RPC node.
+
+Implements just enough of the RPC surface for the exchange flow
+(quote -> initiate -> confirm) to run without devnet, with configurable
+latency and failure injection. Used by the gold_exchange tests, the
+load-test harness and ``manage.py run_fake_rpc``. ``start_pubsub`` adds
+the WebSocket ``logsSubscribe`` feed used by the wallet activity ingestor.
+"""
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import random
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import base58
+import websockets
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROGRAM = '11111111111111111111111111111111'
+TOKEN_PROGRAM = 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA'
+ASSOCIATED_TOKEN_PROGRAM = 'ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL'
+
+# Blockhashes stay valid for this many blocks, like mainnet
+BLOCKHASH_VALIDITY = 150
+# Wall-clock time per slot; the fake chain advances with time, not with load
+SLOT_TIME = 0.4
+
+TOKEN_ACCOUNT_SIZE = 165
+NONCE_ACCOUNT_SIZE = 80
+
+
+@dataclass
+class Fault:
+    """
+    Latency and failure injection for a method (or '*' for all methods).
+
+    Attributes:
+        latency: Fixed delay before answering (seconds)
+        jitter: Extra random delay up to this many seconds
+        http_error_rate: Probability of answering with HTTP 503
+        rpc_error_rate: Probability of answering with a JSON-RPC error
+        drop_rate: Probability that sendTransaction returns a signature
+            but the transaction never lands
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    http_error_rate: float = 0.0
+    rpc_error_rate: float = 0.0
+    drop_rate: float = 0.0
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class FakeSolanaRpc:
+    """
+    In-memory Solana ledger behind a threaded HTTP JSON-RPC server.
+
+    Usage:
+        rpc = FakeSolanaRpc(faults={'*': Fault(latency=0.05)})
+        url = rpc.start()
+        ...
+        rpc.stop()
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        faults: Optional[Dict[str, Fault]] = None,
+        default_lamports: int = 100 * 1_000_000_000,
+        mint_decimals: int = 2,
+        verify_signatures: bool = True,
+        seed: Optional[int] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.faults = faults or {}
+        self.default_lamports = default_lamports
+        self.mint_decimals = mint_decimals
+        self.verify_signatures = verify_signatures
+        self.random = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.slot = 0
+        self.block_height = 0
+        self.blockhashes = {}  # blockhash -> last valid block height
+        self.latest_blockhash = None
+        self.balances = {}  # address -> lamports
+        self.token_accounts = {}  # address -> {'mint', 'owner', 'amount'}
+        self.nonce_accounts = {}  # address -> {'authority', 'nonce'}
+        self.transactions = {}  # signature -> landed transaction record
+        self.request_counts = {}  # method -> count
+        self.prioritization_fees = []  # recent per-slot fees, micro-lamports per CU
+        self.log_subscriptions = {}  # subscription id -> (websocket, mentioned addresses)
+
+        self._server = None
+        self._thread = None
+        self._pubsub_loop = None
+        self._pubsub_server = None
+        self._subscription_ids = itertools.count(1)
+        self._sync_clock()
+
+    # ------------------------------------------------------------------
+    # Server lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the endpoint URL"""
+        handler = type('FakeSolanaRpcHandler', (_Handler,), {'rpc': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def start_pubsub(self, port: int = 0) -> str:
+        """Serve ``logsSubscribe`` over WebSocket in a background thread and return its URL"""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(loop)
+            self._pubsub_server = loop.run_until_complete(websockets.serve(self._pubsub, self.host, port))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        self._pubsub_loop = loop
+        return self.pubsub_url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._pubsub_loop:
+            loop, server = self._pubsub_loop, self._pubsub_server
+            self._pubsub_loop = self._pubsub_server = None
+
+            async def close():
+                server.close()
+                await server.wait_closed()
+                loop.stop()
+
+            asyncio.run_coroutine_threadsafe(close(), loop)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    @property
+    def pubsub_url(self) -> str:
+        return f"ws://{self.host}:{self._pubsub_server.sockets[0].getsockname()[1]}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Ledger helpers
+    # ------------------------------------------------------------------
+
+    def _sync_clock(self):
+        """Advance slots and blockhashes to match elapsed wall-clock time"""
+        height = 1 + int((time.monotonic() - self.started_at) / SLOT_TIME)
+        if height == self.block_height:
+            return
+        self.slot = self.block_height = height
+        blockhash = base58.b58encode(hashlib.sha256(f"block-{height}".encode()).digest()).decode()
+        self.blockhashes[blockhash] = height + BLOCKHASH_VALIDITY
+        self.latest_blockhash = blockhash
+        for stale in [h for h, valid in self.blockhashes.items() if valid < height]:
+            del self.blockhashes[stale]
+
+    def get_lamports(self, address: str) -> int:
+        return self.balances.get(address, self.default_lamports)
+
+    def token_balance(self, address: str) -> int:
+        account = self.token_accounts.get(address)
+        return account['amount'] if account else 0
+
+    def _token_account_data(self, account: dict) -> bytes:
+        data = bytearray(TOKEN_ACCOUNT_SIZE)
+        data[0:32] = bytes(Pubkey.from_string(account['mint']))
+        data[32:64] = bytes(Pubkey.from_string(account['owner']))
+        data[64:72] = struct.pack('<Q', account['amount'])
+        data[108] = 1  # AccountState::Initialized
+        return bytes(data)
+
+    def add_nonce_account(self, address: str, authority: str):
+        """Create an initialized durable nonce account"""
+        with self.lock:
+            self._sync_clock()
+            self.nonce_accounts[address] = {'authority': authority, 'nonce': self._durable_nonce(address)}
+
+    def _durable_nonce(self, address: str) -> str:
+        return base58.b58encode(hashlib.sha256(f"nonce-{address}-{self.latest_blockhash}".encode()).digest()).decode()
+
+    def _nonce_account_data(self, account: dict) -> bytes:
+        return (
+            struct.pack('<II', 1, 1)  # Versions::Current, State::Initialized
+            + bytes(Pubkey.from_string(account['authority']))
+            + base58.b58decode(account['nonce'])
+            + struct.pack('<Q', 5000)  # lamports per signature
+        )
+
+    def _account_json(self, address: str) -> Optional[dict]:
+        if address in self.nonce_accounts:
+            data, owner, lamports = self._nonce_account_data(self.nonce_accounts[address]), SYSTEM_PROGRAM, 1447680
+        elif address in self.token_accounts:
+            data, owner, lamports = self._token_account_data(self.token_accounts[address]), TOKEN_PROGRAM, 2039280
+        else:
+            return None
+        return {
+            'data': [base64.b64encode(data).decode(), 'base64'],
+            'executable': False,
+            'lamports': lamports,
+            'owner': owner,
+            'rentEpoch': 0,
+            'space': len(data),
+        }
+
+    def _context(self) -> dict:
+        return {'slot': self.slot}
+
+    def _apply_instruction(self, keys, instruction, effects):
+        program = keys[instruction.program_id_index]
+        accounts = [keys[i] for i in bytes(instruction.accounts)]
+        data = bytes(instruction.data)
+
+        if program == SYSTEM_PROGRAM and data[:4] == struct.pack('<I', 2):
+            lamports = struct.unpack('<Q', data[4:12])[0]
+            source, dest = accounts[0], accounts[1]
+            self.balances[source] = self.get_lamports(source) - lamports
+            self.balances[dest] = self.get_lamports(dest) + lamports
+            effects['transfers'].append((source, dest, lamports))
+        elif program == SYSTEM_PROGRAM and data[:4] == struct.pack('<I', 0):  # CreateAccount
+            lamports = struct.unpack('<Q', data[4:12])[0]
+            self.balances[accounts[0]] = self.get_lamports(accounts[0]) - lamports
+            self.balances[accounts[1]] = lamports
+        elif program == SYSTEM_PROGRAM and data[:4] == struct.pack('<I', 6):  # InitializeNonceAccount
+            authority = str(Pubkey.from_bytes(data[4:36]))
+            self.nonce_accounts[accounts[0]] = {'authority': authority, 'nonce': self._durable_nonce(accounts[0])}
+        elif program == SYSTEM_PROGRAM and data[:4] == struct.pack('<I', 4):  # AdvanceNonceAccount
+            nonce_account = self.nonce_accounts.get(accounts[0])
+            if nonce_account is None or nonce_account['authority'] != accounts[2]:
+                raise RpcError(-32002, 'Transaction simulation failed: invalid account data for instruction')
+            advanced = self._durable_nonce(accounts[0])
+            if advanced == nonce_account['nonce']:
+                raise RpcError(-32002, 'Transaction simulation failed: nonce can only advance once per slot')
+            nonce_account['nonce'] = advanced
+        elif program == ASSOCIATED_TOKEN_PROGRAM:
+            ata, owner, mint = accounts[1], accounts[2], accounts[3]
+            self.token_accounts.setdefault(ata, {'mint': mint, 'owner': owner, 'amount': 0})
+        elif program == TOKEN_PROGRAM and data[:1] == b'\x07':  # MintTo
+            amount = struct.unpack('<Q', data[1:9])[0]
+            dest = accounts[1]
+            if dest not in self.token_accounts:
+                raise RpcError(-32002, 'Transaction simulation failed: invalid account data for instruction')
+            self.token_accounts[dest]['amount'] += amount
+            effects['mints'].append((dest, amount))
+        elif program == TOKEN_PROGRAM and data[:1] in (b'\x08', b'\x0f'):  # Burn / BurnChecked
+            amount = struct.unpack('<Q', data[1:9])[0]
+            source = accounts[0]
+            if self.token_balance(source) < amount:
+                raise RpcError(-32002, 'Transaction simulation failed: insufficient funds')
+            self.token_accounts[source]['amount'] -= amount
+            effects['burns'].append((source, amount))
+
+    def submit(self, tx: Transaction) -> str:
+        """Validate and land a transaction, returning its signature"""
+        signature = str(tx.signatures[0])
+        if tx.signatures[0] == Signature.default():
+            raise RpcError(-32003, 'Transaction signature verification failure')
+        if self.verify_signatures:
+            try:
+                tx.verify()
+            except Exception:
+                raise RpcError(-32003, 'Transaction signature verification failure')
+
+        with self.lock:
+            self._sync_clock()
+            if signature in self.transactions:
+                return signature
+            keys = [str(key) for key in tx.message.account_keys]
+            blockhash = str(tx.message.recent_blockhash)
+            if blockhash not in self.blockhashes and not self._is_durable(tx, keys, blockhash):
+                raise RpcError(-32002, 'Transaction simulation failed: Blockhash not found')
+
+            effects = {'transfers': [], 'mints': [], 'burns': []}
+            balances = dict(self.balances)
+            token_accounts = {address: dict(account) for address, account in self.token_accounts.items()}
+            nonce_accounts = {address: dict(account) for address, account in self.nonce_accounts.items()}
+            try:
+                for instruction in tx.message.instructions:
+                    self._apply_instruction(keys, instruction, effects)
+            except RpcError:
+                # Transactions are atomic: roll back partial effects
+                self.balances, self.token_accounts, self.nonce_accounts = balances, token_accounts, nonce_accounts
+                raise
+
+            self.transactions[signature] = {
+                'slot': self.slot,
+                'block_time': int(time.time()),
+                'tx': tx,
+                'effects': effects,
+            }
+        self._publish_logs(signature, keys)
+        return signature
+
+    def _is_durable(self, tx: Transaction, keys, blockhash: str) -> bool:
+        """A durable nonce transaction starts by advancing the nonce it uses as its blockhash"""
+        first = tx.message.instructions[0] if tx.message.instructions else None
+        if first is None or keys[first.program_id_index] != SYSTEM_PROGRAM or bytes(first.data)[:4] != struct.pack('<I', 4):
+            return False
+        nonce_account = self.nonce_accounts.get(keys[bytes(first.accounts)[0]])
+        return nonce_account is not None and nonce_account['nonce'] == blockhash
+
+    def _transaction_json(self, signature: str) -> Optional[dict]:
+        record = self.transactions.get(signature)
+        if record is None:
+            return None
+        tx = record['tx']
+        message = tx.message
+        keys = [str(key) for key in message.account_keys]
+        balances = [self.get_lamports(key) for key in keys]
+        return {
+            'slot': record['slot'],
+            'blockTime': record['block_time'],
+            'transaction': {
+                'signatures': [str(sig) for sig in tx.signatures],
+                'message': {
+                    'accountKeys': keys,
+                    'header': {
+                        'numRequiredSignatures': message.header.num_required_signatures,
+                        'numReadonlySignedAccounts': message.header.num_readonly_signed_accounts,
+                        'numReadonlyUnsignedAccounts': message.header.num_readonly_unsigned_accounts,
+                    },
+                    'recentBlockhash': str(message.recent_blockhash),
+                    'instructions': [
+                        {
+                            'programIdIndex': ix.program_id_index,
+                            'accounts': list(bytes(ix.accounts)),
+                            'data': base58.b58encode(bytes(ix.data)).decode(),
+                            'stackHeight': None,
+                        }
+                        for ix in message.instructions
+                    ],
+                },
+            },
+            'meta': {
+                'err': None,
+                'status': {'Ok': None},
+                'fee': 5000,
+                'preBalances': balances,
+                'postBalances': balances,
+                'innerInstructions': [],
+                'logMessages': [],
+                'preTokenBalances': [],
+                'postTokenBalances': [],
+                'rewards': [],
+                'loadedAddresses': {'writable': [], 'readonly': []},
+                'computeUnitsConsumed': 450 * len(message.instructions),
+            },
+            'version': 'legacy',
+        }
+
+    # ------------------------------------------------------------------
+    # RPC methods
+    # ------------------------------------------------------------------
+
+    def rpc_getLatestBlockhash(self, params):
+        with self.lock:
+            self._sync_clock()
+            return {
+                'context': self._context(),
+                'value': {
+                    'blockhash': self.latest_blockhash,
+                    'lastValidBlockHeight': self.blockhashes[self.latest_blockhash],
+                },
+            }
+
+    def rpc_getBlockHeight(self, params):
+        with self.lock:
+            self._sync_clock()
+            return self.block_height
+
+    def rpc_getSlot(self, params):
+        with self.lock:
+            self._sync_clock()
+            return self.slot
+
+    def rpc_getBalance(self, params):
+        return {'context': self._context(), 'value': self.get_lamports(params[0])}
+
+    def rpc_getAccountInfo(self, params):
+        return {'context': self._context(), 'value': self._account_json(params[0])}
+
+    def rpc_getProgramAccounts(self, params):
+        # Token accounts only, with the dataSize / memcmp filters and dataSlice real nodes apply
+        program, config = params[0], (params[1] if len(params) > 1 else {})
+        matches = []
+        if program == TOKEN_PROGRAM:
+            with self.lock:
+                accounts = [(address, self._account_json(address)) for address in self.token_accounts]
+            for address, account in accounts:
+                data = base64.b64decode(account['data'][0])
+                if all(self._filter_matches(f, data) for f in config.get('filters', [])):
+                    data_slice = config.get('dataSlice')
+                    if data_slice:
+                        data = data[data_slice['offset']:data_slice['offset'] + data_slice['length']]
+                    account['data'] = [base64.b64encode(data).decode(), 'base64']
+                    matches.append({'pubkey': address, 'account': account})
+        if config.get('withContext'):
+            return {'context': self._context(), 'value': matches}
+        return matches
+
+    @staticmethod
+    def _filter_matches(account_filter: dict, data: bytes) -> bool:
+        if 'dataSize' in account_filter:
+            return len(data) == account_filter['dataSize']
+        memcmp = account_filter['memcmp']
+        expected = base58.b58decode(memcmp['bytes'])
+        return data[memcmp['offset']:memcmp['offset'] + len(expected)] == expected
+
+    def rpc_getMinimumBalanceForRentExemption(self, params):
+        # Rent-exempt minimum: (128 bytes of account overhead + data) * 6960 lamports/byte
+        return (128 + params[0]) * 6960
+
+    def rpc_getTokenAccountBalance(self, params):
+        account = self.token_accounts.get(params[0])
+        if account is None:
+            raise RpcError(-32602, 'Invalid param: could not find account')
+        amount = account['amount']
+        ui_amount = amount / (10 ** self.mint_decimals)
+        return {
+            'context': self._context(),
+            'value': {
+                'amount': str(amount),
+                'decimals': self.mint_decimals,
+                'uiAmount': ui_amount,
+                'uiAmountString': f"{ui_amount:.{self.mint_decimals}f}",
+            },
+        }
+
+    def rpc_getTransaction(self, params):
+        return self._transaction_json(params[0])
+
+    def rpc_sendTransaction(self, params):
+        raw = base64.b64decode(params[0]) if (params[1:] and params[1].get('encoding') == 'base64') else base58.b58decode(params[0])
+        tx = Transaction.from_bytes(raw)
+        if self._roll(self._fault('sendTransaction').drop_rate):
+            logger.info(f"Dropping transaction {tx.signatures[0]}")
+            return str(tx.signatures[0])
+        return self.submit(tx)
+
+    def rpc_simulateTransaction(self, params):
+        raw = base64.b64decode(params[0]) if (params[1:] and params[1].get('encoding') == 'base64') else base58.b58decode(params[0])
+        tx = Transaction.from_bytes(raw)
+        return {
+            'context': self._context(),
+            'value': {
+                'err': None,
+                'logs': [],
+                'accounts': None,
+                'unitsConsumed': 450 * len(tx.message.instructions),
+                'returnData': None,
+            },
+        }
+
+    def rpc_getRecentPrioritizationFees(self, params):
+        return [
+            {'slot': self.slot - offset, 'prioritizationFee': fee}
+            for offset, fee in enumerate(reversed(self.prioritization_fees))
+        ]
+
+    def rpc_getSignatureStatuses(self, params):
+        statuses = []
+        for signature in params[0]:
+            record = self.transactions.get(signature)
+            if record is None:
+                statuses.append(None)
+                continue
+            statuses.append({
+                'slot': record['slot'],
+                'confirmations': None,
+                'err': None,
+                'status': {'Ok': None},
+                'confirmationStatus': 'finalized',
+            })
+        return {'context': self._context(), 'value': statuses}
+
+    # ------------------------------------------------------------------
+    # PubSub
+    # ------------------------------------------------------------------
+
+    async def _pubsub(self, websocket, path=None):
+        subscriptions = set()
+        try:
+            async for raw in websocket:
+                request = json.loads(raw)
+                method, params = request.get('method'), request.get('params') or []
+                response = {'jsonrpc': '2.0', 'id': request.get('id')}
+                if method == 'logsSubscribe':
+                    # Only the {"mentions": [address]} filter is supported
+                    mentions = set(params[0].get('mentions', [])) if params and isinstance(params[0], dict) else set()
+                    subscription = next(self._subscription_ids)
+                    with self.lock:
+                        self.log_subscriptions[subscription] = (websocket, mentions)
+                    subscriptions.add(subscription)
+                    response['result'] = subscription
+                elif method == 'logsUnsubscribe':
+                    with self.lock:
+                        response['result'] = self.log_subscriptions.pop(params[0], None) is not None
+                else:
+                    response['error'] = {'code': -32601, 'message': 'Method not found'}
+                await websocket.send(json.dumps(response))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            with self.lock:
+                for subscription in subscriptions:
+                    self.log_subscriptions.pop(subscription, None)
+
+    def _publish_logs(self, signature: str, keys):
+        """Notify log subscribers whose mentioned address appears in a landed transaction"""
+        if self._pubsub_loop is None:
+            return
+        with self.lock:
+            targets = [
+                (websocket, subscription)
+                for subscription, (websocket, mentions) in self.log_subscriptions.items()
+                if mentions.intersection(keys)
+            ]
+            slot = self.slot
+        for websocket, subscription in targets:
+            notification = json.dumps({
+                'jsonrpc': '2.0',
+                'method': 'logsNotification',
+                'params': {
+                    'result': {'context': {'slot': slot}, 'value': {'signature': signature, 'err': None, 'logs': []}},
+                    'subscription': subscription,
+                },
+            })
+            asyncio.run_coroutine_threadsafe(websocket.send(notification), self._pubsub_loop)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _fault(self, method: str) -> Fault:
+        return self.faults.get(method) or self.faults.get('*') or Fault()
+
+    def _roll(self, probability: float) -> bool:
+        return probability > 0 and self.random.random() < probability
+
+    def handle(self, request: dict):
+        """
+        Handle a single JSON-RPC request.
+
+        Returns:
+            Tuple of (http_status, response_body or None)
+        """
+        method = request.get('method', '')
+        with self.lock:
+            self.request_counts[method] = self.request_counts.get(method, 0) + 1
+
+        fault = self._fault(method)
+        delay = fault.latency + (self.random.uniform(0, fault.jitter) if fault.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if self._roll(fault.http_error_rate):
+            return 503, None
+
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        handler = getattr(self, f"rpc_{method}", None)
+        try:
+            if handler is None:
+                raise RpcError(-32601, 'Method not found')
+            if self._roll(fault.rpc_error_rate):
+                raise RpcError(-32005, 'Node is unhealthy')
+            response['result'] = handler(request.get('params') or [])
+        except RpcError as e:
+            response['error'] = {'code': e.code, 'message': e.message}
+        return 200, response
+
+
+class _Handler(BaseHTTPRequestHandler):
+    rpc = None
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        if isinstance(payload, list):
+            results = [self.rpc.handle(item) for item in payload]
+            http_status = max(status for status, _ in results)
+            body = [body for _, body in results]
+        else:
+            http_status, body = self.rpc.handle(payload)
+
+        if http_status != 200:
+            self.send_response(http_status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        encoded = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
@@ -0,0 +1,155 @@
+"""
+Model fields for Solana identifiers.
+
+``Base58Field`` stores public keys (32 bytes) and signatures (64 bytes) as raw
+bytes (``bytea`` on PostgreSQL, ``BLOB`` on SQLite) while Python code, forms,
+serializers and the admin keep seeing base58 strings. Base58 text takes about
+1.37x the bytes plus a length header, in the row and in every index on the
+column; fixed-width binary keys also compare with a plain memcmp.
+"""
+from typing import List, Tuple
+
+import base58
+from django.core import exceptions
+from django.db import models
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def base58_prefix_ranges(prefix: str, size: int) -> List[Tuple[bytes, bytes]]:
+    """
+    Byte ranges holding every ``size``-byte value whose base58 encoding starts with ``prefix``.
+
+    Base58 encodes the value as a big-endian number, so for each possible
+    encoded length the matching values form one contiguous numeric range,
+    which for fixed-width big-endian bytes is also a contiguous byte range.
+    Each leading zero byte is encoded as a leading "1" ahead of that number.
+
+    Returns:
+        Inclusive (low, high) pairs; empty when nothing can match
+    """
+    if any(char not in BASE58_ALPHABET for char in prefix):
+        return []
+
+    rest = prefix.lstrip('1')
+    zeros = len(prefix) - len(rest)
+    if zeros > size or (zeros == size and rest):
+        return []
+    if not rest:
+        # At least `zeros` leading zero bytes, anything after them
+        return [(bytes(size), (256 ** (size - zeros) - 1).to_bytes(size, 'big'))]
+
+    prefix_value = 0
+    for char in rest:
+        prefix_value = prefix_value * 58 + BASE58_ALPHABET.index(char)
+
+    # Exactly `zeros` leading zero bytes, so the remaining number starts with a non-zero byte
+    floor, ceiling = 256 ** (size - zeros - 1), 256 ** (size - zeros) - 1
+    ranges = []
+    length = len(rest)
+    while True:
+        scale = 58 ** (length - len(rest))
+        low, high = prefix_value * scale, (prefix_value + 1) * scale - 1
+        if low > ceiling:
+            break
+        low, high = max(low, floor), min(high, ceiling)
+        if low <= high:
+            ranges.append((low.to_bytes(size, 'big'), high.to_bytes(size, 'big')))
+        length += 1
+    return ranges
+
+
+class Base58Field(models.CharField):
+    """
+    A base58 string in Python, ``size`` raw bytes in the database.
+
+    Exact, ``in`` and comparison lookups use the column's index as usual;
+    ``startswith`` is translated into byte ranges. Substring lookups are not
+    supported.
+    """
+    description = "Base58-encoded binary value"
+
+    def __init__(self, *args, size: int = 32, **kwargs):
+        self.size = size
+        # Longest base58 encoding of `size` bytes
+        kwargs.setdefault('max_length', 88 if size == 64 else 44)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.size != 32:
+            kwargs['size'] = self.size
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return base58.b58encode(bytes(value)).decode()
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return base58.b58encode(bytes(value)).decode()
+        return super().to_python(value)
+
+    def decode(self, value: str) -> bytes:
+        try:
+            raw = base58.b58decode(value)
+        except ValueError:
+            raw = b''
+        if len(raw) != self.size:
+            raise exceptions.ValidationError(
+                f"'{value}' is not a base58-encoded {self.size}-byte value.",
+                code='invalid',
+            )
+        return raw
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None or value == '':
+            return None if self.null else b''
+        if isinstance(value, (bytes, memoryview)):
+            return bytes(value)
+        try:
+            return self.decode(value)
+        except exceptions.ValidationError as e:
+            raise e.__class__(
+                f"Field '{self.name}' expected a base58 value but got {value!r}.",
+                code='invalid',
+            ) from e
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if isinstance(value, bytes):
+            return connection.Database.Binary(value)
+        return value
+
+    def validate(self, value, model_instance):
+        super().validate(value, model_instance)
+        if value not in self.empty_values:
+            self.decode(value)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+
+@Base58Field.register_lookup
+class Base58StartsWith(models.Lookup):
+    """Prefix match on the base58 form, as byte ranges the column index can scan"""
+    lookup_name = 'startswith'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        field = self.lhs.output_field
+        ranges = base58_prefix_ranges(self.rhs, field.size)
+        if not ranges:
+            raise exceptions.EmptyResultSet
+
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        binary = connection.Database.Binary
+        params = []
+        for low, high in ranges:
+            params.extend([*lhs_params, binary(low), binary(high)])
+        return '(' + ' OR '.join(f'{lhs} BETWEEN %s AND %s' for _ in ranges) + ')', params
@@ -0,0 +1,148 @@
+"""
+Off-chain index of sGOLD holders.
+
+Listing holders on chain means a getProgramAccounts scan of the SPL Token
+program, which is slow and rate limited on public RPC nodes, so it is done
+once by ``sync_holders`` (``manage.py sync_holders``, e.g. from cron) and the
+result kept in the TokenHolder table. The scan is narrowed server-side to
+165-byte token accounts of our mint and only the owner and amount bytes are
+returned.
+
+Between syncs, mints and burns settled by the exchange are applied to the
+index as they complete. Transfers between users happen outside the exchange
+and are only picked up by the next full sync.
+"""
+import base64
+import logging
+import struct
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import models, transaction as db_transaction
+from django.utils import timezone
+from spl.token.constants import TOKEN_PROGRAM_ID
+
+from .models import GoldTransaction, TokenHolder
+from .rpc import get_rpc_client
+
+logger = logging.getLogger(__name__)
+
+# SPL token account layout: mint (0..32), owner (32..64), amount u64 LE (64..72)
+TOKEN_ACCOUNT_SIZE = 165
+OWNER_OFFSET = 32
+OWNER_AND_AMOUNT_LENGTH = 40
+
+TOKEN_DECIMALS = 2
+
+
+def fetch_token_accounts(client=None, mint: str = None) -> Tuple[int, Dict[str, Tuple[str, int]]]:
+    """
+    Fetch every token account of the sGOLD mint with one getProgramAccounts call.
+
+    Args:
+        client: RPC router (default: the shared one)
+        mint: Mint address (default: SGOLD_MINT_ADDRESS)
+
+    Returns:
+        Tuple of (slot the scan was served at, {token account: (owner, amount)})
+    """
+    client = client or get_rpc_client()
+    result = client.request('getProgramAccounts', [str(TOKEN_PROGRAM_ID), {
+        'encoding': 'base64',
+        'commitment': 'confirmed',
+        'withContext': True,
+        'filters': [
+            {'dataSize': TOKEN_ACCOUNT_SIZE},
+            {'memcmp': {'offset': 0, 'bytes': mint or settings.SGOLD_MINT_ADDRESS}},
+        ],
+        'dataSlice': {'offset': OWNER_OFFSET, 'length': OWNER_AND_AMOUNT_LENGTH},
+    }])
+
+    accounts = {}
+    for entry in result['value']:
+        data = base64.b64decode(entry['account']['data'][0])
+        owner = TokenHolder._meta.get_field('owner').to_python(data[:32])
+        accounts[entry['pubkey']] = (owner, struct.unpack('<Q', data[32:40])[0])
+    return result['context']['slot'], accounts
+
+
+def sync_holders(client=None, batch_size: int = 1000) -> dict:
+    """
+    Rebuild the holder index from chain state.
+
+    Accounts with a balance are upserted; rows the scan no longer returns
+    (closed or emptied accounts) are deleted, unless a settlement touched them
+    while the scan was running.
+
+    Returns:
+        Dict with the scan slot and counts of accounts stored and removed
+    """
+    started = timezone.now()
+    slot, accounts = fetch_token_accounts(client)
+    rows = [
+        TokenHolder(token_account=address, owner=owner, amount=amount, slot=slot)
+        for address, (owner, amount) in accounts.items()
+        if amount > 0
+    ]
+
+    with db_transaction.atomic():
+        TokenHolder.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['token_account'],
+            update_fields=['owner', 'amount', 'slot', 'updated_at'],
+        )
+        removed, _ = TokenHolder.objects.filter(updated_at__lt=started).delete()
+
+    logger.info(f"Holder index synced at slot {slot}: {len(rows)} accounts, {removed} removed")
+    return {'slot': slot, 'accounts': len(rows), 'removed': removed}
+
+
+def record_settlement(gold_tx: GoldTransaction):
+    """
+    Apply a completed trade's mint (buy) or burn (sell) to the holder index.
+
+    Never raises: the index is a cache, and the next full sync corrects it.
+    """
+    account = gold_tx.user_token_account
+    if not account:
+        return
+    delta = int(gold_tx.token_amount * 10 ** TOKEN_DECIMALS)
+    if gold_tx.transaction_type == 'sell':
+        delta = -delta
+
+    try:
+        if delta < 0:
+            # A burn can only come from an account already holding the tokens
+            TokenHolder.objects.filter(token_account=account, amount__gte=-delta).update(
+                amount=models.F('amount') + delta,
+                updated_at=timezone.now(),
+            )
+            return
+
+        holder, created = TokenHolder.objects.get_or_create(
+            token_account=account,
+            defaults={'owner': gold_tx.user_wallet, 'amount': delta},
+        )
+        if not created:
+            TokenHolder.objects.filter(pk=holder.pk).update(
+                amount=models.F('amount') + delta,
+                updated_at=timezone.now(),
+            )
+    except Exception as e:
+        logger.error(f"Failed to update holder index for transaction {gold_tx.id}: {e}")
+
+
+def top_holders(limit: int = 20) -> List[TokenHolder]:
+    """Largest token accounts, by balance (token_holder_amount_idx)"""
+    return list(TokenHolder.objects.filter(amount__gt=0).order_by('-amount')[:limit])
+
+
+def supply_totals() -> dict:
+    """Holder count, indexed supply in base units and the slot of the last full sync"""
+    return TokenHolder.objects.aggregate(
+        holders=models.Count('pk', filter=models.Q(amount__gt=0)),
+        supply=models.Sum('amount'),
+        synced_slot=models.Max('slot'),
+    )
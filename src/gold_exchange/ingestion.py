@@ -0,0 +1,248 @@
+"""
+Push-based settlement of exchange trades.
+
+Subscribes to ``logsSubscribe`` notifications for the liquidity, treasury and
+mint accounts, decodes SOL payments and sGOLD burns from each new transaction
+and settles the pending ``GoldTransaction`` they pay for, matched by payer
+and amount. Trades confirm as soon as the payment lands instead of when the
+client calls the confirm endpoint, which remains as a fallback for anything
+missed while the subscription was down.
+
+Run with ``manage.py ingest_wallet_activity``.
+"""
+import asyncio
+import logging
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import base58
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from solana.rpc.websocket_api import connect
+from solders.rpc.config import RpcTransactionLogsFilterMentions
+from solders.rpc.responses import LogsNotification
+
+from config.db_routers import use_primary
+
+from .models import GoldTransaction
+from .services import GoldTokenService
+from .settlement import LAMPORTS_PER_SOL, SettlementError, claim_pending, settle_buy, settle_sell, signature_used
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROGRAM = '11111111111111111111111111111111'
+TOKEN_PROGRAM = 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA'
+
+# Signatures remembered for de-duplication (one trade mentions several watched accounts)
+SEEN_SIGNATURES = 10_000
+
+
+def pubsub_url(rpc_url: str) -> str:
+    """
+    WebSocket endpoint for an RPC URL: SOLANA_WS_URL if set, otherwise the
+    same host over ws(s), with an explicit port incremented as on a local
+    validator (8899 -> 8900).
+    """
+    if settings.SOLANA_WS_URL:
+        return settings.SOLANA_WS_URL
+    parts = urlsplit(rpc_url)
+    netloc = parts.netloc
+    if parts.port:
+        netloc = f"{parts.hostname}:{parts.port + 1}"
+    return urlunsplit(('wss' if parts.scheme == 'https' else 'ws', netloc, parts.path, parts.query, ''))
+
+
+def decode_activity(tx: dict) -> Tuple[List[Tuple[str, str, int]], List[Tuple[str, str, int]]]:
+    """
+    Top-level SOL transfers and token burns in a ``getTransaction`` result (json encoding).
+
+    Returns:
+        Tuple of (transfers as (source, destination, lamports),
+        burns as (owner, mint, base units))
+    """
+    message = tx['transaction']['message']
+    loaded = tx['meta'].get('loadedAddresses') or {}
+    keys = [*message['accountKeys'], *loaded.get('writable', []), *loaded.get('readonly', [])]
+
+    transfers, burns = [], []
+    for instruction in message['instructions']:
+        program = keys[instruction['programIdIndex']]
+        accounts = [keys[i] for i in instruction['accounts']]
+        data = base58.b58decode(instruction['data'])
+        if program == SYSTEM_PROGRAM and data[:4] == struct.pack('<I', 2) and len(data) >= 12:
+            transfers.append((accounts[0], accounts[1], struct.unpack('<Q', data[4:12])[0]))
+        elif program == TOKEN_PROGRAM and data[:1] in (b'\x08', b'\x0f') and len(data) >= 9:  # Burn / BurnChecked
+            burns.append((accounts[2], accounts[1], struct.unpack('<Q', data[1:9])[0]))
+    return transfers, burns
+
+
+class WalletActivityIngestor:
+    """
+    Settles pending trades from on-chain activity on the exchange accounts.
+
+    Usage:
+        ingestor = WalletActivityIngestor()
+        ingestor.run(stop_event)
+    """
+
+    def __init__(self, service: Optional[GoldTokenService] = None, ws_url: Optional[str] = None):
+        self.service = service or GoldTokenService()
+        self.ws_url = ws_url or pubsub_url(settings.SOLANA_RPC_URL)
+        self.payment_wallets = {
+            str(self.service.liquidity_wallet),
+            str(self.service.treasury_wallet),
+            str(self.service.profit_wallet),
+            str(self.service.transaction_fee_wallet),
+        }
+        self.mint = str(self.service.mint_address)
+        self.watched = [self.service.liquidity_wallet, self.service.treasury_wallet, self.service.mint_address]
+        self._seen: OrderedDict = OrderedDict()
+        self.settled = 0
+
+    def watched_accounts(self) -> List[str]:
+        return [str(account) for account in self.watched]
+
+    # ------------------------------------------------------------------
+    # Subscription
+    # ------------------------------------------------------------------
+
+    def run(self, stop: threading.Event, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        """Ingest until ``stop`` is set, reconnecting with backoff"""
+        delay = reconnect_delay
+        while not stop.is_set():
+            try:
+                asyncio.run(self._listen(stop))
+                delay = reconnect_delay
+            except Exception as e:
+                logger.warning(f"Log subscription to {self.ws_url} failed: {e!r}; reconnecting in {delay:.0f}s")
+                stop.wait(delay)
+                delay = min(delay * 2, max_reconnect_delay)
+
+    async def _listen(self, stop: threading.Event):
+        async with connect(self.ws_url) as websocket:
+            for account in self.watched:
+                await websocket.logs_subscribe(RpcTransactionLogsFilterMentions(account), commitment='confirmed')
+            logger.info(f"Subscribed to logs for {', '.join(self.watched_accounts())} on {self.ws_url}")
+
+            while not stop.is_set():
+                try:
+                    messages = await asyncio.wait_for(websocket.recv(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+                for message in messages:
+                    if not isinstance(message, LogsNotification) or message.result.value.err is not None:
+                        continue
+                    signature = str(message.result.value.signature)
+                    if self._first_sighting(signature):
+                        # The ORM is synchronous; settle off the event loop
+                        await asyncio.to_thread(self.ingest, signature)
+
+    def _first_sighting(self, signature: str) -> bool:
+        if signature in self._seen:
+            return False
+        self._seen[signature] = True
+        if len(self._seen) > SEEN_SIGNATURES:
+            self._seen.popitem(last=False)
+        return True
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def ingest(self, signature: str) -> List[int]:
+        """
+        Settle the pending trades paid for by one transaction.
+
+        Returns:
+            Ids of the GoldTransactions settled
+        """
+        close_old_connections()
+        # Pending rows were created moments ago; replicas may not have them yet
+        with use_primary():
+            return self._ingest(signature)
+
+    def _ingest(self, signature: str) -> List[int]:
+        try:
+            tx = self.service.client.request('getTransaction', [
+                signature,
+                {'encoding': 'json', 'commitment': 'confirmed', 'maxSupportedTransactionVersion': 0},
+            ])
+        except Exception as e:
+            logger.error(f"Failed to fetch {signature}: {e}")
+            return []
+        if not tx or tx['meta'].get('err') is not None:
+            return []
+        if signature_used(signature):
+            # Already settled (usually by the client's confirm); it must not pay for another trade
+            return []
+
+        transfers, burns = decode_activity(tx)
+        settled = []
+
+        payments: Dict[str, int] = {}
+        for source, destination, lamports in transfers:
+            if destination in self.payment_wallets:
+                payments[source] = payments.get(source, 0) + lamports
+        for payer, lamports in payments.items():
+            gold_tx = self._match_buy(payer, lamports)
+            if gold_tx and self._settle(gold_tx, signature, settle_buy):
+                settled.append(gold_tx.id)
+
+        for owner, mint, amount in burns:
+            if mint != self.mint:
+                continue
+            gold_tx = self._match_sell(owner, amount)
+            if gold_tx and self._settle(gold_tx, signature, settle_sell):
+                settled.append(gold_tx.id)
+
+        return settled
+
+    def _pending(self, transaction_type: str, wallet: str):
+        # Only indexed columns are read; claim_pending re-fetches the full row
+        return GoldTransaction.objects.pending_for_wallet(wallet).filter(
+            transaction_type=transaction_type,
+            quote_expires_at__gt=timezone.now(),
+        )
+
+    def expected_payment(self, sol_amount) -> int:
+        """Lamports a buy transaction pays to the exchange wallets, as built by buy_initiate"""
+        return sum(
+            int(part * LAMPORTS_PER_SOL)
+            for part in self.service.calculate_fees(sol_amount, 'buy')
+            if part > 0
+        )
+
+    def _match_buy(self, payer: str, lamports: int) -> Optional[GoldTransaction]:
+        for gold_tx in self._pending('buy', payer):
+            if self.expected_payment(gold_tx.sol_amount) == lamports:
+                return gold_tx
+        return None
+
+    def _match_sell(self, owner: str, amount: int) -> Optional[GoldTransaction]:
+        for gold_tx in self._pending('sell', owner):
+            if int(gold_tx.token_amount * 100) == amount:
+                return gold_tx
+        return None
+
+    def _settle(self, gold_tx: GoldTransaction, signature: str, settle) -> bool:
+        try:
+            gold_tx = claim_pending(gold_tx.id, signature)
+        except SettlementError as e:
+            # Usually the client's confirm call got there first
+            logger.info(f"Skipping {gold_tx.transaction_type} {gold_tx.id} for {signature}: {e}")
+            return False
+
+        try:
+            settle(gold_tx, signature, self.service, verify=False)
+        except Exception as e:
+            logger.error(f"Error settling {gold_tx.transaction_type} {gold_tx.id} from {signature}: {e}", exc_info=True)
+            gold_tx.mark_failed(f'Error processing transaction: {str(e)}')
+            return False
+
+        self.settled += 1
+        logger.info(f"Settled {gold_tx.transaction_type} {gold_tx.id} from {signature}")
+        return True
@@ -0,0 +1,275 @@
+"""
+Hot-path instrumentation for the gold exchange.
+
+Attributes request time to its upstreams (Solana RPC, the price oracle and the
+database), exposes Prometheus-style histograms at ``/metrics`` and adds a
+``Server-Timing`` header to exchange API responses. Native database
+connection pools (``DATABASE_POOL_MODE=pool``) report their size and the
+time requests spent waiting for a connection.
+
+Metrics live in process memory, so each gunicorn worker reports its own
+series; Prometheus aggregates them by instance.
+"""
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+from config.database import connection_pools
+
+logger = logging.getLogger(__name__)
+
+# Seconds. Upstream calls range from sub-millisecond queries to multi-second RPC timeouts.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values, in Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # one counter per bucket, then +Inf, then the sum
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return sum(series[:-1]) if series else 0
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            items = [(labels, list(series)) for labels, series in items]
+        for labelvalues, series in items:
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip([*self.buckets, '+Inf'], series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """Monotonic counter keyed by label values, in Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, count in items:
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues))
+            lines.append(f"{self.name}{{{labels}}} {count}")
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = Histogram(
+    'gold_http_request_duration_seconds',
+    'Time spent serving HTTP requests.',
+    ('endpoint', 'method', 'status'),
+)
+UPSTREAM_DURATION = Histogram(
+    'gold_upstream_duration_seconds',
+    'Time spent in upstream calls, by request endpoint.',
+    ('endpoint', 'upstream', 'operation'),
+)
+METRICS = [REQUEST_DURATION, UPSTREAM_DURATION]
+
+
+def register(metric):
+    """Include a metric defined in another module in the ``/metrics`` output"""
+    METRICS.append(metric)
+    return metric
+
+
+class RequestTimings:
+    """Upstream time accumulated while serving one request"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.totals: Dict[str, list] = {}
+
+    def add(self, upstream: str, duration: float):
+        total = self.totals.setdefault(upstream, [0, 0.0])
+        total[0] += 1
+        total[1] += duration
+
+    def server_timing(self, total: float) -> str:
+        entries = [
+            f'{upstream};dur={seconds * 1000:.1f};desc="{calls} call{"s" if calls != 1 else ""}"'
+            for upstream, (calls, seconds) in self.totals.items()
+        ]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ', '.join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar('gold_request_timings', default=None)
+
+
+@contextmanager
+def track(upstream: str, operation: str):
+    """
+    Time an upstream call, attributing it to the request being served.
+
+    Args:
+        upstream: 'rpc', 'oracle' or 'db'
+        operation: RPC method, oracle feed or SQL verb
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        timings = _current.get()
+        UPSTREAM_DURATION.observe(duration, timings.endpoint if timings else '', upstream, operation)
+        if timings is not None:
+            timings.add(upstream, duration)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    verb = sql.lstrip().split(None, 1)[0].upper() if sql else 'QUERY'
+    with track('db', verb):
+        return execute(sql, params, many, context)
+
+
+def _endpoint(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    # Route pattern, not the path: wallet addresses would explode label cardinality
+    return match.route
+
+
+class InstrumentationMiddleware:
+    """
+    Times every request and its database queries, and adds a Server-Timing
+    header to responses under ``SERVER_TIMING_PATHS``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings('unmatched')
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        REQUEST_DURATION.observe(total, _endpoint(request), request.method, str(response.status_code))
+        if any(request.path.startswith(prefix) for prefix in settings.SERVER_TIMING_PATHS):
+            response['Server-Timing'] = timings.server_timing(total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Resolved before the view runs, so upstream calls get the endpoint label
+        timings = _current.get()
+        if timings is not None:
+            timings.endpoint = _endpoint(request)
+
+
+# (metric, type, help, psycopg_pool stat, scale)
+POOL_METRICS = [
+    ('gold_db_pool_size', 'gauge', 'Connections currently managed by the pool.', 'pool_size', 1),
+    ('gold_db_pool_available', 'gauge', 'Idle connections in the pool.', 'pool_available', 1),
+    ('gold_db_pool_waiting', 'gauge', 'Requests currently waiting for a connection.', 'requests_waiting', 1),
+    ('gold_db_pool_requests_total', 'counter', 'Connections requested from the pool.', 'requests_num', 1),
+    ('gold_db_pool_queued_total', 'counter', 'Requests that had to wait for a connection.', 'requests_queued', 1),
+    ('gold_db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a pooled connection.', 'requests_wait_ms', 0.001),
+    ('gold_db_pool_timeouts_total', 'counter', 'Requests that gave up waiting for a connection.', 'requests_errors', 1),
+    ('gold_db_pool_usage_seconds_total', 'counter', 'Time connections spent checked out.', 'usage_ms', 0.001),
+]
+
+
+def render_pool_metrics(pools) -> str:
+    """
+    Prometheus text for connection pools.
+
+    Args:
+        pools: Mapping of database alias to psycopg_pool.ConnectionPool
+    """
+    stats = {alias: pool.get_stats() for alias, pool in sorted(pools.items())}
+    lines = []
+    for name, kind, documentation, key, scale in POOL_METRICS:
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+        for alias, values in stats.items():
+            # psycopg_pool omits counters that are still zero
+            lines.append(f'{name}{{database="{_escape(alias)}"}} {values.get(key, 0) * scale}')
+    return '\n'.join(lines)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint.
+
+    GET /metrics
+    Requires ``Authorization: Bearer <METRICS_TOKEN>``. Without a token the
+    endpoint is only served with DEBUG on.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    sections = [metric.render() for metric in METRICS]
+    pools = connection_pools()
+    if pools:
+        sections.append(render_pool_metrics(pools))
+    body = '\n'.join(sections) + '\n'
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
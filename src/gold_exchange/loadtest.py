@@ -0,0 +1,222 @@
+"""
+Load-test harness for the gold exchange flow.
+
+Drives quote -> initiate -> sign and send -> confirm with simulated wallets at
+a configurable concurrency, and reports p50/p95/p99 latency and throughput per
+endpoint. Works against a running server over HTTP or in-process through the
+Django test client.
+"""
+import base64
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+import requests
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+from solders.transaction import Transaction
+
+API_PREFIX = '/api/v1/gold'
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LatencyRecorder:
+    """Thread-safe per-endpoint latency and error collection"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, duration: float, ok: bool = True):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(duration)
+        if not ok:
+            self.record_error(endpoint)
+
+    def record_error(self, endpoint: str):
+        with self._lock:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def timed(self, endpoint: str, func: Callable, *args, **kwargs):
+        """Call func, recording its duration; exceptions count as errors"""
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record(endpoint, time.perf_counter() - started, ok=False)
+            raise
+        self.record(endpoint, time.perf_counter() - started)
+        return result
+
+    def summary(self, wall_time: float) -> List[Dict]:
+        rows = []
+        for endpoint, durations in self.samples.items():
+            rows.append({
+                'endpoint': endpoint,
+                'count': len(durations),
+                'errors': self.errors.get(endpoint, 0),
+                'p50_ms': percentile(durations, 50) * 1000,
+                'p95_ms': percentile(durations, 95) * 1000,
+                'p99_ms': percentile(durations, 99) * 1000,
+                'throughput_rps': len(durations) / wall_time if wall_time else 0.0,
+            })
+        return rows
+
+
+class HttpTransport:
+    """Talks to a running server over HTTP"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def post(self, path: str, data: dict):
+        response = self.session.post(f"{self.base_url}{path}", json=data, timeout=60)
+        return response.status_code, response.json()
+
+
+class DjangoClientTransport:
+    """Calls the views in-process through the Django test client"""
+
+    def __init__(self):
+        from django.test import Client as DjangoClient
+        self.client = DjangoClient()
+
+    def post(self, path: str, data: dict):
+        response = self.client.post(path, data, content_type='application/json')
+        return response.status_code, response.json()
+
+
+class FlowError(Exception):
+    def __init__(self, step: str, status_code: int, body):
+        super().__init__(f"{step} failed with {status_code}: {body}")
+        self.step = step
+
+
+class ExchangeFlow:
+    """
+    One simulated wallet running the exchange flow end to end.
+    The wallet signs the unsigned transaction the backend returns and submits
+    it to the RPC node itself, as a browser wallet would.
+    """
+
+    def __init__(self, transport, rpc: Client, recorder: LatencyRecorder, usd_amount: str = '25'):
+        self.transport = transport
+        self.rpc = rpc
+        self.recorder = recorder
+        self.usd_amount = usd_amount
+        self.keypair = Keypair()
+
+    def _post(self, step: str, data: dict) -> dict:
+        status_code, body = self.recorder.timed(f"POST {step}", self.transport.post, f"{API_PREFIX}/{step}", data)
+        if status_code != 200:
+            self.recorder.record_error(f"POST {step}")
+            raise FlowError(step, status_code, body)
+        return body
+
+    def _sign_and_send(self, serialized: str) -> str:
+        tx = Transaction.from_bytes(base64.b64decode(serialized))
+        tx.sign([self.keypair], tx.message.recent_blockhash)
+        result = self.recorder.timed('RPC sendTransaction', self.rpc.send_raw_transaction, bytes(tx))
+        return str(result.value)
+
+    def trade(self, action: str, **amount) -> dict:
+        quote = self._post('quote', {'action': action, **amount})
+        initiated = self._post(f"{action}/initiate", {
+            'wallet_address': str(self.keypair.pubkey()),
+            'quote_id': quote['quote_id'],
+        })
+        signature = self._sign_and_send(initiated['serialized_transaction'])
+        return self._post(f"{action}/confirm", {
+            'exchange_id': initiated['exchange_id'],
+            'tx_signature': signature,
+        })
+
+    def run(self, action: str = 'buy'):
+        self.trade('buy', usd_amount=self.usd_amount)
+        if action == 'roundtrip':
+            # Buying $X mints X/12.5 tokens; redeeming $X/2 stays within that
+            self.trade('sell', usd_amount=str(Decimal(self.usd_amount) / 2))
+
+
+@dataclass
+class LoadTestResult:
+    flows: int
+    completed: int
+    failed: int
+    wall_time: float
+    endpoints: List[Dict] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def flows_per_second(self) -> float:
+        return self.completed / self.wall_time if self.wall_time else 0.0
+
+
+def run_load_test(
+    transport_factory: Callable,
+    rpc_url: str,
+    flows: int = 20,
+    concurrency: int = 4,
+    action: str = 'buy',
+    usd_amount: str = '25',
+) -> LoadTestResult:
+    """
+    Run ``flows`` exchange flows across ``concurrency`` workers.
+
+    Args:
+        transport_factory: Callable returning a transport (one per worker thread)
+        rpc_url: RPC endpoint the simulated wallets submit their transactions to
+        flows: Total number of flows to run
+        concurrency: Number of concurrent simulated wallets
+        action: 'buy' or 'roundtrip' (buy then sell)
+        usd_amount: USD amount spent per buy
+
+    Returns:
+        LoadTestResult with per-endpoint latency percentiles and throughput
+    """
+    recorder = LatencyRecorder()
+    local = threading.local()
+    errors = []
+    errors_lock = threading.Lock()
+
+    def worker(_):
+        if not hasattr(local, 'transport'):
+            local.transport = transport_factory()
+            local.rpc = Client(rpc_url)
+        flow = ExchangeFlow(local.transport, local.rpc, recorder, usd_amount=usd_amount)
+        try:
+            recorder.timed('flow', flow.run, action)
+            return True
+        except Exception as e:
+            with errors_lock:
+                errors.append(str(e))
+            return False
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(worker, range(flows)))
+    wall_time = time.perf_counter() - started
+
+    completed = sum(1 for ok in outcomes if ok)
+    return LoadTestResult(
+        flows=flows,
+        completed=completed,
+        failed=flows - completed,
+        wall_time=wall_time,
+        endpoints=recorder.summary(wall_time),
+        errors=errors,
+    )
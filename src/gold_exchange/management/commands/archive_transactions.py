@@ -0,0 +1,45 @@
+"""
+Archive settled exchange transactions.
+
+Moves completed, failed and cancelled GoldTransactions older than
+GOLD_ARCHIVE_AFTER_DAYS into the (monthly partitioned) archive table.
+Safe to run repeatedly, e.g. nightly from cron.
+
+Usage:
+    python manage.py archive_transactions --older-than-days 90
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gold_exchange.archive import ARCHIVABLE_STATUSES, archive_transactions
+from gold_exchange.models import GoldTransaction
+
+
+class Command(BaseCommand):
+    help = 'Move old settled GoldTransactions to the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='Archive rows created more than this many days ago (default: GOLD_ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows moved per transaction (default: 1000)')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        days = options['older_than_days'] if options['older_than_days'] is not None else settings.GOLD_ARCHIVE_AFTER_DAYS
+        before = timezone.now() - timedelta(days=days)
+
+        if options['dry_run']:
+            count = GoldTransaction.objects.filter(status__in=ARCHIVABLE_STATUSES, created_at__lt=before).count()
+            self.stdout.write(f"{count} transactions created before {before:%Y-%m-%d %H:%M} would be archived")
+            return
+
+        archived = archive_transactions(before, batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} transactions created before {before:%Y-%m-%d %H:%M}"))
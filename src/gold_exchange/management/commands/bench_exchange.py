@@ -0,0 +1,82 @@
+"""
+Run the gold exchange benchmark suite and compare against the stored baseline.
+
+Usage:
+    python manage.py bench_exchange                  # compare, exit 1 on regression
+    python manage.py bench_exchange --save           # record a new baseline
+    python manage.py bench_exchange quote_view admin_dashboard --rows 100000
+    python manage.py bench_exchange --storage        # table and index sizes after seeding
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gold_exchange.benchmarks import (
+    BENCHMARKS,
+    DEFAULT_BASELINE,
+    compare,
+    load_baseline,
+    run_benchmarks,
+    save_baseline,
+    storage_report,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the exchange hot paths and fail on regressions against the stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+        parser.add_argument('--rows', type=int, default=10_000, help='GoldTransaction rows to seed (default: 10000)')
+        parser.add_argument('--rounds', type=int, default=7, help='Timed rounds per benchmark (default: 7)')
+        parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='Baseline JSON file')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed median slowdown before failing, as a fraction (default: 0.25)',
+        )
+        parser.add_argument('--save', action='store_true', help='Write results to the baseline instead of comparing')
+        parser.add_argument('--storage', action='store_true', help='Report table and index sizes instead of timing')
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options['names'] if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(unknown)}")
+
+        self.stdout.write(f"Seeding {options['rows']} transactions (rolled back afterwards)...")
+        if options['storage']:
+            sizes = storage_report(rows=options['rows'])
+            if not sizes:
+                raise CommandError("Relation sizes are not available on this database")
+            self.stdout.write("")
+            for name, size in sizes.items():
+                self.stdout.write(f"{name:<56} {size / 1024:>10,.0f} KiB")
+            return
+
+        results = run_benchmarks(options['names'] or None, rows=options['rows'], rounds=options['rounds'])
+        baseline = load_baseline(options['baseline'])
+
+        self.stdout.write("")
+        self.stdout.write(f"{'benchmark':<28} {'median us':>11} {'min us':>11} {'stdev':>9} {'queries':>8} {'vs base':>9}")
+        regressions = []
+        for result in results:
+            base = baseline.get(result.name)
+            change = f"{result.median_us / base['median_us'] - 1:+.0%}" if base else 'new'
+            self.stdout.write(
+                f"{result.name:<28} {result.median_us:>11.1f} {result.min_us:>11.1f} "
+                f"{result.stdev_us:>9.1f} {result.queries:>8} {change:>9}"
+            )
+            regressions.extend(compare(result, base, tolerance=options['tolerance']))
+        self.stdout.write("")
+
+        if options['save']:
+            save_baseline(results, options['baseline'], rows=options['rows'])
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            raise CommandError(f"{len(regressions)} benchmark regression(s)")
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} benchmarks within budget"))
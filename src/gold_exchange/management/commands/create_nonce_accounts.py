@@ -0,0 +1,49 @@
+"""
+Create durable nonce accounts for the signer service.
+
+The mint authority funds each account and is set as its nonce authority.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.system_program import create_nonce_account
+from solders.transaction import Transaction
+
+from gold_exchange.rpc import get_rpc_client
+from gold_exchange.signer import NONCE_ACCOUNT_SIZE, load_keypair
+
+
+class Command(BaseCommand):
+    help = 'Create durable nonce accounts controlled by the mint authority for run_signer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=4, help='Number of nonce accounts to create (default: 4)')
+
+    def handle(self, *args, **options):
+        if not settings.MINT_AUTHORITY_KEYPAIR:
+            raise CommandError("MINT_AUTHORITY_KEYPAIR not set in .env")
+
+        authority = load_keypair(settings.MINT_AUTHORITY_KEYPAIR)
+        client = get_rpc_client()
+        rent_exemption = client.get_minimum_balance_for_rent_exemption(NONCE_ACCOUNT_SIZE).value
+        self.stdout.write(
+            f"Creating {options['count']} nonce accounts for {authority.pubkey()} "
+            f"({rent_exemption / 1_000_000_000} SOL each)"
+        )
+
+        created = []
+        for _ in range(options['count']):
+            nonce = Keypair()
+            instructions = create_nonce_account(authority.pubkey(), nonce.pubkey(), authority.pubkey(), rent_exemption)
+            recent_blockhash = client.get_latest_blockhash().value.blockhash
+            message = Message.new_with_blockhash(list(instructions), authority.pubkey(), recent_blockhash)
+            try:
+                result = client.send_raw_transaction(bytes(Transaction([authority, nonce], message, recent_blockhash)))
+            except Exception as e:
+                raise CommandError(f"Failed to create nonce account: {e}")
+            self.stdout.write(f"  {nonce.pubkey()}  (tx {result.value})")
+            created.append(str(nonce.pubkey()))
+
+        self.stdout.write(self.style.SUCCESS("\nAdd to your .env:"))
+        self.stdout.write(f"SOLANA_NONCE_ACCOUNTS={','.join(created)}")
@@ -0,0 +1,45 @@
+"""
+Settle exchange trades from on-chain wallet activity.
+
+Subscribes to logs for the liquidity, treasury and mint accounts and settles
+pending buys and sells as soon as their payment or burn lands, without
+waiting for the client to call the confirm endpoint.
+
+Usage:
+    SOLANA_WS_URL=wss://api.devnet.solana.com python manage.py ingest_wallet_activity
+"""
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gold_exchange.ingestion import WalletActivityIngestor
+
+
+class Command(BaseCommand):
+    help = 'Settle pending trades from logsSubscribe notifications on the exchange accounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ws-url',
+            type=str,
+            default=None,
+            help='WebSocket RPC endpoint (default: SOLANA_WS_URL, or derived from SOLANA_RPC_URL)',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SGOLD_MINT_ADDRESS:
+            raise CommandError("SGOLD_MINT_ADDRESS not set")
+
+        ingestor = WalletActivityIngestor(ws_url=options['ws_url'])
+        self.stdout.write(self.style.SUCCESS(f"Ingesting wallet activity from {ingestor.ws_url}"))
+        for account in ingestor.watched_accounts():
+            self.stdout.write(f"  watching {account}")
+
+        stop = threading.Event()
+        try:
+            ingestor.run(stop)
+        except KeyboardInterrupt:
+            stop.set()
+        finally:
+            self.stdout.write(f"Ingestor stopped ({ingestor.settled} trades settled)")
@@ -0,0 +1,68 @@
+"""
+Load-test the gold exchange flow against a running server.
+
+Usage:
+    python manage.py run_fake_rpc --port 8899
+    SOLANA_RPC_URL=http://localhost:8899 python manage.py runserver
+    python manage.py loadtest_exchange --rpc-url http://localhost:8899 --flows 200 --concurrency 16
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gold_exchange.loadtest import HttpTransport, run_load_test
+
+
+class Command(BaseCommand):
+    help = 'Drive quote -> initiate -> confirm at a given concurrency and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', type=str, default='http://localhost:8000', help='Server to test')
+        parser.add_argument('--rpc-url', type=str, default=None, help='RPC endpoint wallets submit to (default: SOLANA_RPC_URL)')
+        parser.add_argument('--flows', type=int, default=50, help='Total number of flows to run (default: 50)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent simulated wallets (default: 8)')
+        parser.add_argument(
+            '--action',
+            type=str,
+            default='buy',
+            choices=['buy', 'roundtrip'],
+            help='buy, or roundtrip (buy then sell)',
+        )
+        parser.add_argument('--usd-amount', type=str, default='25', help='USD spent per buy (default: 25)')
+
+    def handle(self, *args, **options):
+        rpc_url = options['rpc_url'] or settings.SOLANA_RPC_URL
+        if 'devnet' in rpc_url or 'mainnet' in rpc_url:
+            raise CommandError(f"Refusing to load-test against {rpc_url}; point --rpc-url at run_fake_rpc")
+
+        self.stdout.write(
+            f"Running {options['flows']} {options['action']} flows at concurrency {options['concurrency']} "
+            f"against {options['base_url']} (RPC {rpc_url})"
+        )
+        result = run_load_test(
+            lambda: HttpTransport(options['base_url']),
+            rpc_url,
+            flows=options['flows'],
+            concurrency=options['concurrency'],
+            action=options['action'],
+            usd_amount=options['usd_amount'],
+        )
+
+        self.stdout.write("")
+        self.stdout.write(f"{'endpoint':<24} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+        for row in result.endpoints:
+            self.stdout.write(
+                f"{row['endpoint']:<24} {row['count']:>6} {row['errors']:>6} "
+                f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['throughput_rps']:>8.2f}"
+            )
+        self.stdout.write("")
+
+        summary = (
+            f"{result.completed}/{result.flows} flows completed in {result.wall_time:.1f}s "
+            f"({result.flows_per_second:.2f} flows/s)"
+        )
+        if result.failed:
+            self.stdout.write(self.style.WARNING(summary))
+            for error in result.errors[:10]:
+                self.stdout.write(f"  {error}")
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,54 @@
+"""
+Run a local stand-in Solana JSON-RPC node for development and load testing.
+
+Usage:
+    python manage.py run_fake_rpc --port 8899 --latency 0.05 --http-error-rate 0.01
+    SOLANA_RPC_URL=http://localhost:8899 python manage.py runserver
+
+The WebSocket feed for ``ingest_wallet_activity`` listens on the next port
+(8900), as on a local validator.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from gold_exchange.fake_rpc import Fault, FakeSolanaRpc
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake Solana JSON-RPC server with latency/failure injection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8899, help='Port to listen on (default: 8899)')
+        parser.add_argument('--latency', type=float, default=0.0, help='Fixed delay per request in seconds')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Random extra delay per request in seconds')
+        parser.add_argument('--http-error-rate', type=float, default=0.0, help='Probability of HTTP 503 responses')
+        parser.add_argument('--rpc-error-rate', type=float, default=0.0, help='Probability of JSON-RPC error responses')
+        parser.add_argument('--drop-rate', type=float, default=0.0, help='Probability that sent transactions never land')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible fault injection')
+
+    def handle(self, *args, **options):
+        fault = Fault(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            http_error_rate=options['http_error_rate'],
+            rpc_error_rate=options['rpc_error_rate'],
+        )
+        faults = {'*': fault}
+        if options['drop_rate']:
+            faults['sendTransaction'] = Fault(**{**fault.__dict__, 'drop_rate': options['drop_rate']})
+
+        rpc = FakeSolanaRpc(host=options['host'], port=options['port'], faults=faults, seed=options['seed'])
+        url = rpc.start()
+        pubsub_url = rpc.start_pubsub(port=options['port'] + 1 if options['port'] else 0)
+        self.stdout.write(self.style.SUCCESS(f"Fake Solana RPC listening on {url} (pubsub {pubsub_url})"))
+
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            rpc.stop()
+            self.stdout.write(f"Requests served: {rpc.request_counts}")
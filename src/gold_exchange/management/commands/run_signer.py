@@ -0,0 +1,71 @@
+"""
+Run the mint authority signer service.
+
+Owns MINT_AUTHORITY_KEYPAIR and serves mint and payout jobs to the web workers
+over SOLANA_SIGNER_ADDRESS, pipelining submissions over SOLANA_NONCE_ACCOUNTS.
+
+Usage:
+    SOLANA_SIGNER_ADDRESS=/run/gold-signer.sock python manage.py run_signer
+"""
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gold_exchange.signer import SignerServer, build_signer, signer_authkey
+
+
+class Command(BaseCommand):
+    help = 'Run the signer service that owns the mint authority key'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            type=str,
+            default=None,
+            help="'host:port' or Unix socket path to listen on (default: SOLANA_SIGNER_ADDRESS)",
+        )
+        parser.add_argument(
+            '--report-interval',
+            type=float,
+            default=60,
+            help='Seconds between throughput reports (default: 60, 0 to disable)',
+        )
+
+    def handle(self, *args, **options):
+        address = options['address'] or settings.SOLANA_SIGNER_ADDRESS
+        if not address:
+            raise CommandError("Set SOLANA_SIGNER_ADDRESS or pass --address")
+        if not settings.MINT_AUTHORITY_KEYPAIR:
+            raise CommandError("MINT_AUTHORITY_KEYPAIR not set")
+
+        signer = build_signer(nonce_accounts=settings.SOLANA_NONCE_ACCOUNTS)
+        server = SignerServer(signer, address, signer_authkey())
+
+        nonce_mode = (
+            f"{len(settings.SOLANA_NONCE_ACCOUNTS)} durable nonce accounts"
+            if settings.SOLANA_NONCE_ACCOUNTS else "recent blockhashes (no SOLANA_NONCE_ACCOUNTS)"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Signer for {signer.pubkey} listening on {server.address}"))
+        self.stdout.write(f"Submitting with {nonce_mode}")
+
+        stop = threading.Event()
+        if options['report_interval']:
+            threading.Thread(target=self._report, args=(signer, options['report_interval'], stop), daemon=True).start()
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+            server.close()
+            self.stdout.write("Signer stopped")
+
+    def _report(self, signer, interval, stop):
+        while not stop.wait(interval):
+            stats = signer.describe()
+            self.stdout.write(
+                f"submitted={stats['submitted']} failed={stats['failed']} "
+                f"jobs/s(1m)={stats['jobs_per_s_1m']} avg_ms(1m)={stats['avg_job_ms_1m']}"
+            )
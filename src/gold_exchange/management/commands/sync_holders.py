@@ -0,0 +1,26 @@
+"""
+Rebuild the sGOLD holder index from chain state.
+
+One getProgramAccounts scan of the mint's token accounts; between runs the
+index is kept current for exchange mints and burns as they settle. Run
+periodically (e.g. hourly from cron) to pick up transfers between users.
+
+Usage:
+    python manage.py sync_holders
+"""
+from django.core.management.base import BaseCommand
+
+from gold_exchange.holders import sync_holders
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the sGOLD holder index from getProgramAccounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows upserted per INSERT (default: 1000)')
+
+    def handle(self, *args, **options):
+        result = sync_holders(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Synced {result['accounts']} holder accounts at slot {result['slot']} ({result['removed']} removed)"
+        ))
@@ -0,0 +1,103 @@
+"""
+Archive table for settled GoldTransactions.
+
+On PostgreSQL the table is created range-partitioned by month on created_at,
+with a DEFAULT partition; monthly partitions are added by
+``manage.py archive_transactions``. Partitioned tables need the partition key
+in the primary key, so it is (id, created_at) there. Other databases get a
+plain table.
+"""
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def create_archive_table(apps, schema_editor):
+    model = apps.get_model('gold_exchange', 'ArchivedGoldTransaction')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(model)
+        return
+
+    table = model._meta.db_table
+    quote = schema_editor.quote_name
+    schema_editor.execute(f"""
+        CREATE TABLE {quote(table)} (
+            "id" bigint NOT NULL,
+            "user_wallet" varchar(44) NOT NULL,
+            "transaction_type" varchar(4) NOT NULL,
+            "status" varchar(10) NOT NULL,
+            "status_message" text NOT NULL,
+            "sol_amount" numeric(20, 9) NOT NULL,
+            "token_amount" numeric(20, 2) NOT NULL,
+            "gold_price_usd" numeric(10, 2) NOT NULL,
+            "sol_price_usd" numeric(10, 2) NOT NULL,
+            "fees_collected" numeric(20, 9) NOT NULL,
+            "treasury_fee" numeric(20, 9) NOT NULL,
+            "profit_fee" numeric(20, 9) NOT NULL,
+            "transaction_fee" numeric(20, 9) NOT NULL,
+            "tx_signature" varchar(88) NULL,
+            "created_at" timestamp with time zone NOT NULL,
+            "completed_at" timestamp with time zone NULL,
+            "archived_at" timestamp with time zone NOT NULL,
+            PRIMARY KEY ("id", "created_at")
+        ) PARTITION BY RANGE ("created_at")
+    """)
+    schema_editor.execute(f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT")
+
+    # Same index names Django would have used, so later migrations can alter them
+    signature_index = schema_editor._create_index_name(table, ['tx_signature'])
+    signature_like_index = schema_editor._create_index_name(table, ['tx_signature'], suffix='_like')
+    schema_editor.execute(f'CREATE INDEX {quote(signature_index)} ON {quote(table)} ("tx_signature")')
+    schema_editor.execute(
+        f'CREATE INDEX {quote(signature_like_index)} ON {quote(table)} ("tx_signature" varchar_pattern_ops)'
+    )
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def drop_archive_table(apps, schema_editor):
+    # Dropping a partitioned table drops its partitions
+    schema_editor.delete_model(apps.get_model('gold_exchange', 'ArchivedGoldTransaction'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gold_exchange", "0003_add_new_fee_fields"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ArchivedGoldTransaction',
+                    fields=[
+                        ('id', models.BigIntegerField(help_text='Original GoldTransaction id', primary_key=True, serialize=False)),
+                        ('user_wallet', models.CharField(max_length=44)),
+                        ('transaction_type', models.CharField(choices=[('buy', 'Buy sGOLD'), ('sell', 'Sell sGOLD')], max_length=4)),
+                        ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=10)),
+                        ('status_message', models.TextField(blank=True)),
+                        ('sol_amount', models.DecimalField(decimal_places=9, max_digits=20)),
+                        ('token_amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                        ('gold_price_usd', models.DecimalField(decimal_places=2, max_digits=10)),
+                        ('sol_price_usd', models.DecimalField(decimal_places=2, max_digits=10)),
+                        ('fees_collected', models.DecimalField(decimal_places=9, default=Decimal('0'), max_digits=20)),
+                        ('treasury_fee', models.DecimalField(decimal_places=9, default=Decimal('0'), max_digits=20)),
+                        ('profit_fee', models.DecimalField(decimal_places=9, default=Decimal('0'), max_digits=20)),
+                        ('transaction_fee', models.DecimalField(decimal_places=9, default=Decimal('0'), max_digits=20)),
+                        ('tx_signature', models.CharField(blank=True, db_index=True, max_length=88, null=True)),
+                        ('created_at', models.DateTimeField()),
+                        ('completed_at', models.DateTimeField(blank=True, null=True)),
+                        ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                    ],
+                    options={
+                        'verbose_name': 'Archived Gold Transaction',
+                        'verbose_name_plural': 'Archived Gold Transactions',
+                        'ordering': ['-created_at'],
+                        'indexes': [models.Index(fields=['user_wallet', '-created_at'], name='gold_exchan_user_wa_105f35_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_archive_table, drop_archive_table),
+    ]
@@ -0,0 +1,37 @@
+"""
+Partial and covering indexes for the exchange's hot query shapes.
+
+In-flight trades and open quotes are a small slice of their tables, so they
+get partial indexes instead of whole-table ones. The pending-by-wallet index
+INCLUDEs the columns the settlement matcher reads, allowing index-only scans
+on PostgreSQL (other databases ignore INCLUDE). The new quote index is built
+before the old index on ``used`` is dropped.
+"""
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gold_exchange", "0004_archivedgoldtransaction"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goldtransaction',
+            index=models.Index(condition=models.Q(('status', 'pending'), ('status', 'processing'), _connector='OR'), fields=['created_at'], name='gold_tx_inflight_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goldtransaction',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['user_wallet', 'created_at'], include=('id', 'transaction_type', 'sol_amount', 'token_amount', 'quote_expires_at'), name='gold_tx_pending_wallet_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exchangequote',
+            index=models.Index(condition=models.Q(('used', False)), fields=['expires_at'], name='quote_open_expiry_idx'),
+        ),
+        migrations.AlterField(
+            model_name='exchangequote',
+            name='used',
+            field=models.BooleanField(default=False),
+        ),
+    ]
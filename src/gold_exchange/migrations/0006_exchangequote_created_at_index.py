@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gold_exchange", "0005_partial_and_covering_indexes"),
+    ]
+
+    operations = [
+        # Keyset pagination in the admin walks quotes by created_at
+        migrations.AlterField(
+            model_name='exchangequote',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
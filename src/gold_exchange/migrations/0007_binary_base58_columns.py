@@ -0,0 +1,142 @@
+"""
+Store wallet addresses, token accounts and signatures as raw bytes.
+
+Each column is converted by adding a binary twin, copying rows across in
+batches (base58 has no SQL decoder), dropping the text column and renaming
+the twin into place. Indexes covering the columns are dropped first and
+rebuilt at the end. Reversible: going back copies the values out as base58
+text again.
+
+Rows holding values that are not valid base58 of the right length stop the
+migration with the offending row named, rather than being dropped.
+"""
+from django.db import migrations, models
+
+import gold_exchange.fields
+
+BATCH_SIZE = 2000
+
+CONVERTED = {
+    'goldtransaction': ['user_wallet', 'tx_signature', 'user_token_account'],
+    'exchangequote': ['user_wallet'],
+}
+
+
+def copy_columns(apps, source_suffix, target_suffix):
+    for model_name, fields in CONVERTED.items():
+        model = apps.get_model('gold_exchange', model_name)
+        sources = [f'{field}{source_suffix}' for field in fields]
+        targets = [f'{field}{target_suffix}' for field in fields]
+        rows = model.objects.order_by('pk').only('pk', *sources).iterator(chunk_size=BATCH_SIZE)
+
+        batch = []
+        for row in rows:
+            for source, target in zip(sources, targets):
+                value = getattr(row, source)
+                if target_suffix == '_bin' and value:
+                    try:
+                        model._meta.get_field(target).decode(value)
+                    except Exception:
+                        raise ValueError(f"{model_name} {row.pk}: {source}={value!r} is not valid base58")
+                setattr(row, target, value or None)
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, targets)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, targets)
+
+
+def to_binary(apps, schema_editor):
+    copy_columns(apps, '', '_bin')
+
+
+def to_text(apps, schema_editor):
+    copy_columns(apps, '_bin', '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gold_exchange", "0006_exchangequote_created_at_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(model_name='goldtransaction', name='gold_exchan_user_wa_964e4c_idx'),
+        migrations.RemoveIndex(model_name='goldtransaction', name='gold_tx_pending_wallet_idx'),
+
+        # Nullable before anything else, so reversing can re-add the text
+        # columns to populated tables before the data is copied back
+        migrations.AlterField(
+            model_name='goldtransaction',
+            name='user_wallet',
+            field=models.CharField(db_index=True, help_text="User's Solana wallet address", max_length=44, null=True),
+        ),
+        migrations.AlterField(
+            model_name='exchangequote',
+            name='user_wallet',
+            field=models.CharField(db_index=True, max_length=44, null=True),
+        ),
+
+        migrations.AddField(
+            model_name='goldtransaction',
+            name='user_wallet_bin',
+            field=gold_exchange.fields.Base58Field(null=True),
+        ),
+        migrations.AddField(
+            model_name='goldtransaction',
+            name='tx_signature_bin',
+            field=gold_exchange.fields.Base58Field(null=True, size=64),
+        ),
+        migrations.AddField(
+            model_name='goldtransaction',
+            name='user_token_account_bin',
+            field=gold_exchange.fields.Base58Field(null=True),
+        ),
+        migrations.AddField(
+            model_name='exchangequote',
+            name='user_wallet_bin',
+            field=gold_exchange.fields.Base58Field(null=True),
+        ),
+
+        migrations.RunPython(to_binary, to_text),
+
+        migrations.RemoveField(model_name='goldtransaction', name='user_wallet'),
+        migrations.RemoveField(model_name='goldtransaction', name='tx_signature'),
+        migrations.RemoveField(model_name='goldtransaction', name='user_token_account'),
+        migrations.RemoveField(model_name='exchangequote', name='user_wallet'),
+        migrations.RenameField(model_name='goldtransaction', old_name='user_wallet_bin', new_name='user_wallet'),
+        migrations.RenameField(model_name='goldtransaction', old_name='tx_signature_bin', new_name='tx_signature'),
+        migrations.RenameField(model_name='goldtransaction', old_name='user_token_account_bin', new_name='user_token_account'),
+        migrations.RenameField(model_name='exchangequote', old_name='user_wallet_bin', new_name='user_wallet'),
+
+        migrations.AlterField(
+            model_name='goldtransaction',
+            name='user_wallet',
+            field=gold_exchange.fields.Base58Field(db_index=True, help_text="User's Solana wallet address"),
+        ),
+        migrations.AlterField(
+            model_name='goldtransaction',
+            name='tx_signature',
+            field=gold_exchange.fields.Base58Field(blank=True, db_index=True, help_text='Solana transaction signature', null=True, size=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='goldtransaction',
+            name='user_token_account',
+            field=gold_exchange.fields.Base58Field(blank=True, help_text="User's associated token account for sGOLD", null=True),
+        ),
+        migrations.AlterField(
+            model_name='exchangequote',
+            name='user_wallet',
+            field=gold_exchange.fields.Base58Field(db_index=True),
+        ),
+
+        migrations.AddIndex(
+            model_name='goldtransaction',
+            index=models.Index(fields=['user_wallet', '-created_at'], name='gold_exchan_user_wa_964e4c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goldtransaction',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['user_wallet', 'created_at'], include=('id', 'transaction_type', 'sol_amount', 'token_amount', 'quote_expires_at'), name='gold_tx_pending_wallet_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.3 on 2026-10-18 23:40
+
+import gold_exchange.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gold_exchange", "0007_binary_base58_columns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenHolder",
+            fields=[
+                (
+                    "token_account",
+                    gold_exchange.fields.Base58Field(
+                        help_text="sGOLD token account address",
+                        max_length=44,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "owner",
+                    gold_exchange.fields.Base58Field(
+                        db_index=True,
+                        help_text="Wallet owning the token account",
+                        max_length=44,
+                    ),
+                ),
+                (
+                    "amount",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Balance in base units (2 decimals)",
+                    ),
+                ),
+                (
+                    "slot",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Slot of the full sync that last saw this account",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Token Holder",
+                "verbose_name_plural": "Token Holders",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("amount__gt", 0)),
+                        fields=["-amount"],
+                        name="token_holder_amount_idx",
+                    )
+                ],
+            },
+        ),
+    ]
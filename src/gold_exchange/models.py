@@ -3,6 +3,8 @@ from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
 
+from .fields import Base58Field
+
 
 class SystemWallet(models.Model):
     """
@@ -45,6 +47,38 @@ class SystemWallet(models.Model):
         return f"{self.get_wallet_type_display()} - {self.public_key[:8]}..."
 
 
+# Spelled as OR rather than IN: SQLite only matches a partial index against
+# parameterised IN lists when the index predicate is written the same way
+IN_FLIGHT = models.Q(status='pending') | models.Q(status='processing')
+
+
+class GoldTransactionQuerySet(models.QuerySet):
+    """Query shapes the ledger indexes are tuned for"""
+
+    def in_flight(self):
+        """Pending and processing trades, oldest first (gold_tx_inflight_age_idx)"""
+        return self.filter(IN_FLIGHT).order_by('created_at')
+
+    def pending_for_wallet(self, wallet):
+        """
+        A wallet's pending trades with just the columns needed to match a
+        payment, answered from gold_tx_pending_wallet_idx alone on PostgreSQL.
+        """
+        return (
+            self.filter(status='pending', user_wallet=wallet)
+            .order_by('created_at')
+            .only(*PENDING_MATCH_FIELDS)
+        )
+
+    def for_wallet(self, wallet):
+        """A wallet's history, newest first"""
+        return self.filter(user_wallet=wallet).order_by('-created_at')
+
+
+# Key and INCLUDE columns of gold_tx_pending_wallet_idx
+PENDING_MATCH_FIELDS = ['id', 'user_wallet', 'created_at', 'transaction_type', 'sol_amount', 'token_amount', 'quote_expires_at']
+
+
 class GoldTransaction(models.Model):
     """
     Records all gold token exchange transactions.
@@ -63,8 +97,7 @@ class GoldTransaction(models.Model):
     ]
 
     # User information
-    user_wallet = models.CharField(
-        max_length=44,
+    user_wallet = Base58Field(
         db_index=True,
         help_text="User's Solana wallet address"
     )
@@ -135,16 +168,15 @@ class GoldTransaction(models.Model):
     )
 
     # Blockchain data
-    tx_signature = models.CharField(
-        max_length=88,
+    tx_signature = Base58Field(
+        size=64,
         blank=True,
         null=True,
         unique=True,
         db_index=True,
         help_text="Solana transaction signature"
     )
-    user_token_account = models.CharField(
-        max_length=88,
+    user_token_account = Base58Field(
         blank=True,
         null=True,
         help_text="User's associated token account for sGOLD"
@@ -185,6 +217,8 @@ class GoldTransaction(models.Model):
         help_text="When the transaction was completed"
     )
 
+    objects = GoldTransactionQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Gold Transaction"
         verbose_name_plural = "Gold Transactions"
@@ -192,6 +226,18 @@ class GoldTransaction(models.Model):
         indexes = [
             models.Index(fields=['user_wallet', '-created_at']),
             models.Index(fields=['status', '-created_at']),
+            # Settled rows are the vast majority; in-flight trades get small partial indexes
+            models.Index(
+                fields=['created_at'],
+                condition=IN_FLIGHT,
+                name='gold_tx_inflight_age_idx',
+            ),
+            models.Index(
+                fields=['user_wallet', 'created_at'],
+                include=['id', 'transaction_type', 'sol_amount', 'token_amount', 'quote_expires_at'],
+                condition=models.Q(status='pending'),
+                name='gold_tx_pending_wallet_idx',
+            ),
         ]
 
     def __str__(self):
@@ -223,13 +269,71 @@ class GoldTransaction(models.Model):
         return self.treasury_fee + self.dev_fee + self.profit_fee + self.transaction_fee
 
 
+class ArchivedGoldTransaction(models.Model):
+    """
+    Settled GoldTransactions moved out of the hot table by
+    ``manage.py archive_transactions``.
+
+    Keeps the ledger fields needed for accounting and signature lookups and
+    drops quote bookkeeping. On PostgreSQL the table is range-partitioned by
+    month on ``created_at`` (see migration 0004), so ``tx_signature`` is
+    indexed but not unique.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text="Original GoldTransaction id")
+    user_wallet = models.CharField(max_length=44)
+    transaction_type = models.CharField(max_length=4, choices=GoldTransaction.TRANSACTION_TYPES)
+    status = models.CharField(max_length=10, choices=GoldTransaction.STATUS_CHOICES)
+    status_message = models.TextField(blank=True)
+
+    sol_amount = models.DecimalField(max_digits=20, decimal_places=9)
+    token_amount = models.DecimalField(max_digits=20, decimal_places=2)
+    gold_price_usd = models.DecimalField(max_digits=10, decimal_places=2)
+    sol_price_usd = models.DecimalField(max_digits=10, decimal_places=2)
+
+    fees_collected = models.DecimalField(max_digits=20, decimal_places=9, default=Decimal('0'))
+    treasury_fee = models.DecimalField(max_digits=20, decimal_places=9, default=Decimal('0'))
+    profit_fee = models.DecimalField(max_digits=20, decimal_places=9, default=Decimal('0'))
+    transaction_fee = models.DecimalField(max_digits=20, decimal_places=9, default=Decimal('0'))
+
+    tx_signature = models.CharField(max_length=88, blank=True, null=True, db_index=True)
+
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    # Copied as-is from GoldTransaction when archiving
+    LEDGER_FIELDS = [
+        'id', 'user_wallet', 'transaction_type', 'status', 'status_message',
+        'sol_amount', 'token_amount', 'gold_price_usd', 'sol_price_usd',
+        'fees_collected', 'treasury_fee', 'profit_fee', 'transaction_fee',
+        'tx_signature', 'created_at', 'completed_at',
+    ]
+
+    class Meta:
+        verbose_name = "Archived Gold Transaction"
+        verbose_name_plural = "Archived Gold Transactions"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user_wallet', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_transaction_type_display()} - {self.user_wallet[:8]}... - {self.status} (archived)"
+
+
+class ExchangeQuoteQuerySet(models.QuerySet):
+    def open(self):
+        """Quotes that are neither used nor expired (quote_open_expiry_idx)"""
+        return self.filter(used=False, expires_at__gt=timezone.now())
+
+
 class ExchangeQuote(models.Model):
     """
     Temporary quotes for exchange rates.
     Expires after a short time to prevent price manipulation.
     """
     quote_id = models.CharField(max_length=36, unique=True, primary_key=True)
-    user_wallet = models.CharField(max_length=44, db_index=True)
+    user_wallet = Base58Field(db_index=True)
 
     # Quote details
     action = models.CharField(
@@ -260,14 +364,20 @@ class ExchangeQuote(models.Model):
     )
 
     # Expiration
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     expires_at = models.DateTimeField(db_index=True)
-    used = models.BooleanField(default=False, db_index=True)
+    used = models.BooleanField(default=False)
+
+    objects = ExchangeQuoteQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Exchange Quote"
         verbose_name_plural = "Exchange Quotes"
         ordering = ['-created_at']
+        indexes = [
+            # Replaces a plain index on `used`, which only ever helped used=False lookups
+            models.Index(fields=['expires_at'], condition=models.Q(used=False), name='quote_open_expiry_idx'),
+        ]
 
     def __str__(self):
         return f"Quote {self.quote_id[:8]}... - {self.action}"
@@ -279,3 +389,32 @@ class ExchangeQuote(models.Model):
     @property
     def is_valid(self):
         return not self.used and not self.is_expired
+
+
+class TokenHolder(models.Model):
+    """
+    Off-chain index of sGOLD token accounts and their balances.
+
+    Rebuilt from getProgramAccounts by ``manage.py sync_holders`` and adjusted
+    as exchange trades settle in between (see gold_exchange.holders).
+    """
+    token_account = Base58Field(primary_key=True, help_text="sGOLD token account address")
+    owner = Base58Field(db_index=True, help_text="Wallet owning the token account")
+    amount = models.BigIntegerField(default=0, help_text="Balance in base units (2 decimals)")
+    slot = models.BigIntegerField(default=0, help_text="Slot of the full sync that last saw this account")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Token Holder"
+        verbose_name_plural = "Token Holders"
+        indexes = [
+            # Top-N holders; emptied accounts stay until the next full sync removes them
+            models.Index(fields=['-amount'], condition=models.Q(amount__gt=0), name='token_holder_amount_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner[:8]}... - {self.ui_amount} sGOLD"
+
+    @property
+    def ui_amount(self) -> Decimal:
+        return Decimal(self.amount) / 100
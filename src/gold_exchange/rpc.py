@@ -0,0 +1,329 @@
+"""
+Solana RPC endpoint pool for gold exchange operations.
+
+Routes read calls to the healthiest endpoint (hedging slow reads to a second
+endpoint) and sends writes to a preferred set of endpoints. Exposes the same
+method interface as ``solana.rpc.api.Client`` so it can be used anywhere a
+client is expected.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import httpx
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from solana.exceptions import SolanaRpcException
+from solana.rpc.api import Client
+from solana.rpc.commitment import Confirmed
+from solana.rpc.providers.core import _after_request_unparsed
+from solana.rpc.providers.http import HTTPProvider
+
+from .instrumentation import track
+
+logger = logging.getLogger(__name__)
+
+# Client methods that submit state changes; everything else is a read.
+WRITE_METHODS = {
+    'send_transaction',
+    'send_raw_transaction',
+    'request_airdrop',
+}
+
+# Exceptions that indicate the endpoint itself is unhealthy (as opposed to an
+# RPC-level error such as a failed preflight, which would fail everywhere).
+ENDPOINT_ERRORS = (SolanaRpcException, httpx.HTTPError, OSError)
+
+
+class KeepAliveHTTPProvider(HTTPProvider):
+    """
+    HTTP provider that reuses one connection pool per endpoint.
+    The stock provider opens a new connection (and TLS handshake) per call.
+    """
+
+    def __init__(self, endpoint: str, timeout: float = 10, extra_headers=None):
+        super().__init__(endpoint, extra_headers=extra_headers, timeout=timeout)
+        self.session = httpx.Client(timeout=timeout)
+
+    def make_request_unparsed(self, body) -> str:
+        request_kwargs = self._before_request(body=body)
+        return _after_request_unparsed(self.session.post(**request_kwargs))
+
+    def make_batch_request_unparsed(self, reqs) -> str:
+        request_kwargs = self._before_batch_request(reqs)
+        return _after_request_unparsed(self.session.post(**request_kwargs))
+
+    def post_json(self, payload: dict) -> dict:
+        """Send a raw JSON-RPC payload (for methods solders has no request type for)"""
+        request_kwargs = self._build_common_request_kwargs()
+        response = self.session.post(content=json.dumps(payload), **request_kwargs)
+        response.raise_for_status()
+        return response.json()
+
+
+class EndpointHealth:
+    """
+    Rolling latency and error statistics for a single RPC endpoint.
+    """
+
+    # Consecutive failures before an endpoint is benched
+    FAILURE_THRESHOLD = 3
+    # How long a benched endpoint sits out before being retried (seconds)
+    COOLDOWN = 30
+    # Penalty multiplier applied to latency per unit of error rate
+    ERROR_PENALTY = 4
+
+    def __init__(self, window: int = 100):
+        self.samples = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.benched_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.samples.append((latency, ok))
+            if ok:
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= self.FAILURE_THRESHOLD:
+                    self.benched_until = time.monotonic() + self.COOLDOWN
+
+    def _latencies(self) -> List[float]:
+        with self._lock:
+            return sorted(latency for latency, ok in self.samples if ok)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        latencies = self._latencies()
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(pct / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.samples:
+                return 0.0
+            return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    @property
+    def is_benched(self) -> bool:
+        return time.monotonic() < self.benched_until
+
+    @property
+    def score(self) -> float:
+        """Lower is better. Endpoints without samples score 0 so they get tried."""
+        p50 = self.percentile(50)
+        if p50 is None:
+            return float('inf') if self.samples else 0.0
+        return p50 * (1 + self.ERROR_PENALTY * self.error_rate)
+
+
+class RpcEndpoint:
+    """A single RPC endpoint: its client and health statistics."""
+
+    def __init__(self, url: str, commitment=Confirmed, timeout: float = 10, window: int = 100):
+        self.url = url
+        self.client = Client(url, commitment=commitment, timeout=timeout)
+        self.client._provider = KeepAliveHTTPProvider(url, timeout=timeout)
+        self.health = EndpointHealth(window=window)
+
+    def call(self, method: str, *args, **kwargs):
+        """Invoke a client method, recording latency and outcome"""
+        started = time.perf_counter()
+        try:
+            result = getattr(self.client, method)(*args, **kwargs)
+        except ENDPOINT_ERRORS:
+            self.health.record(time.perf_counter() - started, ok=False)
+            raise
+        self.health.record(time.perf_counter() - started, ok=True)
+        return result
+
+    def post_json(self, payload: dict) -> dict:
+        started = time.perf_counter()
+        try:
+            result = self.client._provider.post_json(payload)
+        except ENDPOINT_ERRORS:
+            self.health.record(time.perf_counter() - started, ok=False)
+            raise
+        self.health.record(time.perf_counter() - started, ok=True)
+        return result
+
+    def snapshot(self) -> Dict:
+        p50 = self.health.percentile(50)
+        p95 = self.health.percentile(95)
+        return {
+            'url': self.url,
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+            'error_rate': round(self.health.error_rate, 3),
+            'samples': len(self.health.samples),
+            'benched': self.health.is_benched,
+        }
+
+
+class RpcRouter:
+    """
+    Drop-in replacement for ``solana.rpc.api.Client`` backed by several endpoints.
+
+    Reads go to the endpoint with the best health score. If it has not answered
+    within its own p95 latency, the same read is hedged to the next-best endpoint
+    and whichever answers first wins. Writes go to the preferred write endpoints
+    in health order, failing over on transport errors only.
+    """
+
+    # Bounds for the hedge delay (seconds)
+    HEDGE_MIN_DELAY = 0.05
+    HEDGE_MAX_DELAY = 2.0
+
+    def __init__(
+        self,
+        read_urls: List[str],
+        write_urls: Optional[List[str]] = None,
+        commitment=Confirmed,
+        timeout: float = 10,
+        hedge: bool = True,
+        window: int = 100,
+        max_workers: int = 8,
+    ):
+        if not read_urls:
+            raise ValueError("At least one Solana RPC endpoint is required")
+
+        self.commitment = commitment
+        self.hedge = hedge
+        endpoints = {}
+        for url in [*read_urls, *(write_urls or [])]:
+            if url not in endpoints:
+                endpoints[url] = RpcEndpoint(url, commitment=commitment, timeout=timeout, window=window)
+        self.endpoints = endpoints
+        self.read_endpoints = [endpoints[url] for url in dict.fromkeys(read_urls)]
+        self.write_endpoints = [endpoints[url] for url in dict.fromkeys(write_urls or read_urls)]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='solana-rpc')
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(Client, name, None)):
+            raise AttributeError(name)
+
+        def routed(*args, **kwargs):
+            with track('rpc', name):
+                if name in WRITE_METHODS:
+                    return self._call_write(name, *args, **kwargs)
+                return self._call_read(name, *args, **kwargs)
+
+        routed.__name__ = name
+        return routed
+
+    def _ranked(self, endpoints: List[RpcEndpoint]) -> List[RpcEndpoint]:
+        """Healthy endpoints by score, benched endpoints last"""
+        return sorted(endpoints, key=lambda e: (e.health.is_benched, e.health.score))
+
+    def _hedge_delay(self, endpoint: RpcEndpoint) -> float:
+        p95 = endpoint.health.percentile(95)
+        if p95 is None:
+            return self.HEDGE_MAX_DELAY
+        return min(self.HEDGE_MAX_DELAY, max(self.HEDGE_MIN_DELAY, p95))
+
+    def _call_read(self, method: str, *args, **kwargs):
+        ranked = self._ranked(self.read_endpoints)
+        if len(ranked) == 1:
+            return ranked[0].call(method, *args, **kwargs)
+
+        primary, rest = ranked[0], ranked[1:]
+        pending = {self._executor.submit(primary.call, method, *args, **kwargs): primary}
+
+        if self.hedge:
+            done, _ = wait(pending, timeout=self._hedge_delay(primary))
+            if not done:
+                backup = rest.pop(0)
+                logger.info(f"Hedging {method} from {primary.url} to {backup.url}")
+                pending[self._executor.submit(backup.call, method, *args, **kwargs)] = backup
+
+        last_error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    return future.result()
+                except ENDPOINT_ERRORS as e:
+                    logger.warning(f"RPC read {method} failed on {endpoint.url}: {e!r}")
+                    last_error = e
+            if not pending and rest:
+                endpoint = rest.pop(0)
+                pending[self._executor.submit(endpoint.call, method, *args, **kwargs)] = endpoint
+
+        raise last_error
+
+    def _call_write(self, method: str, *args, **kwargs):
+        last_error = None
+        for endpoint in self._ranked(self.write_endpoints):
+            try:
+                return endpoint.call(method, *args, **kwargs)
+            except ENDPOINT_ERRORS as e:
+                # Resending the same signed transaction elsewhere is safe: the
+                # signature makes it idempotent on-chain.
+                logger.warning(f"RPC write {method} failed on {endpoint.url}: {e!r}")
+                last_error = e
+        raise last_error
+
+    def request(self, method: str, params: Optional[list] = None) -> dict:
+        """
+        Make a raw JSON-RPC read request, for methods the client has no wrapper for.
+
+        Returns:
+            The ``result`` member of the JSON-RPC response
+        """
+        payload = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params or []}
+        last_error = None
+        with track('rpc', method):
+            for endpoint in self._ranked(self.read_endpoints):
+                try:
+                    response = endpoint.post_json(payload)
+                except ENDPOINT_ERRORS as e:
+                    logger.warning(f"RPC {method} failed on {endpoint.url}: {e!r}")
+                    last_error = e
+                    continue
+                if 'error' in response:
+                    raise ValueError(f"RPC {method} error: {response['error']}")
+                return response.get('result')
+        raise last_error
+
+    def snapshot(self) -> List[Dict]:
+        """Current health statistics for every endpoint"""
+        return [endpoint.snapshot() for endpoint in self.endpoints.values()]
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_rpc_client() -> RpcRouter:
+    """
+    Get the process-wide RPC router, built from settings on first use.
+    Sharing one router per process lets health statistics accumulate across requests.
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                read_urls = settings.SOLANA_RPC_URLS or [settings.SOLANA_RPC_URL]
+                _router = RpcRouter(
+                    read_urls,
+                    write_urls=settings.SOLANA_RPC_WRITE_URLS or read_urls,
+                    timeout=settings.SOLANA_RPC_TIMEOUT,
+                    hedge=settings.SOLANA_RPC_HEDGE,
+                )
+    return _router
+
+
+@receiver(setting_changed)
+def _reset_rpc_client(setting, **kwargs):
+    global _router
+    if setting.startswith('SOLANA_RPC'):
+        _router = None
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from decimal import Decimal
 from .models import GoldTransaction, ExchangeQuote
+from .validators import SolanaAddressField, SolanaSignatureField
 
 
 class QuoteRequestSerializer(serializers.Serializer):
@@ -59,9 +60,7 @@ class QuoteResponseSerializer(serializers.Serializer):
 
 class BuyInitiateSerializer(serializers.Serializer):
     """Initiate a buy transaction"""
-    wallet_address = serializers.CharField(
-        max_length=44,
-        min_length=32,
+    wallet_address = SolanaAddressField(
         required=True,
         help_text="User's Solana wallet address"
     )
@@ -78,7 +77,7 @@ class BuyConfirmSerializer(serializers.Serializer):
         required=True,
         help_text="Exchange transaction ID"
     )
-    tx_signature = serializers.CharField(
+    tx_signature = SolanaSignatureField(
         required=True,
         help_text="Transaction signature from wallet"
     )
@@ -123,7 +122,7 @@ class GoldTransactionSerializer(serializers.ModelSerializer):
 
 class BalanceResponseSerializer(serializers.Serializer):
     """Response serializer for balance queries"""
-    wallet_address = serializers.CharField()
+    wallet_address = SolanaAddressField()
     sgold_balance = serializers.DecimalField(max_digits=20, decimal_places=2)
     estimated_usd_value = serializers.DecimalField(max_digits=20, decimal_places=2)
     sol_balance = serializers.DecimalField(max_digits=20, decimal_places=9)
@@ -140,9 +139,7 @@ class PriceResponseSerializer(serializers.Serializer):
 
 class SellInitiateSerializer(serializers.Serializer):
     """Initiate a sell transaction"""
-    wallet_address = serializers.CharField(
-        max_length=44,
-        min_length=32,
+    wallet_address = SolanaAddressField(
         required=True,
         help_text="User's Solana wallet address"
     )
@@ -159,7 +156,7 @@ class SellConfirmSerializer(serializers.Serializer):
         required=True,
         help_text="Exchange transaction ID"
     )
-    tx_signature = serializers.CharField(
+    tx_signature = SolanaSignatureField(
         required=True,
         help_text="Transaction signature from wallet"
     )
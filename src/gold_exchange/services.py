@@ -8,25 +8,21 @@ from decimal import Decimal
 from typing import Dict, Optional, Tuple
 
 from django.conf import settings
-from solana.rpc.api import Client
-from solana.rpc.commitment import Confirmed
-from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 from solders.transaction import Transaction as SoldersTransaction
 from solders.system_program import transfer, TransferParams
 from solders.message import Message
 from solders.signature import Signature
-from solana.transaction import Transaction as LegacyTransaction
 from spl.token.constants import TOKEN_PROGRAM_ID
 from spl.token.instructions import (
     get_associated_token_address,
-    create_associated_token_account,
-    mint_to,
-    MintToParams,
     burn,
     BurnParams,
 )
 
+from .rpc import get_rpc_client
+from .signer import get_signer
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,29 +32,19 @@ class GoldTokenService:
     """
 
     def __init__(self):
-        self.client = Client(settings.SOLANA_RPC_URL, commitment=Confirmed)
+        self.client = get_rpc_client()
         self.mint_address = Pubkey.from_string(settings.SGOLD_MINT_ADDRESS)
-        self.mint_authority = self._load_mint_authority()
+        # Signs mints and payouts as the mint authority
+        self.signer = get_signer()
 
         # System wallets
         self.treasury_wallet = Pubkey.from_string(settings.TREASURY_WALLET)
         self.dev_fund_wallet = Pubkey.from_string(settings.DEV_FUND_WALLET)
         # Liquidity wallet is the same as mint authority (combined for devnet simplicity)
-        self.liquidity_wallet = self.mint_authority.pubkey()
+        self.liquidity_wallet = self.signer.pubkey
         self.profit_wallet = Pubkey.from_string(settings.PROFIT_WALLET)
         self.transaction_fee_wallet = Pubkey.from_string(settings.TRANSACTION_FEE_WALLET)
 
-    def _load_mint_authority(self) -> Keypair:
-        """Load mint authority keypair from settings"""
-        try:
-            # Decode base58 private key from settings
-            import base58
-            private_key_bytes = base58.b58decode(settings.MINT_AUTHORITY_KEYPAIR)
-            return Keypair.from_bytes(private_key_bytes)
-        except Exception as e:
-            logger.error(f"Failed to load mint authority keypair: {e}")
-            raise
-
     def calculate_token_amount(
         self, sol_amount: Decimal, gold_price_usd: Decimal, sol_price_usd: Decimal
     ) -> Decimal:
@@ -249,62 +235,11 @@ class GoldTokenService:
         Returns:
             Transaction signature
         """
-        # Get or create user's ATA
-        user_ata = self.get_or_create_associated_token_account(user_pubkey)
-
         # Convert token amount to base units (2 decimals)
         token_base_units = int(token_amount * Decimal('100'))
 
-        # Check if ATA exists, create if not
-        ata_exists = False
-        try:
-            account_info = self.client.get_account_info(user_ata)
-            ata_exists = account_info.value is not None
-        except:
-            pass
-
-        instructions = []
-
-        # Add create ATA instruction if needed
-        if not ata_exists:
-            instructions.append(
-                create_associated_token_account(
-                    payer=self.mint_authority.pubkey(),
-                    owner=user_pubkey,
-                    mint=self.mint_address
-                )
-            )
-
-        # Add mint instruction
-        instructions.append(
-            mint_to(
-                MintToParams(
-                    program_id=TOKEN_PROGRAM_ID,
-                    mint=self.mint_address,
-                    dest=user_ata,
-                    mint_authority=self.mint_authority.pubkey(),
-                    amount=token_base_units,
-                    signers=[self.mint_authority.pubkey()]
-                )
-            )
-        )
-
-        # Get recent blockhash
-        recent_blockhash = self.client.get_latest_blockhash().value.blockhash
-
-        # Create legacy transaction for minting (required by send_transaction)
-        transaction = LegacyTransaction(
-            recent_blockhash=recent_blockhash,
-            fee_payer=self.mint_authority.pubkey()
-        )
-
-        # Add all instructions
-        for instruction in instructions:
-            transaction.add(instruction)
-
-        # Send transaction with mint authority as signer
-        result = self.client.send_transaction(transaction, self.mint_authority)
-        tx_signature = str(result.value)
+        # The signer creates the user's ATA in the same transaction if needed
+        tx_signature = self.signer.mint_to(user_pubkey, token_base_units)
 
         logger.info(f"Minted {token_amount} sGOLD to {user_pubkey}: {tx_signature}")
 
@@ -0,0 +1,215 @@
+"""
+Settlement of pending exchange transactions.
+
+Shared by the confirm endpoints, where the client reports the signature it
+submitted, and by the wallet activity ingestor, which matches on-chain
+payments and burns to pending trades without waiting for the client.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.utils import timezone
+from solders.pubkey import Pubkey
+
+from .holders import record_settlement
+from .models import ArchivedGoldTransaction, GoldTransaction, ExchangeQuote
+
+logger = logging.getLogger(__name__)
+
+LAMPORTS_PER_SOL = Decimal('1000000000')
+
+
+class SettlementError(Exception):
+    """A trade that cannot be settled; the message is safe to return to the client"""
+
+
+class AlreadySettled(SettlementError):
+    """The trade was already completed with the same signature"""
+
+    def __init__(self, gold_tx: GoldTransaction):
+        super().__init__(f'Transaction {gold_tx.id} is already completed')
+        self.gold_tx = gold_tx
+
+
+class SettlementInProgress(SettlementError):
+    """Another caller (usually the wallet activity ingestor) is settling the trade"""
+
+    def __init__(self, gold_tx: GoldTransaction):
+        super().__init__(f'Transaction {gold_tx.id} is being settled')
+        self.gold_tx = gold_tx
+
+
+def signature_used(tx_signature: str, exclude_id: int = None) -> bool:
+    """Whether a trade (live or archived) already records ``tx_signature``"""
+    live = GoldTransaction.objects.filter(tx_signature=tx_signature)
+    if exclude_id is not None:
+        live = live.exclude(id=exclude_id)
+    return live.exists() or ArchivedGoldTransaction.objects.filter(tx_signature=tx_signature).exists()
+
+
+def claim_pending(exchange_id: int, tx_signature: str = None) -> GoldTransaction:
+    """
+    Move a pending trade to processing so exactly one caller settles it.
+
+    The signature is recorded on the row in the same transaction, so a
+    payment or burn can never be claimed for two trades: the second claim
+    fails here, before anything is minted or paid out.
+
+    Args:
+        exchange_id: GoldTransaction id
+        tx_signature: Signature the caller wants to settle with
+
+    Returns:
+        The claimed GoldTransaction
+
+    Raises:
+        GoldTransaction.DoesNotExist: Unknown exchange_id
+        AlreadySettled: Completed earlier with ``tx_signature``
+        SettlementInProgress: Already claimed and being settled
+        SettlementError: Not pending, the quote expired, or ``tx_signature``
+            already settles another trade
+    """
+    with db_transaction.atomic():
+        gold_tx = GoldTransaction.objects.select_for_update().get(id=exchange_id)
+
+        if gold_tx.status == 'completed' and tx_signature and gold_tx.tx_signature == tx_signature:
+            raise AlreadySettled(gold_tx)
+        if gold_tx.status == 'processing':
+            raise SettlementInProgress(gold_tx)
+        if gold_tx.status != 'pending':
+            raise SettlementError(f'Transaction is not pending (current status: {gold_tx.status})')
+
+        expired = gold_tx.is_expired
+        if expired:
+            gold_tx.mark_failed('Quote expired')
+        else:
+            if tx_signature:
+                if signature_used(tx_signature, exclude_id=gold_tx.id):
+                    raise SettlementError('Transaction signature already settles another trade')
+                gold_tx.tx_signature = tx_signature
+            gold_tx.status = 'processing'
+            try:
+                # A savepoint, so a concurrent claim of the signature surfaces as an error here
+                with db_transaction.atomic():
+                    gold_tx.save(update_fields=['status', 'tx_signature', 'updated_at'])
+            except IntegrityError:
+                raise SettlementError('Transaction signature already settles another trade')
+
+    # Raised outside the atomic block so the failed status is committed
+    if expired:
+        raise SettlementError('Quote has expired')
+    return gold_tx
+
+
+def _complete(gold_tx: GoldTransaction, tx_signature: str, user_ata, status_message: str):
+    gold_tx.tx_signature = tx_signature
+    gold_tx.user_token_account = str(user_ata)
+    gold_tx.status = 'completed'
+    gold_tx.completed_at = timezone.now()
+    gold_tx.status_message = status_message
+    try:
+        gold_tx.save()
+    except Exception as save_error:
+        logger.error(f"Failed to save transaction {gold_tx.id}: {save_error}")
+        raise
+
+    if gold_tx.quote_id:
+        ExchangeQuote.objects.filter(quote_id=gold_tx.quote_id).update(used=True)
+
+    record_settlement(gold_tx)
+
+
+def settle_buy(gold_tx: GoldTransaction, tx_signature: str, service, verify: bool = True) -> dict:
+    """
+    Mint sGOLD for a claimed buy whose SOL payment landed in ``tx_signature``.
+
+    Args:
+        gold_tx: Buy claimed with claim_pending
+        tx_signature: The user's payment transaction
+        service: GoldTokenService
+        verify: Fetch and check the payment first (the ingestor has already decoded it)
+
+    Returns:
+        Response payload for the confirm endpoint
+    """
+    if verify and not service.verify_sol_payment(tx_signature, gold_tx.sol_amount):
+        gold_tx.mark_failed('Failed to verify SOL payment on-chain')
+        raise SettlementError('Failed to verify payment')
+
+    user_pubkey = Pubkey.from_string(gold_tx.user_wallet)
+    mint_tx_signature = service.mint_tokens_to_user(user_pubkey, gold_tx.token_amount)
+    user_ata = service.get_or_create_associated_token_account(user_pubkey)
+    logger.info(f"Settled buy {gold_tx.id}: payment {tx_signature}, mint {mint_tx_signature}")
+
+    _complete(gold_tx, tx_signature, user_ata, f'Minted {gold_tx.token_amount} sGOLD tokens')
+    return {
+        **buy_payload(gold_tx),
+        'mint_tx_signature': mint_tx_signature,
+        'message': f'Successfully purchased {gold_tx.token_amount} sGOLD tokens',
+    }
+
+
+def settle_sell(gold_tx: GoldTransaction, tx_signature: str, service, verify: bool = True) -> dict:
+    """
+    Pay out SOL for a claimed sell whose burn landed in ``tx_signature``.
+
+    Args:
+        gold_tx: Sell claimed with claim_pending
+        tx_signature: The user's burn transaction
+        service: GoldTokenService
+        verify: Fetch and check the burn first (the ingestor has already decoded it)
+
+    Returns:
+        Response payload for the confirm endpoint
+    """
+    if verify and not service.verify_burn_transaction(tx_signature, gold_tx.token_amount):
+        gold_tx.mark_failed('Failed to verify token burn on-chain')
+        raise SettlementError('Failed to verify token burn')
+
+    user_pubkey = Pubkey.from_string(gold_tx.user_wallet)
+    logger.info(f"Sending {gold_tx.sol_amount} SOL to user {user_pubkey}")
+    sol_transfer_signature = service.signer.transfer(user_pubkey, int(gold_tx.sol_amount * LAMPORTS_PER_SOL))
+    logger.info(f"SOL transfer completed: {sol_transfer_signature}")
+    user_ata = service.get_or_create_associated_token_account(user_pubkey)
+
+    _complete(
+        gold_tx, tx_signature, user_ata,
+        f'Sold {gold_tx.token_amount} SOLGOLD for {gold_tx.sol_amount} SOL (payout: {sol_transfer_signature})',
+    )
+    return {
+        **sell_payload(gold_tx),
+        'message': f'Successfully sold {gold_tx.token_amount} SOLGOLD for {gold_tx.sol_amount} SOL',
+    }
+
+
+def processing_payload(gold_tx: GoldTransaction) -> dict:
+    """Confirm response for a trade still being settled; the client polls by confirming again"""
+    return {
+        'status': gold_tx.status,
+        'exchange_id': gold_tx.id,
+        'message': 'Settlement in progress',
+    }
+
+
+def buy_payload(gold_tx: GoldTransaction) -> dict:
+    """Confirm response for a completed buy"""
+    return {
+        'status': 'completed',
+        'tx_signature': gold_tx.tx_signature,
+        'sgold_minted': float(gold_tx.token_amount),
+        'user_ata': gold_tx.user_token_account,
+        'message': gold_tx.status_message,
+    }
+
+
+def sell_payload(gold_tx: GoldTransaction) -> dict:
+    """Confirm response for a completed sell"""
+    return {
+        'status': 'completed',
+        'tx_signature': gold_tx.tx_signature,
+        'sgold_burned': float(gold_tx.token_amount),
+        'sol_received': float(gold_tx.sol_amount),
+        'user_ata': gold_tx.user_token_account,
+        'message': gold_tx.status_message,
+    }
@@ -0,0 +1,523 @@
+"""
+Signing service for the mint authority.
+
+The mint authority key signs every mint and every SOL payout from the
+liquidity wallet. ``Signer`` owns the key: it builds, signs and submits those
+transactions and keeps throughput statistics.
+
+In production a single ``manage.py run_signer`` process owns the key and
+serves jobs to the web workers over a local socket (``SOLANA_SIGNER_ADDRESS``),
+so submissions are sequenced in one place instead of racing across gunicorn
+workers. That process pipelines submissions over a pool of durable nonce
+accounts (``SOLANA_NONCE_ACCOUNTS``): each transaction uses a nonce instead of
+a recent blockhash, so it cannot expire while queued, and one account per
+in-flight transaction lets several submissions overlap.
+
+Without ``SOLANA_SIGNER_ADDRESS`` each process signs in-process with a cached
+recent blockhash.
+"""
+import hashlib
+import logging
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client as ConnectionClient, Listener
+from typing import Dict, List, Optional, Sequence
+
+import base58
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from solana.rpc.core import RPCException
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.system_program import TransferParams, transfer
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import MintToParams, create_associated_token_account, get_associated_token_address, mint_to
+
+from .rpc import get_rpc_client
+from .submission import TransactionSubmitter
+
+logger = logging.getLogger(__name__)
+
+NONCE_ACCOUNT_SIZE = 80
+
+
+class SignerError(Exception):
+    """A signing job failed (in-process or in the signer service)"""
+
+
+@lru_cache(maxsize=8)
+def load_keypair(encoded: str) -> Keypair:
+    """Decode a base58-encoded 64-byte keypair"""
+    return Keypair.from_bytes(base58.b58decode(encoded))
+
+
+def parse_nonce_account(data: bytes):
+    """
+    Parse a system-program nonce account.
+
+    Returns:
+        Tuple of (authority Pubkey, durable nonce Hash)
+    """
+    if len(data) < NONCE_ACCOUNT_SIZE:
+        raise ValueError(f"Not a nonce account ({len(data)} bytes)")
+    _version, state = struct.unpack_from('<II', data)
+    if state != 1:
+        raise ValueError("Nonce account is not initialized")
+    return Pubkey.from_bytes(data[8:40]), Hash.from_bytes(data[40:72])
+
+
+class BlockhashCache:
+    """Shares one recent blockhash across submissions for ``max_age`` seconds"""
+
+    def __init__(self, client, max_age: float = 10.0):
+        self.client = client
+        self.max_age = max_age
+        self._value = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns:
+            Tuple of (blockhash Hash, last valid block height)
+        """
+        with self._lock:
+            if self._value is None or time.monotonic() - self._fetched_at > self.max_age:
+                latest = self.client.get_latest_blockhash().value
+                self._value = (latest.blockhash, latest.last_valid_block_height)
+                self._fetched_at = time.monotonic()
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+
+class NoncePool:
+    """
+    Durable nonce accounts available for submissions.
+
+    A nonce account is checked out for one transaction at a time. After a
+    submission it stays out until the sequencer thread sees its nonce advance
+    on-chain (the transaction landed) or ``settle_timeout`` passes (it was
+    dropped, so the old nonce is still valid and can be reused).
+    """
+
+    POLL_INTERVAL = 0.2
+    # A nonce can only advance once per slot; wait this long after it does
+    SLOT_TIME = 0.4
+
+    def __init__(self, client, authority: Pubkey, addresses: Sequence[str], settle_timeout: float = 60.0):
+        self.client = client
+        self.authority = authority
+        self.settle_timeout = settle_timeout
+        self.size = len(addresses)
+        self._free = deque(Pubkey.from_string(address) for address in addresses)
+        self._nonces: Dict[Pubkey, Hash] = {}
+        self._available = threading.Condition()
+        self._sequencer = ThreadPoolExecutor(max_workers=max(1, len(self._free)), thread_name_prefix='nonce-sequencer')
+
+    def _fetch(self, account: Pubkey) -> Hash:
+        info = self.client.get_account_info(account).value
+        if info is None:
+            raise SignerError(f"Nonce account {account} not found")
+        authority, nonce = parse_nonce_account(bytes(info.data))
+        if authority != self.authority:
+            raise SignerError(f"Nonce account {account} is not controlled by {self.authority}")
+        return nonce
+
+    def acquire(self, timeout: float = 30.0):
+        """
+        Check out a nonce account.
+
+        Returns:
+            Tuple of (nonce account Pubkey, current nonce Hash)
+        """
+        with self._available:
+            if not self._available.wait_for(lambda: self._free, timeout=timeout):
+                raise SignerError("No durable nonce account became available")
+            account = self._free.popleft()
+        try:
+            nonce = self._nonces.get(account) or self._fetch(account)
+        except Exception:
+            self._release(account)
+            raise
+        return account, nonce
+
+    def release(self, account: Pubkey, nonce: Hash, submitted: bool, signature: Optional[str] = None):
+        """Return an account; if a transaction was submitted, wait for its nonce to advance first"""
+        if not submitted:
+            self._nonces[account] = nonce
+            self._release(account)
+            return
+        self._nonces.pop(account, None)
+        self._sequencer.submit(self._settle, account, nonce, signature)
+
+    def _settle(self, account: Pubkey, used: Hash, signature: Optional[str]):
+        deadline = time.monotonic() + self.settle_timeout
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    current = self._fetch(account)
+                except Exception as e:
+                    logger.warning(f"Failed to read nonce account {account}: {e!r}")
+                    current = used
+                if current != used:
+                    self._nonces[account] = current
+                    time.sleep(self.SLOT_TIME)
+                    return
+                time.sleep(self.POLL_INTERVAL)
+            logger.warning(f"Transaction {signature} did not land within {self.settle_timeout}s; reusing nonce {account}")
+            self._nonces[account] = used
+        finally:
+            self._release(account)
+
+    def _release(self, account: Pubkey):
+        with self._available:
+            self._free.append(account)
+            self._available.notify()
+
+
+class SignerStats:
+    """Job counts and a rolling window of job latencies"""
+
+    def __init__(self, window: int = 1000):
+        self.started_at = time.monotonic()
+        self.submitted = 0
+        self.failed = 0
+        self.recent = deque(maxlen=window)  # (finished_at, duration)
+        self._lock = threading.Lock()
+
+    def record(self, duration: float, ok: bool):
+        with self._lock:
+            if ok:
+                self.submitted += 1
+                self.recent.append((time.monotonic(), duration))
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            last_minute = [duration for finished, duration in self.recent if now - finished <= 60]
+            return {
+                'submitted': self.submitted,
+                'failed': self.failed,
+                'uptime_s': round(now - self.started_at, 1),
+                'jobs_per_s_1m': round(len(last_minute) / min(60.0, max(now - self.started_at, 1.0)), 2),
+                'avg_job_ms_1m': round(sum(last_minute) / len(last_minute) * 1000, 1) if last_minute else None,
+            }
+
+
+class Signer:
+    """
+    Builds, signs and submits mint-authority transactions.
+
+    Args:
+        keypair: The mint authority (also the liquidity wallet)
+        client: RPC client or RpcRouter
+        mint: sGOLD mint address
+        nonce_accounts: Durable nonce accounts controlled by ``keypair``; when
+            empty, transactions use a cached recent blockhash
+    """
+
+    def __init__(self, keypair: Keypair, client, mint: Pubkey, nonce_accounts: Sequence[str] = ()):
+        self.keypair = keypair
+        self.client = client
+        self.mint = mint
+        self.blockhashes = BlockhashCache(client)
+        self.submitter = TransactionSubmitter(client)
+        self.nonces = NoncePool(client, keypair.pubkey(), nonce_accounts) if nonce_accounts else None
+        self.stats = SignerStats()
+
+    @property
+    def pubkey(self) -> Pubkey:
+        return self.keypair.pubkey()
+
+    def mint_to(self, owner: Pubkey, amount: int) -> str:
+        """
+        Mint ``amount`` base units of sGOLD to ``owner``, creating their
+        associated token account first if needed.
+
+        Returns:
+            Transaction signature
+        """
+        ata = get_associated_token_address(owner, self.mint)
+        instructions = []
+        if self.client.get_account_info(ata).value is None:
+            instructions.append(create_associated_token_account(payer=self.pubkey, owner=owner, mint=self.mint))
+        instructions.append(mint_to(MintToParams(
+            program_id=TOKEN_PROGRAM_ID,
+            mint=self.mint,
+            dest=ata,
+            mint_authority=self.pubkey,
+            amount=amount,
+            signers=[self.pubkey],
+        )))
+        return self.submit(instructions)
+
+    def transfer(self, destination: Pubkey, lamports: int) -> str:
+        """
+        Send SOL from the liquidity wallet.
+
+        Returns:
+            Transaction signature
+        """
+        return self.submit([transfer(TransferParams(from_pubkey=self.pubkey, to_pubkey=destination, lamports=lamports))])
+
+    def submit(self, instructions: List) -> str:
+        started = time.perf_counter()
+        try:
+            if self.nonces is not None:
+                signature = self._submit_with_nonce(instructions)
+            else:
+                signature = self._submit_with_blockhash(instructions)
+        except Exception:
+            self.stats.record(time.perf_counter() - started, ok=False)
+            raise
+        self.stats.record(time.perf_counter() - started, ok=True)
+        return signature
+
+    def _send_with_blockhash(self, instructions: List) -> str:
+        blockhash, last_valid_block_height = self.blockhashes.get()
+        tx = self.submitter.build(instructions, [self.keypair], blockhash)
+        return self.submitter.send(tx, last_valid_block_height)
+
+    def _submit_with_blockhash(self, instructions: List) -> str:
+        try:
+            return self._send_with_blockhash(instructions)
+        except RPCException as e:
+            # Only an expired blockhash is safe to retry: the transaction was
+            # rejected, so re-signing with a fresh one cannot double-submit.
+            if 'Blockhash not found' not in str(e):
+                raise
+            self.blockhashes.invalidate()
+            return self._send_with_blockhash(instructions)
+
+    def _submit_with_nonce(self, instructions: List) -> str:
+        account, nonce = self.nonces.acquire()
+        try:
+            tx = self.submitter.build(instructions, [self.keypair], nonce, nonce_account=account)
+            signature = self.submitter.send(tx)
+        except RPCException:
+            # Rejected by the node: the nonce was not consumed
+            self.nonces.release(account, nonce, submitted=False)
+            raise
+        except Exception:
+            # Transport failure: the transaction may still land, so wait for
+            # the nonce to settle before reusing it
+            self.nonces.release(account, nonce, submitted=True)
+            raise
+        self.nonces.release(account, nonce, submitted=True, signature=signature)
+        return signature
+
+    def describe(self) -> Dict:
+        return {
+            'pubkey': str(self.pubkey),
+            'nonce_accounts': self.nonces.size if self.nonces else 0,
+            'rebroadcasting': self.submitter.rebroadcaster.pending(),
+            **self.stats.snapshot(),
+        }
+
+
+def build_signer(nonce_accounts: Sequence[str] = ()) -> Signer:
+    """Build a signer for the configured mint authority"""
+    return Signer(
+        load_keypair(settings.MINT_AUTHORITY_KEYPAIR),
+        get_rpc_client(),
+        Pubkey.from_string(settings.SGOLD_MINT_ADDRESS),
+        nonce_accounts=nonce_accounts,
+    )
+
+
+# ----------------------------------------------------------------------
+# Signer service
+# ----------------------------------------------------------------------
+
+def _listener_address(address: str):
+    """'host:port' for TCP, anything else is a Unix socket path"""
+    if not isinstance(address, str):
+        return address
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def signer_authkey() -> bytes:
+    key = settings.SOLANA_SIGNER_AUTHKEY or hashlib.sha256(f"signer:{settings.SECRET_KEY}".encode()).hexdigest()
+    return key.encode()
+
+
+class SignerServer:
+    """
+    Serves signing jobs from a single ``Signer`` over a
+    ``multiprocessing.connection`` socket. Each client connection gets its own
+    thread; jobs run concurrently, bounded by the nonce pool.
+    """
+
+    OPERATIONS = {'pubkey', 'mint_to', 'transfer', 'describe'}
+
+    def __init__(self, signer: Signer, address: str, authkey: bytes):
+        self.signer = signer
+        self.listener = Listener(_listener_address(address), authkey=authkey)
+        self._closed = threading.Event()
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def serve_forever(self):
+        while not self._closed.is_set():
+            try:
+                conn = self.listener.accept()
+            except AuthenticationError:
+                logger.warning("Rejected signer connection with the wrong authkey")
+                continue
+            except OSError:
+                if self._closed.is_set():
+                    return
+                raise
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def close(self):
+        self._closed.set()
+        self.listener.close()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    operation, params = conn.recv()
+                except (EOFError, OSError):
+                    return
+                conn.send(self._dispatch(operation, params))
+
+    def _dispatch(self, operation: str, params: dict):
+        if operation not in self.OPERATIONS:
+            return 'error', f"Unknown operation {operation!r}"
+        try:
+            if operation == 'pubkey':
+                return 'ok', str(self.signer.pubkey)
+            if operation == 'describe':
+                return 'ok', self.signer.describe()
+            if operation == 'mint_to':
+                return 'ok', self.signer.mint_to(Pubkey.from_string(params['owner']), int(params['amount']))
+            return 'ok', self.signer.transfer(Pubkey.from_string(params['destination']), int(params['lamports']))
+        except Exception as e:
+            logger.error(f"Signer job {operation} failed: {e!r}")
+            return 'error', str(e)
+
+
+class RemoteSigner:
+    """Client for ``SignerServer`` with the same interface as ``Signer``"""
+
+    # Operations that are safe to resend when their reply is lost
+    READ_ONLY_OPERATIONS = {'pubkey', 'describe'}
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = _listener_address(address)
+        self.authkey = authkey
+        self._local = threading.local()
+        self._pubkey = None
+
+    def _connection(self):
+        """This thread's connection, reopened when the signer has closed it"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and conn.poll(0):
+            # Nothing is in flight, so a readable connection has been closed by the signer
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = self._local.conn = ConnectionClient(self.address, authkey=self.authkey)
+        return conn
+
+    def _call(self, operation: str, **params):
+        """
+        Run ``operation`` on the signer service.
+
+        A request that could not be sent is retried once on a fresh
+        connection. Once it has been sent, only read-only operations are
+        retried: the signer may already have submitted a mint or transfer
+        whose reply was lost, and running it again would pay twice.
+
+        Raises:
+            SignerError: The job failed, the service is unreachable, or the
+                reply to a mint or transfer was lost (the caller must check
+                the chain before retrying)
+        """
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((operation, params))
+            except AuthenticationError:
+                raise SignerError(f"Signer service at {self.address} rejected the authkey")
+            except (EOFError, OSError) as e:
+                self._local.conn = None
+                if attempt:
+                    raise SignerError(f"Signer service unavailable at {self.address}: {e!r}")
+                continue
+            try:
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                self._local.conn = None
+                if operation not in self.READ_ONLY_OPERATIONS:
+                    raise SignerError(
+                        f"Lost the signer's reply to {operation} at {self.address}; it may have run: {e!r}"
+                    )
+                if attempt:
+                    raise SignerError(f"Signer service unavailable at {self.address}: {e!r}")
+        if status != 'ok':
+            raise SignerError(result)
+        return result
+
+    @property
+    def pubkey(self) -> Pubkey:
+        if self._pubkey is None:
+            self._pubkey = Pubkey.from_string(self._call('pubkey'))
+        return self._pubkey
+
+    def mint_to(self, owner: Pubkey, amount: int) -> str:
+        return self._call('mint_to', owner=str(owner), amount=amount)
+
+    def transfer(self, destination: Pubkey, lamports: int) -> str:
+        return self._call('transfer', destination=str(destination), lamports=lamports)
+
+    def describe(self) -> Dict:
+        return self._call('describe')
+
+
+_signer = None
+_signer_lock = threading.Lock()
+
+
+def get_signer():
+    """
+    Get the process-wide signer: a client for the signer service when
+    SOLANA_SIGNER_ADDRESS is set, otherwise an in-process ``Signer``.
+    """
+    global _signer
+    if _signer is None:
+        with _signer_lock:
+            if _signer is None:
+                if settings.SOLANA_SIGNER_ADDRESS:
+                    _signer = RemoteSigner(settings.SOLANA_SIGNER_ADDRESS, signer_authkey())
+                else:
+                    # Durable nonces are only safe with a single owner of the pool
+                    _signer = build_signer()
+    return _signer
+
+
+@receiver(setting_changed)
+def _reset_signer(setting, **kwargs):
+    global _signer
+    if setting.startswith(('SOLANA_', 'MINT_AUTHORITY', 'SGOLD_MINT')):
+        _signer = None
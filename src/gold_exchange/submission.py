@@ -0,0 +1,296 @@
+"""
+Priority-fee aware submission for backend-signed transactions.
+
+Attaches ``SetComputeUnitLimit``/``SetComputeUnitPrice`` instructions sized
+from a simulated compute budget and a rolling estimate of recent
+prioritization fees, then rebroadcasts each transaction in the background
+until it is confirmed or its blockhash expires.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from solana.rpc.types import TxOpts
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.system_program import ID as SYSTEM_PROGRAM_ID
+from solders.transaction import Transaction, VersionedTransaction
+from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID, TOKEN_PROGRAM_ID
+
+from .rpc import get_rpc_client
+
+logger = logging.getLogger(__name__)
+
+# Upper bound per transaction; used as the limit while simulating
+MAX_COMPUTE_UNITS = 1_400_000
+
+
+def _percentile(values: List[int], pct: float) -> int:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class PriorityFeeEstimator:
+    """
+    Rolling compute-unit price estimate (micro-lamports per CU) from
+    ``getRecentPrioritizationFees`` for the accounts a transaction writes.
+    """
+
+    def __init__(self, client, percentile: float = 75, min_fee: int = 0, max_fee: int = 1_000_000, max_age: float = 10.0):
+        self.client = client
+        self.percentile = percentile
+        self.min_fee = min_fee
+        self.max_fee = max_fee
+        self.max_age = max_age
+        self._cache: Dict[Tuple[str, ...], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, writable: Sequence[Pubkey]) -> int:
+        key = tuple(sorted(str(account) for account in writable))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached[0] < self.max_age:
+                return cached[1]
+
+        try:
+            samples = self.client.request('getRecentPrioritizationFees', [list(key)]) or []
+            fees = [sample['prioritizationFee'] for sample in samples]
+        except Exception as e:
+            logger.warning(f"Failed to sample prioritization fees: {e!r}")
+            fees = []
+
+        fee = _percentile(fees, self.percentile) if fees else self.min_fee
+        fee = min(self.max_fee, max(self.min_fee, fee))
+        with self._lock:
+            self._cache[key] = (time.monotonic(), fee)
+        return fee
+
+
+class ComputeUnitEstimator:
+    """
+    Compute-unit limits from simulation, cached per transaction shape (the
+    program and instruction discriminator of each instruction), with a margin.
+    Shapes are kept for ``max_age`` seconds, at most ``max_entries`` of them.
+    """
+
+    # Discriminator length per program; the rest of the data is arguments
+    # (e.g. the u64 amount of a MintTo), which must not split the cache
+    DISCRIMINATOR_LENGTHS = {
+        str(TOKEN_PROGRAM_ID): 1,
+        str(TOKEN_2022_PROGRAM_ID): 1,
+        str(ASSOCIATED_TOKEN_PROGRAM_ID): 1,
+        str(SYSTEM_PROGRAM_ID): 4,
+    }
+    # Anchor programs use 8 bytes
+    DEFAULT_DISCRIMINATOR_LENGTH = 8
+
+    def __init__(self, client, margin: float = 1.2, max_age: float = 3600.0, max_entries: int = 256):
+        self.client = client
+        self.margin = margin
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._cache: 'OrderedDict[tuple, Tuple[float, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shape(cls, instructions: Sequence[Instruction]) -> tuple:
+        shape = []
+        for ix in instructions:
+            program = str(ix.program_id)
+            length = cls.DISCRIMINATOR_LENGTHS.get(program, cls.DEFAULT_DISCRIMINATOR_LENGTH)
+            shape.append((program, bytes(ix.data)[:length]))
+        return tuple(shape)
+
+    def estimate(self, probe: Transaction, instructions: Sequence[Instruction]) -> Optional[int]:
+        """
+        Args:
+            probe: The transaction built with the maximum compute limit
+            instructions: Its instructions (excluding compute budget ones)
+
+        Returns:
+            Compute unit limit, or None if simulation failed
+        """
+        key = self.shape(instructions)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached[0] < self.max_age:
+                self._cache.move_to_end(key)
+                return min(MAX_COMPUTE_UNITS, math.ceil(cached[1] * self.margin))
+
+        try:
+            result = self.client.simulate_transaction(VersionedTransaction.from_legacy(probe)).value
+        except Exception as e:
+            logger.warning(f"Compute unit simulation failed: {e!r}")
+            return None
+        if result.err is not None or not result.units_consumed:
+            logger.warning(f"Compute unit simulation returned {result.err}")
+            return None
+        with self._lock:
+            self._cache[key] = (time.monotonic(), result.units_consumed)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return min(MAX_COMPUTE_UNITS, math.ceil(result.units_consumed * self.margin))
+
+
+class Rebroadcaster:
+    """
+    Resends submitted transactions until they are confirmed or their
+    blockhash expires. Watches run on one background thread.
+    """
+
+    def __init__(self, client, interval: float = 2.0, max_age: float = 90.0):
+        self.client = client
+        self.interval = interval
+        self.max_age = max_age
+        self._watched: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, signature: str, raw: bytes, last_valid_block_height: Optional[int] = None):
+        with self._lock:
+            self._watched[signature] = {
+                'raw': raw,
+                'last_valid_block_height': last_valid_block_height,
+                'expires_at': time.monotonic() + self.max_age,
+                'sends': 1,
+            }
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='rebroadcaster', daemon=True)
+                self._thread.start()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._watched)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                # Give up on expired entries before any RPC call, so an
+                # unreachable node cannot keep the thread alive forever
+                now = time.monotonic()
+                for signature, entry in list(self._watched.items()):
+                    if now > entry['expires_at']:
+                        logger.warning(f"Gave up rebroadcasting {signature} after {entry['sends']} sends")
+                        del self._watched[signature]
+                if not self._watched:
+                    self._thread = None
+                    return
+                watched = dict(self._watched)
+            try:
+                self._tick(watched)
+            except Exception as e:
+                logger.warning(f"Rebroadcast pass failed: {e!r}")
+
+    def _tick(self, watched: Dict[str, dict]):
+        signatures = list(watched)
+        statuses = self.client.get_signature_statuses([Signature.from_string(s) for s in signatures]).value
+        block_height = None
+        if any(entry['last_valid_block_height'] for entry in watched.values()):
+            block_height = self.client.get_block_height().value
+
+        done = []
+        for signature, status in zip(signatures, statuses):
+            entry = watched[signature]
+            if status is not None:
+                if status.err is not None:
+                    logger.error(f"Transaction {signature} failed on-chain: {status.err}")
+                done.append(signature)
+            elif entry['last_valid_block_height'] and block_height > entry['last_valid_block_height']:
+                logger.warning(f"Transaction {signature} expired after {entry['sends']} sends")
+                done.append(signature)
+            else:
+                try:
+                    self.client.send_raw_transaction(entry['raw'], opts=TxOpts(skip_preflight=True))
+                    entry['sends'] += 1
+                except Exception as e:
+                    logger.warning(f"Rebroadcast of {signature} failed: {e!r}")
+
+        with self._lock:
+            for signature in done:
+                self._watched.pop(signature, None)
+
+
+class TransactionSubmitter:
+    """
+    Builds, signs and submits transactions with a compute budget and priority
+    fee, then hands them to the rebroadcaster.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.fees = PriorityFeeEstimator(
+            client,
+            percentile=settings.SOLANA_PRIORITY_FEE_PERCENTILE,
+            min_fee=settings.SOLANA_PRIORITY_FEE_MIN,
+            max_fee=settings.SOLANA_PRIORITY_FEE_MAX,
+        )
+        self.compute = ComputeUnitEstimator(client, margin=settings.SOLANA_COMPUTE_UNIT_MARGIN)
+        self.rebroadcaster = Rebroadcaster(client, interval=settings.SOLANA_REBROADCAST_INTERVAL)
+
+    def build(self, instructions: List[Instruction], signers: List[Keypair], blockhash: Hash, nonce_account: Optional[Pubkey] = None) -> Transaction:
+        """
+        Sign ``instructions`` with compute budget instructions prepended.
+        With ``nonce_account`` the transaction uses ``blockhash`` as a durable nonce.
+        """
+        payer = signers[0].pubkey()
+        writable = {
+            meta.pubkey for ix in instructions for meta in ix.accounts if meta.is_writable
+        }
+        price = self.fees.estimate(sorted(writable, key=str))
+
+        def sign(limit: int) -> Transaction:
+            budget = [set_compute_unit_limit(limit), set_compute_unit_price(price)]
+            if nonce_account is not None:
+                message = Message.new_with_nonce([*budget, *instructions], payer, nonce_account, payer)
+            else:
+                message = Message.new_with_blockhash([*budget, *instructions], payer, blockhash)
+            return Transaction(signers, message, blockhash)
+
+        limit = self.compute.estimate(sign(MAX_COMPUTE_UNITS), instructions)
+        return sign(limit or MAX_COMPUTE_UNITS)
+
+    def send(self, tx: Transaction, last_valid_block_height: Optional[int] = None) -> str:
+        """Submit a signed transaction and rebroadcast it until it lands or expires"""
+        raw = bytes(tx)
+        signature = str(self.client.send_raw_transaction(raw).value)
+        self.rebroadcaster.watch(signature, raw, last_valid_block_height)
+        return signature
+
+
+_submitter = None
+_submitter_lock = threading.Lock()
+
+
+def get_submitter() -> TransactionSubmitter:
+    """
+    Get the process-wide submitter for the shared RPC client.
+    Sharing it keeps one rebroadcast thread and warm fee and compute caches.
+    """
+    global _submitter
+    if _submitter is None:
+        with _submitter_lock:
+            if _submitter is None:
+                _submitter = TransactionSubmitter(get_rpc_client())
+    return _submitter
+
+
+@receiver(setting_changed)
+def _reset_submitter(setting, **kwargs):
+    global _submitter
+    if setting.startswith('SOLANA_'):
+        _submitter = None
@@ -0,0 +1,888 @@
+import base64
+import contextvars
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import base58
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.system_program import TransferParams, transfer
+from solders.transaction import Transaction
+from spl.token.instructions import get_associated_token_address
+
+from config.database import database_config
+from config.db_routers import PIN_COOKIE, ReplicaPinningMiddleware, ReplicaRouter, use_primary
+
+from .admin import GoldTransactionAdmin
+from .archive import archive_transactions
+from .benchmarks import BenchmarkResult, compare, run_benchmarks
+from .fake_rpc import SLOT_TIME, Fault, FakeSolanaRpc
+from .holders import record_settlement, sync_holders
+from .ingestion import WalletActivityIngestor
+from .loadtest import DjangoClientTransport, percentile, run_load_test
+from .models import ArchivedGoldTransaction, ExchangeQuote, GoldTransaction, TokenHolder
+from .rpc import EndpointHealth, RpcRouter
+from .settlement import SettlementError, claim_pending
+from .signer import RemoteSigner, SignerError, SignerServer, build_signer
+from .submission import Rebroadcaster
+from .serializers import BuyConfirmSerializer, BuyInitiateSerializer
+from .utils import PriceOracle
+from .validators import parse_pubkey
+
+User = get_user_model()
+
+MINT_AUTHORITY = Keypair()
+MINT = Keypair().pubkey()
+
+
+def exchange_settings(rpc_url):
+    """Settings for running the exchange against a fake RPC node"""
+    return override_settings(
+        SOLANA_RPC_URL=rpc_url,
+        SOLANA_RPC_URLS=[],
+        SGOLD_MINT_ADDRESS=str(MINT),
+        MINT_AUTHORITY_KEYPAIR=base58.b58encode(bytes(MINT_AUTHORITY)).decode(),
+        TREASURY_WALLET=str(Keypair().pubkey()),
+        DEV_FUND_WALLET=str(Keypair().pubkey()),
+        PROFIT_WALLET=str(Keypair().pubkey()),
+        TRANSACTION_FEE_WALLET=str(Keypair().pubkey()),
+    )
+
+
+def seed_prices(gold='2000.00', sol='100.00'):
+    cache.set(PriceOracle.GOLD_CACHE_KEY, float(gold), 600)
+    cache.set(PriceOracle.SOL_CACHE_KEY, float(sol), 600)
+
+
+class FakeRpcMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rpc = FakeSolanaRpc(seed=1)
+        cls.rpc.start()
+        cls.settings_override = exchange_settings(cls.rpc.url)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.rpc.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        seed_prices()
+
+
+class ExchangeFlowTests(FakeRpcMixin, TestCase):
+    def trade(self, wallet, action, **amount):
+        quote = self.client.post('/api/v1/gold/quote', {'action': action, **amount}, content_type='application/json')
+        self.assertEqual(quote.status_code, 200, quote.content)
+
+        initiated = self.client.post(f'/api/v1/gold/{action}/initiate', {
+            'wallet_address': str(wallet.pubkey()),
+            'quote_id': quote.json()['quote_id'],
+        }, content_type='application/json')
+        self.assertEqual(initiated.status_code, 200, initiated.content)
+
+        tx = Transaction.from_bytes(base64.b64decode(initiated.json()['serialized_transaction']))
+        tx.sign([wallet], tx.message.recent_blockhash)
+        signature = Client(self.rpc.url).send_raw_transaction(bytes(tx)).value
+
+        return self.client.post(f'/api/v1/gold/{action}/confirm', {
+            'exchange_id': initiated.json()['exchange_id'],
+            'tx_signature': str(signature),
+        }, content_type='application/json')
+
+    def test_buy_mints_tokens(self):
+        wallet = Keypair()
+        response = self.trade(wallet, 'buy', usd_amount='25')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['sgold_minted'], 2.0)
+        ata = str(get_associated_token_address(wallet.pubkey(), MINT))
+        self.assertEqual(self.rpc.token_balance(ata), 200)
+        gold_tx = GoldTransaction.objects.get(user_wallet=str(wallet.pubkey()))
+        self.assertEqual(gold_tx.status, 'completed')
+
+    def test_sell_burns_tokens_and_pays_out(self):
+        wallet = Keypair()
+        self.trade(wallet, 'buy', usd_amount='25')
+        lamports_before = self.rpc.get_lamports(str(wallet.pubkey()))
+
+        response = self.trade(wallet, 'sell', usd_amount='10')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        ata = str(get_associated_token_address(wallet.pubkey(), MINT))
+        self.assertEqual(self.rpc.token_balance(ata), 100)
+        self.assertEqual(self.rpc.get_lamports(str(wallet.pubkey())), lamports_before + 100_000_000)
+
+    def test_confirm_rejects_unknown_signature(self):
+        wallet = Keypair()
+        quote = self.client.post('/api/v1/gold/quote', {'action': 'buy', 'usd_amount': '25'}, content_type='application/json')
+        initiated = self.client.post('/api/v1/gold/buy/initiate', {
+            'wallet_address': str(wallet.pubkey()),
+            'quote_id': quote.json()['quote_id'],
+        }, content_type='application/json')
+
+        response = self.client.post('/api/v1/gold/buy/confirm', {
+            'exchange_id': initiated.json()['exchange_id'],
+            'tx_signature': str(wallet.sign_message(b'never sent')),
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(GoldTransaction.objects.get().status, 'failed')
+
+    def test_confirm_while_being_settled_returns_accepted(self):
+        wallet = Keypair()
+        quote = self.client.post('/api/v1/gold/quote', {'action': 'buy', 'usd_amount': '25'}, content_type='application/json')
+        initiated = self.client.post('/api/v1/gold/buy/initiate', {
+            'wallet_address': str(wallet.pubkey()),
+            'quote_id': quote.json()['quote_id'],
+        }, content_type='application/json')
+        # Claimed by the wallet activity ingestor
+        GoldTransaction.objects.filter(id=initiated.json()['exchange_id']).update(status='processing')
+
+        response = self.client.post('/api/v1/gold/buy/confirm', {
+            'exchange_id': initiated.json()['exchange_id'],
+            'tx_signature': str(wallet.sign_message(b'payment')),
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'processing')
+        self.assertEqual(GoldTransaction.objects.get().status, 'processing')
+
+
+class AddressValidationTests(TestCase):
+    def test_serializers_and_routes_reject_malformed_addresses(self):
+        address = str(Keypair().pubkey())
+        # Right length and alphabet, but not 32 bytes
+        bogus = 'z' * 44
+
+        self.assertIs(parse_pubkey(address), parse_pubkey(address))
+        self.assertIsNone(parse_pubkey(bogus))
+
+        serializer = BuyInitiateSerializer(data={'wallet_address': bogus, 'quote_id': 'q'})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['wallet_address'], ['Invalid Solana wallet address'])
+        serializer = BuyConfirmSerializer(data={'exchange_id': 1, 'tx_signature': address})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('tx_signature', serializer.errors)
+
+        self.assertEqual(resolve(f'/api/v1/gold/balance/{address}').url_name, 'get_balance')
+        self.assertIsNone(resolve(f'/api/v1/gold/balance/{bogus}').url_name)
+        response = self.client.get(f'/api/v1/gold/balance/{bogus}')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid Solana wallet address'})
+
+
+class RpcRouterTests(TestCase):
+    def stub(self, router, url, result=None, error=None, delay=0.0):
+        """Make an endpoint answer every call with ``result`` or ``error`` after ``delay``"""
+        endpoint = router.endpoints[url]
+        endpoint.calls = 0
+
+        def call(method, *args, **kwargs):
+            endpoint.calls += 1
+            time.sleep(delay)
+            endpoint.health.record(delay, ok=error is None)
+            if error is not None:
+                raise error
+            return result
+
+        endpoint.call = call
+        return endpoint
+
+    def test_health_scores_penalise_errors_and_bench_failing_endpoints(self):
+        health = EndpointHealth()
+        self.assertEqual(health.score, 0.0)
+        for _ in range(3):
+            health.record(0.1, ok=True)
+        clean = health.score
+        health.record(0.1, ok=False)
+        self.assertGreater(health.score, clean)
+        self.assertFalse(health.is_benched)
+
+        health.record(0.1, ok=False)
+        health.record(0.1, ok=False)
+        self.assertTrue(health.is_benched)
+
+    def test_writes_fail_over_on_transport_errors_only(self):
+        router = RpcRouter(['http://a', 'http://b'])
+        down = self.stub(router, 'http://a', error=OSError('refused'))
+        up = self.stub(router, 'http://b', result='sig')
+        self.assertEqual(router.send_raw_transaction(b'tx'), 'sig')
+        self.assertEqual((down.calls, up.calls), (1, 1))
+
+        # An RPC-level rejection would fail everywhere, so it is not retried
+        router = RpcRouter(['http://a', 'http://b'])
+        self.stub(router, 'http://a', error=ValueError('preflight failed'))
+        other = self.stub(router, 'http://b', result='sig')
+        router.endpoints['http://b'].health.record(1.0, ok=True)
+        with self.assertRaises(ValueError):
+            router.send_raw_transaction(b'tx')
+        self.assertEqual(other.calls, 0)
+
+    def test_reads_go_to_the_best_endpoint_and_hedge_when_slow(self):
+        router = RpcRouter(['http://a', 'http://b'])
+        router.HEDGE_MAX_DELAY = 0.05
+        slow = self.stub(router, 'http://a', result='slow', delay=0.5)
+        fast = self.stub(router, 'http://b', result='fast', delay=0.01)
+        self.assertEqual(router.get_balance(Pubkey.default()), 'fast')
+        self.assertEqual((slow.calls, fast.calls), (1, 1))
+
+        # Once the slow call has finished, b ranks first and gets reads alone
+        time.sleep(0.6)
+        self.assertEqual(router._ranked(router.read_endpoints)[0].url, 'http://b')
+        router.get_balance(Pubkey.default())
+        self.assertEqual((slow.calls, fast.calls), (1, 2))
+
+    def test_reads_fail_over_to_healthy_endpoint(self):
+        with FakeSolanaRpc(faults={'*': Fault(http_error_rate=1.0)}) as down, FakeSolanaRpc() as up:
+            router = RpcRouter([down.url, up.url])
+            for _ in range(3):
+                self.assertEqual(router.get_balance(Pubkey.default()).value, up.default_lamports)
+
+            health = {endpoint['url']: endpoint for endpoint in router.snapshot()}
+            self.assertEqual(health[down.url]['error_rate'], 1.0)
+            self.assertEqual(router._ranked(router.read_endpoints)[0].url, up.url)
+
+    def test_slow_reads_are_hedged(self):
+        with FakeSolanaRpc(faults={'*': Fault(latency=1.0)}) as slow, FakeSolanaRpc() as fast:
+            router = RpcRouter([slow.url, fast.url])
+            router.HEDGE_MAX_DELAY = 0.1
+            router.get_balance(Pubkey.default())
+
+            self.assertEqual(fast.request_counts.get('getBalance'), 1)
+
+
+class LoadTestHarnessTests(FakeRpcMixin, TransactionTestCase):
+    def test_reports_latency_per_endpoint(self):
+        # SQLite's shared in-memory test database locks whole tables on write
+        concurrency = 2 if connection.vendor == 'postgresql' else 1
+        result = run_load_test(DjangoClientTransport, self.rpc.url, flows=2, concurrency=concurrency)
+
+        self.assertEqual(result.completed, 2, result.errors)
+        endpoints = {row['endpoint']: row for row in result.endpoints}
+        for endpoint in ['POST quote', 'POST buy/initiate', 'RPC sendTransaction', 'POST buy/confirm', 'flow']:
+            self.assertEqual(endpoints[endpoint]['count'], 2)
+            self.assertLessEqual(endpoints[endpoint]['p50_ms'], endpoints[endpoint]['p99_ms'])
+
+    def test_percentile_uses_nearest_rank(self):
+        values = [Decimal(n) for n in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 95))
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_benchmarks_run_against_seeded_table(self):
+        results = {r.name: r for r in run_benchmarks(['quote_view', 'admin_dashboard'], rows=200, rounds=1)}
+
+        self.assertEqual(results['quote_view'].queries, 1)
+        self.assertGreater(results['admin_dashboard'].median_us, 0)
+        self.assertEqual(GoldTransaction.objects.count(), 0)
+
+    def test_compare_flags_slowdowns_and_extra_queries(self):
+        result = BenchmarkResult('quote_view', rounds=1, number=1, median_us=130.0, min_us=120.0, stdev_us=0.0, queries=2)
+
+        self.assertEqual(compare(result, {'median_us': 110.0, 'queries': 2}), [])
+        self.assertEqual(len(compare(result, {'median_us': 100.0, 'queries': 1})), 2)
+        self.assertEqual(compare(result, None), [])
+
+
+@override_settings(METRICS_TOKEN='secret')
+class InstrumentationTests(FakeRpcMixin, TestCase):
+    def metrics(self):
+        return self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').content.decode()
+
+    def test_exchange_responses_carry_server_timing(self):
+        quote = self.client.post('/api/v1/gold/quote', {'action': 'buy', 'usd_amount': '25'}, content_type='application/json')
+        response = self.client.post('/api/v1/gold/buy/initiate', {
+            'wallet_address': str(Keypair().pubkey()),
+            'quote_id': quote.json()['quote_id'],
+        }, content_type='application/json')
+
+        timing = response['Server-Timing']
+        self.assertIn('rpc;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_break_down_upstreams_by_endpoint(self):
+        self.client.post('/api/v1/gold/quote', {'action': 'buy', 'usd_amount': '25'}, content_type='application/json')
+
+        body = self.metrics()
+        self.assertIn('gold_upstream_duration_seconds_count{endpoint="api/v1/gold/quote",upstream="db",operation="INSERT"}', body)
+        self.assertIn(
+            'gold_http_request_duration_seconds_bucket{endpoint="api/v1/gold/quote",method="POST",status="200",le="+Inf"}',
+            body,
+        )
+
+    def test_metrics_token_is_enforced(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+        # Without a token, metrics are only public in development
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_metrics_report_connection_pool_wait_time(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {'pool_size': 4, 'pool_available': 1, 'requests_num': 10, 'requests_wait_ms': 250}
+
+        with mock.patch('gold_exchange.instrumentation.connection_pools', return_value={'default': pool}):
+            body = self.metrics()
+
+        self.assertIn('gold_db_pool_size{database="default"} 4', body)
+        self.assertIn('gold_db_pool_wait_seconds_total{database="default"} 0.25', body)
+        self.assertIn('gold_db_pool_timeouts_total{database="default"} 0', body)
+
+
+class DatabaseConfigTests(TestCase):
+    url = 'postgres://user:pw@db:5432/exchange'
+
+    def test_pool_mode_uses_native_pool(self):
+        config = database_config(self.url, mode='pool', pool_min_size=2, pool_max_size=4)
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 4, 'timeout': 10.0})
+
+    def test_pgbouncer_mode_disables_server_side_state(self):
+        config = database_config(self.url, mode='pgbouncer')
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+        self.assertIsNone(config['OPTIONS']['prepare_threshold'])
+        self.assertNotIn('pool', config['OPTIONS'])
+
+    def test_non_postgres_databases_are_left_alone(self):
+        self.assertNotIn('OPTIONS', database_config('sqlite:////tmp/db.sqlite3', mode='pool'))
+        with self.assertRaises(ValueError):
+            database_config(self.url, mode='transaction')
+
+
+class SignerTests(FakeRpcMixin, TestCase):
+    def test_nonce_pool_pipelines_submissions(self):
+        nonce_accounts = [str(Keypair().pubkey()) for _ in range(2)]
+        for address in nonce_accounts:
+            self.rpc.add_nonce_account(address, str(MINT_AUTHORITY.pubkey()))
+        time.sleep(SLOT_TIME)
+        signer = build_signer(nonce_accounts=nonce_accounts)
+        owners = [Keypair().pubkey() for _ in range(4)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            signatures = list(executor.map(lambda owner: signer.mint_to(owner, 100), owners))
+
+        for owner, signature in zip(owners, signatures):
+            self.assertEqual(self.rpc.token_balance(str(get_associated_token_address(owner, MINT))), 100)
+            blockhash = str(self.rpc.transactions[signature]['tx'].message.recent_blockhash)
+            self.assertNotIn(blockhash, self.rpc.blockhashes)
+        self.assertEqual(signer.describe()['submitted'], 4)
+
+    def test_remote_signer_serves_jobs_over_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            server = SignerServer(build_signer(), os.path.join(tmp, 'signer.sock'), b'test')
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                remote = RemoteSigner(server.address, b'test')
+                destination = Keypair().pubkey()
+
+                signature = remote.transfer(destination, 5_000)
+
+                self.assertEqual(remote.pubkey, MINT_AUTHORITY.pubkey())
+                self.assertIn(signature, self.rpc.transactions)
+                self.assertEqual(self.rpc.get_lamports(str(destination)), self.rpc.default_lamports + 5_000)
+                self.assertEqual(remote.describe()['submitted'], 1)
+                with self.assertRaises(SignerError):
+                    RemoteSigner(server.address, b'wrong').describe()
+            finally:
+                server.close()
+
+    def test_lost_reply_to_a_payout_is_not_resent(self):
+        class DroppingServer(SignerServer):
+            """Runs each job, then hangs up instead of replying to the first ones"""
+            drops = 2
+
+            def _serve(self, conn):
+                with conn:
+                    while True:
+                        try:
+                            operation, params = conn.recv()
+                        except (EOFError, OSError):
+                            return
+                        result = self._dispatch(operation, params)
+                        if self.drops:
+                            self.drops -= 1
+                            return
+                        conn.send(result)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            server = DroppingServer(build_signer(), os.path.join(tmp, 'signer.sock'), b'test')
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                remote = RemoteSigner(server.address, b'test')
+                destination = Keypair().pubkey()
+
+                with self.assertRaises(SignerError):
+                    remote.transfer(destination, 5_000)
+                self.assertEqual(self.rpc.get_lamports(str(destination)), self.rpc.default_lamports + 5_000)
+
+                # Read-only calls are resent
+                self.assertEqual(remote.describe()['submitted'], 1)
+            finally:
+                server.close()
+
+    def test_admin_dashboard_survives_signer_outage(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        with tempfile.TemporaryDirectory() as tmp, \
+                override_settings(SOLANA_SIGNER_ADDRESS=os.path.join(tmp, 'missing.sock')):
+            response = self.client.get('/api/v1/gold/admin/dashboard')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(response.json()['system_info']['signer']['available'])
+        self.assertIsNone(response.json()['wallets']['liquidity_mint']['balance_sol'])
+
+
+class PrioritySubmissionTests(FakeRpcMixin, TestCase):
+    def compute_budget(self, signature):
+        tx = self.rpc.transactions[signature]['tx']
+        keys = tx.message.account_keys
+        budget = {}
+        for ix in tx.message.instructions:
+            if str(keys[ix.program_id_index]) == 'ComputeBudget111111111111111111111111111111':
+                data = bytes(ix.data)
+                budget[data[0]] = int.from_bytes(data[1:], 'little')
+        return budget
+
+    def test_attaches_compute_budget_and_priority_fee(self):
+        self.rpc.prioritization_fees = [0, 100, 5_000, 20_000]
+        try:
+            signature = build_signer().transfer(Keypair().pubkey(), 5_000)
+        finally:
+            self.rpc.prioritization_fees = []
+
+        budget = self.compute_budget(signature)
+        # 75th percentile of recent fees; 3 simulated instructions * 450 CU * 1.2 margin
+        self.assertEqual(budget[3], 5_000)
+        self.assertEqual(budget[2], 1_620)
+
+    def test_compute_budget_is_simulated_once_per_instruction_shape(self):
+        signer = build_signer()
+        before = self.rpc.request_counts.get('simulateTransaction', 0)
+        first = signer.mint_to(Keypair().pubkey(), 100)
+        second = signer.mint_to(Keypair().pubkey(), 123_456_789)
+
+        self.assertEqual(self.rpc.request_counts['simulateTransaction'] - before, 1)
+        self.assertEqual(self.compute_budget(first)[2], self.compute_budget(second)[2])
+
+    @override_settings(SOLANA_REBROADCAST_INTERVAL=0.05)
+    def test_dropped_transactions_are_rebroadcast(self):
+        signer = build_signer()
+        self.rpc.faults = {'sendTransaction': Fault(drop_rate=1.0)}
+        try:
+            signature = signer.transfer(Keypair().pubkey(), 5_000)
+            self.assertNotIn(signature, self.rpc.transactions)
+        finally:
+            self.rpc.faults = {}
+
+        deadline = time.monotonic() + 5
+        while signature not in self.rpc.transactions and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIn(signature, self.rpc.transactions)
+
+    def test_rebroadcaster_expires_entries_while_rpc_is_down(self):
+        client = mock.Mock()
+        client.get_signature_statuses.side_effect = OSError('connection refused')
+        rebroadcaster = Rebroadcaster(client, interval=0.02, max_age=0.1)
+        rebroadcaster.watch(str(Signature.default()), b'raw')
+
+        deadline = time.monotonic() + 5
+        while rebroadcaster.pending() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(rebroadcaster.pending(), 0)
+        self.assertIsNone(rebroadcaster._thread)
+
+
+class WalletActivityIngestionTests(FakeRpcMixin, TestCase):
+    def submit(self, wallet, action, **amount):
+        """Initiate a trade and land the user's transaction without confirming it"""
+        quote = self.client.post('/api/v1/gold/quote', {'action': action, **amount}, content_type='application/json')
+        initiated = self.client.post(f'/api/v1/gold/{action}/initiate', {
+            'wallet_address': str(wallet.pubkey()),
+            'quote_id': quote.json()['quote_id'],
+        }, content_type='application/json')
+        tx = Transaction.from_bytes(base64.b64decode(initiated.json()['serialized_transaction']))
+        tx.sign([wallet], tx.message.recent_blockhash)
+        return initiated.json()['exchange_id'], self.rpc.submit(tx)
+
+    def test_settles_buys_and_sells_from_chain_activity(self):
+        wallet = Keypair()
+        ingestor = WalletActivityIngestor()
+
+        exchange_id, signature = self.submit(wallet, 'buy', usd_amount='25')
+        self.assertEqual(ingestor.ingest(signature), [exchange_id])
+        ata = str(get_associated_token_address(wallet.pubkey(), MINT))
+        self.assertEqual(self.rpc.token_balance(ata), 200)
+
+        # A late confirm from the client returns the settled trade
+        response = self.client.post('/api/v1/gold/buy/confirm', {
+            'exchange_id': exchange_id,
+            'tx_signature': signature,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['status'], 'completed')
+
+        exchange_id, signature = self.submit(wallet, 'sell', usd_amount='10')
+        self.assertEqual(ingestor.ingest(signature), [exchange_id])
+        self.assertEqual(self.rpc.token_balance(ata), 100)
+        self.assertEqual(GoldTransaction.objects.get(id=exchange_id).status, 'completed')
+
+    def test_payment_settles_only_one_of_two_matching_quotes(self):
+        wallet = Keypair()
+        ingestor = WalletActivityIngestor()
+        # An abandoned quote for the same amount, never paid
+        quote = self.client.post('/api/v1/gold/quote', {'action': 'buy', 'usd_amount': '25'}, content_type='application/json')
+        abandoned = self.client.post('/api/v1/gold/buy/initiate', {
+            'wallet_address': str(wallet.pubkey()),
+            'quote_id': quote.json()['quote_id'],
+        }, content_type='application/json').json()['exchange_id']
+
+        exchange_id, signature = self.submit(wallet, 'buy', usd_amount='25')
+        response = self.client.post('/api/v1/gold/buy/confirm', {
+            'exchange_id': exchange_id,
+            'tx_signature': signature,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(ingestor.ingest(signature), [])
+        with self.assertRaises(SettlementError):
+            claim_pending(abandoned, signature)
+        ata = str(get_associated_token_address(wallet.pubkey(), MINT))
+        self.assertEqual(self.rpc.token_balance(ata), 200)
+        self.assertEqual(GoldTransaction.objects.get(id=abandoned).status, 'pending')
+
+    def test_ignores_payments_that_do_not_match_a_pending_trade(self):
+        wallet = Keypair()
+        ingestor = WalletActivityIngestor()
+        exchange_id, _ = self.submit(wallet, 'buy', usd_amount='25')
+        self.rpc.transactions.clear()
+
+        blockhash = Client(self.rpc.url).get_latest_blockhash().value.blockhash
+        underpaid = transfer(TransferParams(from_pubkey=wallet.pubkey(), to_pubkey=ingestor.service.liquidity_wallet, lamports=1_000))
+        tx = Transaction([wallet], Message.new_with_blockhash([underpaid], wallet.pubkey(), blockhash), blockhash)
+
+        self.assertEqual(ingestor.ingest(self.rpc.submit(tx)), [])
+        self.assertEqual(GoldTransaction.objects.get(id=exchange_id).status, 'pending')
+
+    def test_log_subscription_delivers_each_signature_once(self):
+        ingestor = WalletActivityIngestor(ws_url=self.rpc.start_pubsub())
+        received = []
+        ingestor.ingest = received.append
+        stop = threading.Event()
+        thread = threading.Thread(target=ingestor.run, args=(stop,), daemon=True)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 5
+            while len(self.rpc.log_subscriptions) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            # Mentions both the liquidity wallet and the treasury
+            wallet = Keypair()
+            blockhash = Client(self.rpc.url).get_latest_blockhash().value.blockhash
+            instructions = [
+                transfer(TransferParams(from_pubkey=wallet.pubkey(), to_pubkey=account, lamports=1_000))
+                for account in (ingestor.service.liquidity_wallet, ingestor.service.treasury_wallet)
+            ]
+            signature = self.rpc.submit(Transaction([wallet], Message.new_with_blockhash(instructions, wallet.pubkey(), blockhash), blockhash))
+
+            while not received and time.monotonic() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.1)
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+
+        self.assertEqual(received, [signature])
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def test_routes_reads_to_replicas_outside_transactions(self):
+        def read():
+            return self.router.db_for_read(GoldTransaction)
+
+        def check():
+            # TestCase wraps each test in an atomic block on the primary
+            self.assertEqual(read(), 'default')
+            with mock.patch.object(connection, 'in_atomic_block', False):
+                self.assertIn(read(), ['replica_0', 'replica_1'])
+                self.assertIsNone(self.router.db_for_read(User))
+                with use_primary():
+                    self.assertEqual(read(), 'default')
+                self.router.db_for_write(GoldTransaction)
+                self.assertEqual(read(), 'default')
+
+        # Outside a request, writes pin the context for good; start unpinned
+        contextvars.Context().run(check)
+        self.assertFalse(self.router.allow_migrate('replica_0', 'gold_exchange'))
+
+    def test_pins_reads_to_primary_after_a_write(self):
+        routed = []
+
+        def view(request):
+            with mock.patch.object(connection, 'in_atomic_block', False):
+                routed.append(self.router.db_for_read(GoldTransaction))
+                if request.method == 'POST':
+                    self.router.db_for_write(GoldTransaction)
+                    routed.append(self.router.db_for_read(GoldTransaction))
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        self.assertNotIn(PIN_COOKIE, middleware(self.factory.get('/')).cookies)
+        response = middleware(self.factory.post('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        sticky = self.factory.get('/')
+        sticky.COOKIES[PIN_COOKIE] = '1'
+        middleware(sticky)
+        middleware(self.factory.get('/'))
+
+        self.assertIn(routed[0], ['replica_0', 'replica_1'])
+        self.assertEqual(routed[1:4], ['default', 'default', 'default'])
+        self.assertIn(routed[4], ['replica_0', 'replica_1'])
+
+
+class ArchiveTests(TestCase):
+    def make_transaction(self, status, age_days, signature=None):
+        gold_tx = GoldTransaction.objects.create(
+            user_wallet=str(Keypair().pubkey()),
+            transaction_type='buy',
+            sol_amount=Decimal('0.25'),
+            token_amount=Decimal('2.00'),
+            gold_price_usd=Decimal('2000.00'),
+            sol_price_usd=Decimal('100.00'),
+            fees_collected=Decimal('0.0406'),
+            status=status,
+            tx_signature=signature,
+        )
+        GoldTransaction.objects.filter(id=gold_tx.id).update(created_at=timezone.now() - timedelta(days=age_days))
+        return gold_tx
+
+    def test_moves_old_settled_transactions_in_batches(self):
+        signatures = [str(Keypair().sign_message(bytes([i]))) for i in range(4)]
+        old = [self.make_transaction('completed', 200, signature=signatures[i]) for i in range(3)]
+        old_pending = self.make_transaction('pending', 200)
+        recent = self.make_transaction('completed', 1, signature=signatures[3])
+
+        archived = archive_transactions(timezone.now() - timedelta(days=90), batch_size=2)
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(
+            set(GoldTransaction.objects.values_list('id', flat=True)),
+            {old_pending.id, recent.id},
+        )
+        row = ArchivedGoldTransaction.objects.get(tx_signature=signatures[1])
+        self.assertEqual(row.id, old[1].id)
+        self.assertEqual(row.fees_collected, Decimal('0.0406'))
+        self.assertEqual(archive_transactions(timezone.now() - timedelta(days=90)), 0)
+
+
+class QueryPlanTests(TestCase):
+    """Guards that the exchange's hot query shapes keep using their partial indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.wallets = [str(Keypair().pubkey()) for _ in range(200)]
+        GoldTransaction.objects.bulk_create([
+            GoldTransaction(
+                user_wallet=cls.wallets[i % 200],
+                transaction_type='buy',
+                sol_amount=Decimal('0.25'),
+                token_amount=Decimal('2.00'),
+                gold_price_usd=Decimal('2000.00'),
+                sol_price_usd=Decimal('100.00'),
+                status='pending' if i % 100 == 0 else 'processing' if i % 101 == 0 else 'completed',
+                quote_expires_at=now + timedelta(minutes=5),
+            )
+            for i in range(5000)
+        ])
+        ExchangeQuote.objects.bulk_create([
+            ExchangeQuote(
+                quote_id=f'quote-{i}',
+                user_wallet=cls.wallets[0],
+                action='buy',
+                sol_amount=Decimal('0.25'),
+                token_amount=Decimal('2.00'),
+                gold_price_usd=Decimal('2000.00'),
+                sol_price_usd=Decimal('100.00'),
+                treasury_fee=Decimal('0'),
+                dev_fee=Decimal('0'),
+                expires_at=now + timedelta(minutes=i % 7 - 5),
+                used=i % 50 != 0,
+            )
+            for i in range(3000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # A few thousand rows is small enough that a seq scan can win on cost
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn(index_name, queryset.explain())
+
+    def test_in_flight_and_open_quote_queries_use_partial_indexes(self):
+        self.assertUsesIndex(GoldTransaction.objects.in_flight(), 'gold_tx_inflight_age_idx')
+        self.assertUsesIndex(
+            GoldTransaction.objects.pending_for_wallet(self.wallets[0]).filter(transaction_type='buy'),
+            'gold_tx_pending_wallet_idx',
+        )
+        self.assertUsesIndex(ExchangeQuote.objects.open(), 'quote_open_expiry_idx')
+        self.assertEqual(GoldTransaction.objects.in_flight().count(), 50 + 49)
+
+
+class LargeTableAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        now = timezone.now()
+        cls.transactions = GoldTransaction.objects.bulk_create([
+            GoldTransaction(
+                user_wallet=str(Keypair().pubkey()),
+                transaction_type='buy',
+                sol_amount=Decimal('0.25'),
+                token_amount=Decimal('2.00'),
+                gold_price_usd=Decimal('2000.00'),
+                sol_price_usd=Decimal('100.00'),
+                status='completed',
+            )
+            for _ in range(7)
+        ])
+        # Two rows share a timestamp so paging has to break the tie on id
+        for i, gold_tx in enumerate(cls.transactions):
+            GoldTransaction.objects.filter(id=gold_tx.id).update(created_at=now - timedelta(minutes=min(i, 5)))
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def changelist(self, query=''):
+        self.response = self.client.get(f'/admin/gold_exchange/goldtransaction/{query}')
+        self.assertEqual(self.response.status_code, 200)
+        return self.response.context['cl']
+
+    @mock.patch.object(GoldTransactionAdmin, 'list_per_page', 3)
+    def test_keyset_pages_walk_the_ledger_in_order(self):
+        expected = list(GoldTransaction.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        seen, pages, cl = [], [], self.changelist()
+        self.assertContains(self.response, 'Older &rsaquo;')
+        while True:
+            pages.append([row.id for row in cl.result_list])
+            seen.extend(pages[-1])
+            if not cl.older_url:
+                break
+            cl = self.changelist(cl.older_url)
+        self.assertEqual(seen, expected)
+        self.assertEqual(cl.result_count, 7)
+
+        newer = self.changelist(cl.newer_url)
+        self.assertEqual([row.id for row in newer.result_list], pages[-2])
+        self.assertIn('status_message', newer.result_list[0].get_deferred_fields())
+
+    def test_search_matches_wallet_prefix_and_id(self):
+        target = self.transactions[2]
+        cl = self.changelist(f'?q={target.user_wallet[:10]}')
+        self.assertEqual([row.id for row in cl.result_list], [target.id])
+        cl = self.changelist(f'?q={target.id}')
+        self.assertIn(target.id, [row.id for row in cl.result_list])
+
+
+class Base58FieldTests(TestCase):
+    def test_stores_raw_bytes_and_matches_prefixes_like_strings(self):
+        # Keys with leading zero bytes encode with leading "1"s
+        wallets = [str(Pubkey(bytes(zeros) + os.urandom(32 - zeros))) for zeros in (1, 2)]
+        wallets += [str(Keypair().pubkey()) for _ in range(40)]
+        GoldTransaction.objects.bulk_create([
+            GoldTransaction(
+                user_wallet=wallet,
+                transaction_type='buy',
+                sol_amount=Decimal('0.25'),
+                token_amount=Decimal('2.00'),
+                gold_price_usd=Decimal('2000.00'),
+                sol_price_usd=Decimal('100.00'),
+                tx_signature=str(Keypair().sign_message(wallet.encode())),
+            )
+            for wallet in wallets
+        ])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT length(user_wallet), length(tx_signature) FROM {GoldTransaction._meta.db_table}')
+            self.assertEqual(set(cursor.fetchall()), {(32, 64)})
+        self.assertEqual(GoldTransaction.objects.get(user_wallet=wallets[0]).user_wallet, wallets[0])
+
+        for prefix in {wallet[:length] for wallet in wallets[:10] for length in (1, 2, 5)} | {'1', '11', '111'}:
+            self.assertEqual(
+                sorted(GoldTransaction.objects.filter(user_wallet__startswith=prefix).values_list('user_wallet', flat=True)),
+                sorted(wallet for wallet in wallets if wallet.startswith(prefix)),
+                prefix,
+            )
+        self.assertFalse(GoldTransaction.objects.filter(user_wallet__startswith='0OIl').exists())
+
+
+class HolderIndexTests(FakeRpcMixin, TestCase):
+    def test_sync_then_settlements_then_admin_api(self):
+        owners = [str(Keypair().pubkey()) for _ in range(3)]
+        accounts = [str(get_associated_token_address(Pubkey.from_string(owner), MINT)) for owner in owners]
+        self.rpc.token_accounts.update({
+            accounts[0]: {'mint': str(MINT), 'owner': owners[0], 'amount': 500},
+            accounts[1]: {'mint': str(MINT), 'owner': owners[1], 'amount': 0},
+            str(Keypair().pubkey()): {'mint': str(Keypair().pubkey()), 'owner': owners[2], 'amount': 900},
+        })
+        TokenHolder.objects.create(token_account=str(Keypair().pubkey()), owner=owners[2], amount=100)
+        TokenHolder.objects.filter(owner=owners[2]).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        result = sync_holders()
+        self.assertEqual((result['accounts'], result['removed']), (1, 1))
+        self.assertEqual(TokenHolder.objects.get().amount, 500)
+
+        def settle(owner, account, action, tokens):
+            record_settlement(GoldTransaction(
+                user_wallet=owner, user_token_account=account, transaction_type=action, token_amount=Decimal(tokens),
+            ))
+
+        settle(owners[1], accounts[1], 'buy', '7.50')
+        settle(owners[0], accounts[0], 'sell', '1.25')
+        settle(owners[0], accounts[0], 'sell', '99')  # more than indexed: left for the next sync
+        self.assertEqual(dict(TokenHolder.objects.values_list('owner', 'amount')), {owners[0]: 375, owners[1]: 750})
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get('/api/v1/gold/admin/holders?limit=1')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['holder_count'], 2)
+        self.assertEqual(response.json()['total_supply'], 11.25)
+        self.assertEqual(
+            [(h['owner'], h['balance'], h['share_pct']) for h in response.json()['top_holders']],
+            [(owners[1], 7.5, 66.6667)],
+        )
@@ -1,5 +1,8 @@
-from django.urls import path
+from django.urls import path, register_converter
 from . import views, admin_views
+from .validators import SolanaAddressConverter
+
+register_converter(SolanaAddressConverter, 'solana_address')
 
 app_name = 'gold_exchange'
 
@@ -16,10 +19,13 @@ urlpatterns = [
     path('sell/confirm', views.sell_confirm, name='sell_confirm'),
 
     # Balance and price endpoints
-    path('balance/<str:wallet_address>', views.get_balance, name='get_balance'),
+    path('balance/<solana_address:wallet_address>', views.get_balance, name='get_balance'),
+    # Malformed addresses get a 400 from the view instead of falling through to the SPA catch-all
+    path('balance/<str:wallet_address>', views.get_balance),
     path('price', views.get_price, name='get_price'),
 
     # Admin endpoints
     path('admin/dashboard', admin_views.admin_dashboard, name='admin_dashboard'),
+    path('admin/holders', admin_views.token_holders, name='admin_holders'),
     path('admin/withdraw', admin_views.withdraw_from_wallet, name='admin_withdraw'),
 ]
@@ -8,6 +8,8 @@ from typing import Tuple, Optional
 from datetime import datetime
 from django.core.cache import cache
 
+from .instrumentation import track
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,7 +48,8 @@ class PriceOracle:
 
         for api in apis:
             try:
-                response = requests.get(api['url'], timeout=5)
+                with track('oracle', 'gold'):
+                    response = requests.get(api['url'], timeout=5)
                 if response.ok:
                     data = response.json()
                     price = api['extract'](data)
@@ -86,7 +89,8 @@ class PriceOracle:
 
         for api in apis:
             try:
-                response = requests.get(api['url'], timeout=5)
+                with track('oracle', 'sol'):
+                    response = requests.get(api['url'], timeout=5)
                 logger.info(f"SOL price API response status: {response.status_code}")
                 if response.ok:
                     data = response.json()
@@ -145,18 +149,5 @@ def validate_solana_address(address: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    if not address or not isinstance(address, str):
-        return False
-
-    # Solana addresses are base58 and typically 32-44 characters
-    if len(address) < 32 or len(address) > 44:
-        return False
-
-    # Try to decode as base58
-    try:
-        import base58
-        decoded = base58.b58decode(address)
-        # Solana public keys are 32 bytes
-        return len(decoded) == 32
-    except Exception:
-        return False
+    from .validators import is_valid_address
+    return is_valid_address(address)
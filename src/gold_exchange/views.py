@@ -7,11 +7,9 @@ from decimal import Decimal
 from datetime import timedelta
 from django.conf import settings
 from django.utils import timezone
-from django.db import transaction as db_transaction
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from solders.pubkey import Pubkey
 from solders.transaction import Transaction as SolanaTransaction
 
 from .models import GoldTransaction, ExchangeQuote
@@ -26,8 +24,21 @@ from .serializers import (
     BalanceResponseSerializer,
     PriceResponseSerializer,
 )
+from .rpc import get_rpc_client
 from .services import GoldTokenService
-from .utils import PriceOracle, generate_quote_id, validate_solana_address
+from .settlement import (
+    AlreadySettled,
+    SettlementError,
+    SettlementInProgress,
+    buy_payload,
+    claim_pending,
+    processing_payload,
+    sell_payload,
+    settle_buy,
+    settle_sell,
+)
+from .utils import PriceOracle, generate_quote_id
+from .validators import parse_pubkey
 
 logger = logging.getLogger(__name__)
 
@@ -162,13 +173,6 @@ def buy_initiate(request):
     wallet_address = serializer.validated_data['wallet_address']
     quote_id = serializer.validated_data['quote_id']
 
-    # Validate wallet address
-    if not validate_solana_address(wallet_address):
-        return Response(
-            {'error': 'Invalid Solana wallet address'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
     try:
         # Get quote
         quote = ExchangeQuote.objects.get(quote_id=quote_id)
@@ -204,16 +208,14 @@ def buy_initiate(request):
         )
 
         # Create complete transaction
-        from solana.rpc.api import Client
-        from solana.rpc.commitment import Confirmed
         from solders.system_program import transfer, TransferParams
         from solders.transaction import Transaction as SolanaTransaction
         from solders.message import Message
         import base64
 
         service = GoldTokenService()
-        user_pubkey = Pubkey.from_string(wallet_address)
-        client = Client(settings.SOLANA_RPC_URL, commitment=Confirmed)
+        user_pubkey = parse_pubkey(wallet_address)
+        client = service.client
 
         # Calculate fees: treasury, profit, transaction, liquidity
         treasury_fee, profit_fee, transaction_fee, liquidity_amount = service.calculate_fees(quote.sol_amount, 'buy')
@@ -274,6 +276,11 @@ def buy_confirm(request):
     Confirm buy transaction with signed transaction from user.
     Backend verifies payment and mints tokens.
 
+    Trades may already have been settled by the wallet activity ingestor
+    (``manage.py ingest_wallet_activity``); confirming again with the same
+    signature returns the completed trade, and confirming while it is
+    being settled returns 202 with its current status.
+
     POST /api/v1/gold/buy/confirm
     Body: {
         "exchange_id": 123,
@@ -288,109 +295,18 @@ def buy_confirm(request):
     tx_signature = serializer.validated_data['tx_signature']
 
     try:
-        # Get transaction record
-        with db_transaction.atomic():
-            gold_tx = GoldTransaction.objects.select_for_update().get(id=exchange_id)
-
-            # Check status
-            if gold_tx.status != 'pending':
-                return Response(
-                    {'error': f'Transaction is not pending (current status: {gold_tx.status})'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Check expiration
-            if gold_tx.is_expired:
-                gold_tx.mark_failed('Quote expired')
-                return Response(
-                    {'error': 'Quote has expired'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Update status to processing
-            logger.info(f"About to save status=processing for tx {gold_tx.id}")
-            gold_tx.status = 'processing'
-            gold_tx.save()
-            logger.info(f"Successfully saved status=processing")
-
-        # Verify transaction (already submitted by wallet)
-        try:
-            service = GoldTokenService()
-
-            logger.info(f"Verifying SOL payment transaction: {tx_signature}")
-
-            # Wait for confirmation
-            import time
-            time.sleep(2)  # Wait 2 seconds for confirmation
-
-            # Verify SOL payment was received
-            payment_verified = service.verify_sol_payment(
-                tx_signature,
-                gold_tx.sol_amount
-            )
-
-            if not payment_verified:
-                gold_tx.mark_failed('Failed to verify SOL payment on-chain')
-                return Response(
-                    {'error': 'Failed to verify payment'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Mint tokens to user
-            user_pubkey = Pubkey.from_string(gold_tx.user_wallet)
-            mint_tx_signature = service.mint_tokens_to_user(
-                user_pubkey,
-                gold_tx.token_amount
-            )
-
-            # Get user's ATA
-            user_ata = service.get_or_create_associated_token_account(user_pubkey)
-
-            # Update transaction record
-            logger.info(f"Saving tx_signature: {tx_signature} (length: {len(tx_signature)})")
-            logger.info(f"Saving user_ata: {str(user_ata)} (length: {len(str(user_ata))})")
-            logger.info(f"Saving mint_tx_signature: {mint_tx_signature} (length: {len(str(mint_tx_signature))})")
-
-            gold_tx.tx_signature = tx_signature
-            gold_tx.user_token_account = str(user_ata)
-            gold_tx.status = 'completed'
-            gold_tx.completed_at = timezone.now()
-            gold_tx.status_message = f'Minted {gold_tx.token_amount} sGOLD tokens'
-
-            try:
-                gold_tx.save()
-            except Exception as save_error:
-                logger.error(f"Failed to save transaction: {save_error}")
-                logger.error(f"tx_signature: '{gold_tx.tx_signature}' (len={len(gold_tx.tx_signature)})")
-                logger.error(f"user_token_account: '{gold_tx.user_token_account}' (len={len(gold_tx.user_token_account) if gold_tx.user_token_account else 0})")
-                raise
-
-            # Mark quote as used
-            if gold_tx.quote_id:
-                ExchangeQuote.objects.filter(quote_id=gold_tx.quote_id).update(used=True)
-
-            return Response({
-                'status': 'completed',
-                'tx_signature': tx_signature,
-                'mint_tx_signature': mint_tx_signature,
-                'sgold_minted': float(gold_tx.token_amount),
-                'user_ata': str(user_ata),
-                'message': f'Successfully purchased {gold_tx.token_amount} sGOLD tokens'
-            }, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            logger.error(f"Error processing transaction: {e}", exc_info=True)
-            gold_tx.mark_failed(f'Error processing transaction: {str(e)}')
-            return Response(
-                {'error': 'Failed to process transaction', 'detail': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
+        gold_tx = claim_pending(exchange_id, tx_signature)
     except GoldTransaction.DoesNotExist:
         return Response(
             {'error': 'Transaction not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+    except AlreadySettled as e:
+        return Response(buy_payload(e.gold_tx), status=status.HTTP_200_OK)
+    except SettlementInProgress as e:
+        return Response(processing_payload(e.gold_tx), status=status.HTTP_202_ACCEPTED)
+    except SettlementError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"Error confirming buy: {e}", exc_info=True)
         return Response(
@@ -398,6 +314,24 @@ def buy_confirm(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    # Verify transaction (already submitted by wallet)
+    try:
+        service = GoldTokenService()
+
+        logger.info(f"Verifying SOL payment transaction: {tx_signature}")
+
+        return Response(settle_buy(gold_tx, tx_signature, service), status=status.HTTP_200_OK)
+
+    except SettlementError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error processing transaction: {e}", exc_info=True)
+        gold_tx.mark_failed(f'Error processing transaction: {str(e)}')
+        return Response(
+            {'error': 'Failed to process transaction', 'detail': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
 
 @api_view(['GET'])
 def get_balance(request, wallet_address):
@@ -406,8 +340,9 @@ def get_balance(request, wallet_address):
 
     GET /api/v1/gold/balance/<wallet_address>
     """
-    # Basic validation - check if it looks like a Solana address
-    if not wallet_address or len(wallet_address) < 32 or len(wallet_address) > 44:
+    # Only reached with a malformed address via the fallback route, see urls.py
+    user_pubkey = parse_pubkey(wallet_address)
+    if user_pubkey is None:
         return Response(
             {'error': 'Invalid Solana wallet address'},
             status=status.HTTP_400_BAD_REQUEST
@@ -419,9 +354,7 @@ def get_balance(request, wallet_address):
 
         # Always try to get SOL balance from blockchain
         try:
-            from solana.rpc.api import Client
-            client = Client(settings.SOLANA_RPC_URL)
-            user_pubkey = Pubkey.from_string(wallet_address)
+            client = get_rpc_client()
             sol_balance_info = client.get_balance(user_pubkey)
             sol_balance = float(Decimal(sol_balance_info.value) / Decimal('1000000000'))
         except Exception as e:
@@ -440,7 +373,6 @@ def get_balance(request, wallet_address):
             }, status=status.HTTP_200_OK)
 
         service = GoldTokenService()
-        user_pubkey = Pubkey.from_string(wallet_address)
 
         # Get token balance from on-chain
         token_balance = service.get_token_balance(user_pubkey)
@@ -454,9 +386,7 @@ def get_balance(request, wallet_address):
         estimated_usd = token_balance * Decimal('10')  # Each token unit = $10
 
         # Get recent transactions
-        recent_txs = GoldTransaction.objects.filter(
-            user_wallet=wallet_address
-        ).order_by('-created_at')[:10]
+        recent_txs = GoldTransaction.objects.for_wallet(wallet_address)[:10]
 
         response_data = {
             'wallet_address': wallet_address,
@@ -547,13 +477,6 @@ def sell_initiate(request):
     wallet_address = serializer.validated_data['wallet_address']
     quote_id = serializer.validated_data['quote_id']
 
-    # Validate wallet address
-    if not validate_solana_address(wallet_address):
-        return Response(
-            {'error': 'Invalid Solana wallet address'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
     try:
         # Get quote
         quote = ExchangeQuote.objects.get(quote_id=quote_id)
@@ -595,15 +518,13 @@ def sell_initiate(request):
         )
 
         # Create sell transaction with burn + SOL transfer
-        from solana.rpc.api import Client
-        from solana.rpc.commitment import Confirmed
         from solders.transaction import Transaction as SolanaTransaction
         from solders.message import Message
         import base64
 
         service = GoldTokenService()
-        user_pubkey = Pubkey.from_string(wallet_address)
-        client = Client(settings.SOLANA_RPC_URL, commitment=Confirmed)
+        user_pubkey = parse_pubkey(wallet_address)
+        client = service.client
 
         # Verify user has sufficient SOLGOLD balance
         user_balance = service.get_token_balance(user_pubkey)
@@ -677,6 +598,11 @@ def sell_confirm(request):
     Confirm sell transaction with signed transaction from user.
     Backend verifies burn and SOL payout.
 
+    Trades may already have been settled by the wallet activity ingestor
+    (``manage.py ingest_wallet_activity``); confirming again with the same
+    signature returns the completed trade, and confirming while it is
+    being settled returns 202 with its current status.
+
     POST /api/v1/gold/sell/confirm
     Body: {
         "exchange_id": 123,
@@ -691,132 +617,39 @@ def sell_confirm(request):
     tx_signature = serializer.validated_data['tx_signature']
 
     try:
-        # Get transaction record
-        with db_transaction.atomic():
-            gold_tx = GoldTransaction.objects.select_for_update().get(id=exchange_id)
-
-            # Check status
-            if gold_tx.status != 'pending':
-                return Response(
-                    {'error': f'Transaction is not pending (current status: {gold_tx.status})'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Check expiration
-            if gold_tx.is_expired:
-                gold_tx.mark_failed('Quote expired')
-                return Response(
-                    {'error': 'Quote has expired'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Update status to processing
-            gold_tx.status = 'processing'
-            gold_tx.save()
-
-        # Verify transaction (burn + SOL payout)
-        try:
-            service = GoldTokenService()
-
-            logger.info(f"Verifying sell transaction: {tx_signature}")
-
-            # Wait for confirmation
-            import time
-            time.sleep(2)
-
-            # Verify burn transaction was successful
-            burn_verified = service.verify_burn_transaction(
-                tx_signature,
-                gold_tx.token_amount
-            )
-
-            if not burn_verified:
-                gold_tx.mark_failed('Failed to verify token burn on-chain')
-                return Response(
-                    {'error': 'Failed to verify token burn'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Send SOL to user from liquidity wallet
-            user_pubkey = Pubkey.from_string(gold_tx.user_wallet)
-            logger.info(f"Sending {gold_tx.sol_amount} SOL to user {user_pubkey}")
-
-            from solana.rpc.api import Client
-            from solders.system_program import transfer, TransferParams
-            from solders.message import Message
-
-            client = Client(settings.SOLANA_RPC_URL)
-
-            # Create SOL transfer from liquidity wallet to user
-            transfer_instruction = transfer(TransferParams(
-                from_pubkey=service.mint_authority.pubkey(),  # liquidity wallet
-                to_pubkey=user_pubkey,
-                lamports=int(gold_tx.sol_amount * Decimal('1000000000'))
-            ))
-
-            # Get recent blockhash
-            recent_blockhash = client.get_latest_blockhash().value.blockhash
-
-            # Build and sign transaction with liquidity wallet
-            message = Message.new_with_blockhash(
-                [transfer_instruction],
-                service.mint_authority.pubkey(),  # liquidity wallet pays and signs
-                recent_blockhash
-            )
-
-            # Sign and send transaction
-            sol_transfer_tx = SolanaTransaction([service.mint_authority], message, recent_blockhash)
-            tx_bytes = bytes(sol_transfer_tx)
-            sol_transfer_result = client.send_raw_transaction(tx_bytes)
-            sol_transfer_signature = str(sol_transfer_result.value)
-
-            logger.info(f"SOL transfer completed: {sol_transfer_signature}")
-
-            # Get user's ATA
-            user_ata = service.get_or_create_associated_token_account(user_pubkey)
-
-            # Update transaction record
-            gold_tx.tx_signature = tx_signature
-            gold_tx.user_token_account = str(user_ata)
-            gold_tx.status = 'completed'
-            gold_tx.completed_at = timezone.now()
-            gold_tx.status_message = f'Sold {gold_tx.token_amount} SOLGOLD for {gold_tx.sol_amount} SOL (payout: {sol_transfer_signature})'
-
-            try:
-                gold_tx.save()
-            except Exception as save_error:
-                logger.error(f"Failed to save transaction: {save_error}")
-                raise
-
-            # Mark quote as used
-            if gold_tx.quote_id:
-                ExchangeQuote.objects.filter(quote_id=gold_tx.quote_id).update(used=True)
-
-            return Response({
-                'status': 'completed',
-                'tx_signature': tx_signature,
-                'sgold_burned': float(gold_tx.token_amount),
-                'sol_received': float(gold_tx.sol_amount),
-                'user_ata': str(user_ata),
-                'message': f'Successfully sold {gold_tx.token_amount} SOLGOLD for {gold_tx.sol_amount} SOL'
-            }, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            logger.error(f"Error processing sell transaction: {e}", exc_info=True)
-            gold_tx.mark_failed(f'Error processing transaction: {str(e)}')
-            return Response(
-                {'error': 'Failed to process transaction', 'detail': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
+        gold_tx = claim_pending(exchange_id, tx_signature)
     except GoldTransaction.DoesNotExist:
         return Response(
             {'error': 'Transaction not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+    except AlreadySettled as e:
+        return Response(sell_payload(e.gold_tx), status=status.HTTP_200_OK)
+    except SettlementInProgress as e:
+        return Response(processing_payload(e.gold_tx), status=status.HTTP_202_ACCEPTED)
+    except SettlementError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"Error confirming sell: {e}", exc_info=True)
         return Response(
             {'error': 'Failed to confirm transaction', 'detail': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+    # Verify transaction (burn + SOL payout)
+    try:
+        service = GoldTokenService()
+
+        logger.info(f"Verifying sell transaction: {tx_signature}")
+
+        return Response(settle_sell(gold_tx, tx_signature, service), status=status.HTTP_200_OK)
+
+    except SettlementError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error processing sell transaction: {e}", exc_info=True)
+        gold_tx.mark_failed(f'Error processing transaction: {str(e)}')
+        return Response(
+            {'error': 'Failed to process transaction', 'detail': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -1,13 +1,13 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import UploadedImage
+from .models import ImageReference, UploadedImage
 
 @admin.register(UploadedImage)
 class UploadedImageAdmin(admin.ModelAdmin):
     list_display = ['thumbnail', 'original_filename', 'filename', 'content_type', 'size_display', 'uploaded_at']
     list_filter = ['content_type', 'uploaded_at']
     search_fields = ['original_filename', 'filename', 'used_in_sections']
-    readonly_fields = ['id', 'filename', 'size', 'content_type', 'uploaded_at', 'image_preview', 'used_in_sections']
+    readonly_fields = ['id', 'filename', 'size', 'content_type', 'width', 'height', 'source', 'uploaded_at', 'image_preview', 'referenced_by']
     
     def thumbnail(self, obj):
         return format_html(
@@ -33,15 +33,21 @@ class UploadedImageAdmin(admin.ModelAdmin):
         return f"{size:.1f} GB"
     size_display.short_description = 'Size'
     
+    def referenced_by(self, obj):
+        """Content using this image, from the reference index"""
+        references = ImageReference.objects.filter(filename=obj.filename).order_by('owner_type', 'owner_id')
+        return ', '.join(f"{ref.get_owner_type_display()}: {ref.owner_id}" for ref in references) or 'Not referenced'
+    referenced_by.short_description = 'Referenced by'
+    
     fieldsets = (
         ('Image Information', {
-            'fields': ('id', 'original_filename', 'filename', 'content_type', 'size', 'uploaded_at')
+            'fields': ('id', 'original_filename', 'filename', 'content_type', 'size', 'width', 'height', 'source', 'uploaded_at')
         }),
         ('Preview', {
             'fields': ('image_preview',)
         }),
         ('Usage Tracking', {
-            'fields': ('used_in_sections',),
+            'fields': ('referenced_by',),
             'classes': ('collapse',)
         })
     )
@@ -0,0 +1,274 @@
+"""
+Tiered cache in front of UploadedImage.
+
+- memory: a per-process LRU bounded by IMAGE_CACHE_MEMORY_BYTES, holding
+  images of at most IMAGE_CACHE_MEMORY_MAX_ITEM bytes (logos, icons);
+- disk: IMAGE_CACHE_DIR, shared by the workers on a host and bounded by
+  IMAGE_CACHE_DISK_BYTES, for larger images. Files are named by content hash
+  and served with FileResponse, which hands them to the server's sendfile.
+
+Entries are keyed by filename and carry the image's content hash. A hit is
+served without touching the database; after IMAGE_CACHE_TTL seconds the
+entry is revalidated with a query for the hash alone, and dropped if the
+image changed or was deleted. Saves and deletes in this process evict at
+once.
+
+Both tiers are filled from the stream of a full response on a miss, so
+caching never costs an extra read of the blob. Lookups are counted in
+``image_cache_lookups_total`` on ``/metrics``.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from gold_exchange.instrumentation import Counter, register
+
+from .models import UploadedImage
+
+logger = logging.getLogger(__name__)
+
+LOOKUPS = register(Counter(
+    'image_cache_lookups_total',
+    'Image requests by cache outcome (memory_hit, disk_hit, miss).',
+    ('result',),
+))
+
+# Rough per-entry bookkeeping cost counted against the memory budget
+ENTRY_OVERHEAD = 512
+
+
+@dataclass
+class CachedImage:
+    """Metadata of a cached image, plus its bytes (memory tier) or file (disk tier)"""
+    filename: str
+    original_filename: str
+    content_type: str
+    size: int
+    content_hash: str
+    uploaded_at: datetime
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+    checked_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_image(cls, image: UploadedImage, **kwargs) -> 'CachedImage':
+        return cls(
+            filename=image.filename,
+            original_filename=image.original_filename,
+            content_type=image.content_type,
+            size=image.size,
+            content_hash=image.content_hash,
+            uploaded_at=image.uploaded_at,
+            **kwargs,
+        )
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.content_hash}"'
+
+    @property
+    def cost(self) -> int:
+        return ENTRY_OVERHEAD + len(self.data or b'')
+
+
+class ImageCache:
+    """
+    Memory LRU and disk directory of image bytes.
+
+    Args:
+        memory_bytes: Memory budget for this process (0 disables the cache)
+        memory_max_item: Largest image kept in memory
+        directory: Disk tier directory ('' disables the tier)
+        disk_bytes: Disk tier budget
+        ttl: Seconds a hit is trusted before the hash is checked again
+    """
+
+    def __init__(self, memory_bytes: int, memory_max_item: int, directory: str, disk_bytes: int, ttl: float):
+        self.memory_bytes = memory_bytes
+        self.memory_max_item = memory_max_item
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, CachedImage]' = OrderedDict()
+        self._used = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory_bytes > 0
+
+    def get(self, filename: str) -> Optional[CachedImage]:
+        """Cached image for ``filename``, revalidating it first once the TTL has passed"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                self._entries.move_to_end(filename)
+        if entry is None:
+            return None
+
+        if time.monotonic() - entry.checked_at >= self.ttl:
+            current = UploadedImage.objects.filter(filename=filename).values_list('content_hash', flat=True).first()
+            if current != entry.content_hash:
+                self.evict(filename)
+                return None
+            entry.checked_at = time.monotonic()
+
+        if entry.path is not None and not os.path.exists(entry.path):
+            # Pruned by another worker
+            self.evict(filename)
+            return None
+        LOOKUPS.inc('memory_hit' if entry.data is not None else 'disk_hit')
+        return entry
+
+    def lookup_disk(self, image: UploadedImage) -> Optional[CachedImage]:
+        """
+        After a memory miss: adopt the disk file of this image's content, if a
+        worker on this host already wrote one.
+        """
+        if not self.enabled or not image.content_hash:
+            return None
+        path = self.path_for(image.content_hash)
+        if not self.directory or not os.path.exists(path):
+            LOOKUPS.inc('miss')
+            return None
+        LOOKUPS.inc('disk_hit')
+        entry = CachedImage.from_image(image, path=path)
+        self._store(entry)
+        return entry
+
+    def fill(self, image: UploadedImage, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """
+        Pass a full image body through, caching it once it has been read to the end.
+
+        Args:
+            image: The image being served (metadata fields only)
+            chunks: Its complete body
+        """
+        if not self.enabled or not image.content_hash:
+            yield from chunks
+        elif image.size <= self.memory_max_item:
+            buffer = []
+            for chunk in chunks:
+                buffer.append(chunk)
+                yield chunk
+            data = b''.join(buffer)
+            if len(data) == image.size:
+                self._store(CachedImage.from_image(image, data=data))
+        elif self.directory and image.size <= self.disk_bytes:
+            yield from self._fill_disk(image, chunks)
+        else:
+            yield from chunks
+
+    def _fill_disk(self, image: UploadedImage, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        path = self.path_for(image.content_hash)
+        handle = tempfile.NamedTemporaryFile(dir=self.directory, prefix='.fill-', delete=False)
+        written = 0
+        try:
+            with handle:
+                for chunk in chunks:
+                    handle.write(chunk)
+                    written += len(chunk)
+                    yield chunk
+            if written == image.size:
+                os.replace(handle.name, path)
+                self._store(CachedImage.from_image(image, path=path))
+                self.prune_disk()
+        finally:
+            # Client went away or the image changed size: drop the partial file
+            if os.path.exists(handle.name):
+                os.unlink(handle.name)
+
+    def path_for(self, content_hash: str) -> str:
+        return os.path.join(self.directory, content_hash)
+
+    def _store(self, entry: CachedImage):
+        with self._lock:
+            previous = self._entries.pop(entry.filename, None)
+            if previous is not None:
+                self._used -= previous.cost
+            self._entries[entry.filename] = entry
+            self._used += entry.cost
+            while self._used > self.memory_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._used -= evicted.cost
+
+    def evict(self, filename: str):
+        with self._lock:
+            entry = self._entries.pop(filename, None)
+            if entry is not None:
+                self._used -= entry.cost
+
+    def prune_disk(self):
+        """Delete the least recently written files until the disk tier is within budget"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith('.'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        if removed:
+            logger.info(f"Pruned {removed} files from the image disk cache")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._used = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """The process-wide image cache, configured from IMAGE_CACHE_* settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache(
+                    memory_bytes=settings.IMAGE_CACHE_MEMORY_BYTES,
+                    memory_max_item=settings.IMAGE_CACHE_MEMORY_MAX_ITEM,
+                    directory=settings.IMAGE_CACHE_DIR,
+                    disk_bytes=settings.IMAGE_CACHE_DISK_BYTES,
+                    ttl=settings.IMAGE_CACHE_TTL,
+                )
+    return _cache
+
+
+@receiver(setting_changed)
+def _reset_image_cache(setting, **kwargs):
+    global _cache
+    if setting.startswith('IMAGE_CACHE'):
+        _cache = None
+
+
+@receiver([post_save, post_delete], sender=UploadedImage)
+def _evict_image(sender, instance, **kwargs):
+    if _cache is not None:
+        _cache.evict(instance.filename)
@@ -0,0 +1,259 @@
+"""
+Streaming delivery of UploadedImage blobs.
+
+The image row is fetched without its ``image_data`` column; the blob is read
+in IMAGE_STREAM_CHUNK_SIZE slices with ``SUBSTR`` (``substring`` on bytea in
+PostgreSQL) and streamed to the client, so a worker holds at most one chunk
+of an image at a time. The first chunk comes back with the metadata query,
+so images smaller than a chunk still cost a single query.
+
+Single-range ``Range: bytes=`` requests are answered with 206 Partial Content.
+
+Responses carry an ETag (the content hash stored at upload) and
+Last-Modified; revalidations are answered with 304 from a metadata-only
+query. ``conditional`` is shared with the media file view.
+
+Hot images are served from the tiered cache in images.cache, without a
+database round trip. Images moved to object storage (images.storage) are
+streamed from their stored object instead of the blob column.
+"""
+import re
+from datetime import datetime
+from functools import partial
+from typing import IO, Callable, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import BinaryField
+from django.db.models.functions import Substr
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from .cache import CachedImage, get_image_cache
+from .models import UploadedImage
+from .renditions import negotiate
+from .storage import open_image
+
+# Columns needed to answer a request without touching the blob
+METADATA_FIELDS = (
+    'id', 'filename', 'original_filename', 'content_type', 'size', 'content_hash', 'storage_name', 'uploaded_at',
+)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range`` header.
+
+    Args:
+        header: Range header value
+        size: Length of the resource in bytes
+
+    Returns:
+        Inclusive (start, end) byte positions, or None when the header should
+        be ignored (malformed, or several ranges) and the whole image served
+
+    Raises:
+        ValueError: The range is well-formed but outside the image (416)
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError(header)
+    return start, end
+
+
+def conditional(request, response, etag: str, last_modified: datetime):
+    """
+    Set ETag and Last-Modified on ``response`` and evaluate the request's preconditions.
+
+    Returns:
+        ``response``, or a 304 / 412 response to send instead
+    """
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    return get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()), response=response)
+
+
+def range_applies(request, etag: str, last_modified: datetime) -> bool:
+    """Whether ``If-Range`` (if sent) still matches, so a Range header may be honoured"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified.timestamp())
+
+
+def blob_slice(start: int, length: int) -> Substr:
+    """``image_data[start:start + length]`` as a database expression (SUBSTR is 1-based)"""
+    return Substr('image_data', start + 1, length, output_field=BinaryField())
+
+
+def iter_blob(image_id, start: int, end: int, head: bytes, chunk_size: int) -> Iterator[bytes]:
+    """
+    Yield bytes ``start..end`` (inclusive) of an image's blob.
+
+    Args:
+        image_id: UploadedImage primary key
+        start: First byte position
+        end: Last byte position
+        head: Bytes already read from ``start`` by the metadata query
+        chunk_size: Bytes fetched per query
+    """
+    head = head[:end - start + 1]
+    if head:
+        yield head
+    position = start + len(head)
+    while position <= end:
+        chunk = UploadedImage.objects.filter(pk=image_id).values_list(
+            blob_slice(position, min(chunk_size, end - position + 1)), flat=True
+        ).first()
+        if not chunk:
+            # Image deleted mid-stream; the client sees a short body
+            return
+        yield bytes(chunk)
+        position += len(chunk)
+
+
+def resolve_range(request, image):
+    """
+    The byte range to send for ``image`` (an UploadedImage or CachedImage).
+
+    Returns:
+        (start, end, status) for a 200 or 206, or a 416 HttpResponse
+    """
+    range_header = request.headers.get('Range', '')
+    if range_header and range_applies(request, image.etag, image.uploaded_at):
+        try:
+            byte_range = parse_range(range_header, image.size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{image.size}'
+            return response
+        if byte_range:
+            return (*byte_range, 206)
+    return 0, image.size - 1, 200
+
+
+def finish(request, response, image, start: int, end: int):
+    """Add the image headers to ``response`` and evaluate conditional requests"""
+    response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    if response.status_code == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{image.size}'
+    response['Cache-Control'] = 'public, max-age=31536000'  # Cache for 1 year
+    response['Content-Disposition'] = f'inline; filename="{image.original_filename}"'
+    result = conditional(request, response, image.etag, image.uploaded_at)
+    if result is not response:
+        response.close()
+    return result
+
+
+def iter_file(opener: Callable[[], IO[bytes]], start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    """Yield bytes ``start..end`` (inclusive) of the file ``opener()`` opens, on first read"""
+    with opener() as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_cached(request, entry: CachedImage):
+    """Serve an image from the memory or disk cache tier"""
+    resolved = resolve_range(request, entry)
+    if isinstance(resolved, HttpResponse):
+        return resolved
+    start, end, status = resolved
+
+    if entry.data is not None:
+        response = HttpResponse(entry.data[start:end + 1], status=status, content_type=entry.content_type)
+    elif status == 200:
+        # Whole file: the server can sendfile() it
+        response = FileResponse(open(entry.path, 'rb'), content_type=entry.content_type)
+    else:
+        body = iter_file(partial(open, entry.path, 'rb'), start, end, settings.IMAGE_STREAM_CHUNK_SIZE)
+        response = StreamingHttpResponse(body, status=status, content_type=entry.content_type)
+    return finish(request, response, entry, start, end)
+
+
+def serve_image(request, filename: str):
+    """
+    Serve an UploadedImage from the image cache or stream it from the
+    database or object storage, honouring conditional and single-range ``Range`` requests.
+    Renditions are chosen with ``?w=<pixels>`` and the ``Accept`` header.
+
+    Args:
+        request: The HTTP request
+        filename: UploadedImage.filename
+
+    Returns:
+        200 or 206 response, 304 for current cached copies, or 416 for
+        unsatisfiable ranges
+    """
+    filename, negotiated = negotiate(request, filename)
+    response = _serve(request, filename)
+    if negotiated:
+        patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def _serve(request, filename: str):
+    cache = get_image_cache()
+    entry = cache.get(filename)
+    if entry is not None:
+        return serve_cached(request, entry)
+
+    chunk_size = settings.IMAGE_STREAM_CHUNK_SIZE
+    revalidating = 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+
+    queryset = UploadedImage.objects.only(*METADATA_FIELDS).filter(filename=filename)
+    head_start = None
+    if not revalidating:
+        # Byte the metadata query starts reading from; refined once the size is known
+        match = RANGE_RE.match(request.headers.get('Range', '').strip())
+        head_start = int(match.group(1)) if match and match.group(1) else 0
+        queryset = queryset.annotate(head=blob_slice(head_start, chunk_size))
+    image = queryset.first()
+    if image is None:
+        raise Http404("Image not found")
+
+    entry = cache.lookup_disk(image)
+    if entry is not None:
+        return serve_cached(request, entry)
+
+    resolved = resolve_range(request, image)
+    if isinstance(resolved, HttpResponse):
+        return resolved
+    start, end, status = resolved
+
+    head = bytes(image.head or b'') if start == head_start else b''
+    image.head = None  # Not kept by the cache entry
+    if request.method == 'HEAD':
+        body = iter(())
+    else:
+        # Lazy: nothing more is read if the request turns out to be a revalidation
+        if image.storage_name:
+            body = iter_file(partial(open_image, image), start, end, chunk_size)
+        else:
+            body = iter_blob(image.pk, start, end, head, chunk_size)
+        if status == 200:
+            body = cache.fill(image, body)
+
+    response = StreamingHttpResponse(body, status=status, content_type=image.content_type)
+    return finish(request, response, image, start, end)
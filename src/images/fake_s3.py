@@ -0,0 +1,163 @@
+"""
+Local stand-in for an S3-compatible object store.
+
+Implements the object calls images.storage.S3Storage makes (PUT, GET with
+Range, HEAD, DELETE on path-style URLs) in memory, and checks their
+Signature Version 4 against its own credentials. Used by the images tests.
+"""
+import logging
+import re
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .storage import sign_request
+
+logger = logging.getLogger(__name__)
+
+AUTHORIZATION_RE = re.compile(r'Credential=([^/]+)/[^,]+, SignedHeaders=([^,]+), Signature=([0-9a-f]+)')
+
+
+class FakeS3:
+    """
+    In-memory buckets behind a threaded HTTP server.
+
+    Usage:
+        s3 = FakeS3(buckets=['images'])
+        url = s3.start()
+        ...
+        s3.stop()
+    """
+
+    def __init__(self, buckets=('images',), access_key: str = 'test-access', secret_key: str = 'test-secret',
+                 region: str = 'us-east-1', host: str = '127.0.0.1', port: int = 0):
+        self.objects: Dict[str, Dict[str, bytes]] = {bucket: {} for bucket in buckets}
+        # (bucket, key) -> time of the last PUT
+        self.modified: Dict[Tuple[str, str], datetime] = {}
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.host = host
+        self.port = port
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the endpoint URL"""
+        handler = type('FakeS3Handler', (_Handler,), {'s3': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self._server.server_address[1]}'
+
+    def authorized(self, method: str, path: str, headers) -> bool:
+        """Whether a request carries a valid signature for these credentials"""
+        match = AUTHORIZATION_RE.search(headers.get('Authorization', ''))
+        if not match or match.group(1) != self.access_key:
+            return False
+        signed = match.group(2).split(';')
+        try:
+            now = datetime.strptime(headers['X-Amz-Date'], '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+        except (KeyError, ValueError):
+            return False
+        expected = sign_request(
+            method,
+            f'http://{headers["Host"]}{path}',
+            {name: headers.get(name, '') for name in signed if name not in ('host', 'x-amz-date', 'x-amz-content-sha256')},
+            headers.get('X-Amz-Content-Sha256', ''),
+            self.access_key,
+            self.secret_key,
+            self.region,
+            now,
+        )
+        return expected['authorization'] == headers['Authorization']
+
+    def locate(self, path: str) -> Tuple[str, str]:
+        bucket, _, key = unquote(urlsplit(path).path).lstrip('/').partition('/')
+        return bucket, key
+
+
+class _Handler(BaseHTTPRequestHandler):
+    s3: FakeS3
+    protocol_version = 'HTTP/1.1'
+
+    def _start(self):
+        self.s3.requests.append((self.command, self.path))
+        if not self.s3.authorized(self.command, self.path, self.headers):
+            self._reply(403, b'<Error><Code>SignatureDoesNotMatch</Code></Error>')
+            return None, None
+        name, key = self.s3.locate(self.path)
+        bucket = self.s3.objects.get(name)
+        if bucket is None:
+            self._reply(404, b'<Error><Code>NoSuchBucket</Code></Error>')
+            return None, None
+        return bucket, key
+
+    def _reply(self, status: int, body: bytes = b'', headers: dict = None, send_body: bool = True):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        bucket, key = self._start()
+        if bucket is None:
+            return
+        with self.s3._lock:
+            bucket[key] = body
+            self.s3.modified[self.s3.locate(self.path)] = datetime.now(timezone.utc)
+        self._reply(200)
+
+    def do_GET(self, send_body: bool = True):
+        bucket, key = self._start()
+        if bucket is None:
+            return
+        data = bucket.get(key)
+        if data is None:
+            self._reply(404, b'<Error><Code>NoSuchKey</Code></Error>', send_body=send_body)
+            return
+        last_modified = {'Last-Modified': format_datetime(self.s3.modified[self.s3.locate(self.path)], usegmt=True)}
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if match is None:
+            self._reply(200, data, last_modified, send_body=send_body)
+            return
+        start = int(match.group(1))
+        if start >= len(data):
+            self._reply(416, headers={'Content-Range': f'bytes */{len(data)}'}, send_body=send_body)
+            return
+        end = min(int(match.group(2)), len(data) - 1) if match.group(2) else len(data) - 1
+        self._reply(206, data[start:end + 1], {'Content-Range': f'bytes {start}-{end}/{len(data)}'}, send_body)
+
+    def do_HEAD(self):
+        self.do_GET(send_body=False)
+
+    def do_DELETE(self):
+        bucket, key = self._start()
+        if bucket is None:
+            return
+        with self.s3._lock:
+            bucket.pop(key, None)
+        self._reply(204)
+
+    def log_message(self, format, *args):
+        logger.debug(f"fake S3: {format % args}")
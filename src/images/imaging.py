@@ -0,0 +1,100 @@
+"""
+Pillow encoding for image renditions.
+
+Kept free of Django imports so it can run in a spawned process pool.
+"""
+import io
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps
+
+# MIME type -> Pillow format
+FORMATS = {
+    'image/avif': 'AVIF',
+    'image/webp': 'WEBP',
+    'image/jpeg': 'JPEG',
+    'image/png': 'PNG',
+}
+
+# Bytes needed to recognise every format sniff() knows
+SNIFF_LENGTH = 12
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """
+    Identify an image by its magic bytes, ignoring what the client claimed.
+
+    Args:
+        head: The first SNIFF_LENGTH (or more) bytes of the file
+
+    Returns:
+        MIME type, or None when the bytes are not an accepted image format
+    """
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head[4:8] == b'ftyp' and head[8:12] in (b'avif', b'avis'):
+        return 'image/avif'
+    if head[:4] == b'\x00\x00\x01\x00':
+        return 'image/x-icon'
+    return None
+
+
+def can_encode(content_type: str) -> bool:
+    """Whether the installed Pillow can write ``content_type`` (AVIF needs Pillow 11.3+ or a plugin)"""
+    Image.init()
+    return FORMATS.get(content_type) in Image.SAVE
+
+
+def probe(data: bytes) -> Tuple[int, int, int]:
+    """
+    Read an image's dimensions from its header.
+
+    Returns:
+        (width, height, frame count)
+
+    Raises:
+        PIL.UnidentifiedImageError: Not an image Pillow can read
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        # EXIF orientation 5-8 swaps the axes
+        if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            width, height = height, width
+        return width, height, getattr(image, 'n_frames', 1)
+
+
+def render(data: bytes, width: int, content_type: str, quality: int) -> Tuple[bytes, int, int]:
+    """
+    Resize an image to at most ``width`` pixels wide and encode it as ``content_type``.
+
+    Args:
+        data: Source image bytes
+        width: Maximum width; smaller images are not upscaled
+        content_type: Output MIME type (a key of FORMATS)
+        quality: Encoder quality for lossy formats
+
+    Returns:
+        (encoded bytes, width, height)
+    """
+    output_format = FORMATS[content_type]
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        if output_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+            image = image.convert('RGBA')
+
+        options = {'quality': quality} if output_format in ('JPEG', 'WEBP', 'AVIF') else {}
+        if output_format in ('JPEG', 'PNG'):
+            options['optimize'] = True
+        buffer = io.BytesIO()
+        image.save(buffer, output_format, **options)
+        return buffer.getvalue(), image.width, image.height
@@ -0,0 +1,71 @@
+"""
+Delete uploaded images that no content references.
+
+The reference index (images.references) is rebuilt first, unless
+--no-reindex is given, so deletions never rest on a stale index. Originals
+uploaded within --min-age-hours are kept, since an image is uploaded before
+the section that uses it is saved. Renditions are deleted with their
+original, and object storage files once no row points at them and they have
+not been written (or re-stored by a duplicate upload) within the same period.
+
+Deleted blobs only shrink PostgreSQL after VACUUM (FULL) on
+images_uploadedimage.
+
+Usage:
+    python manage.py gc_images [--dry-run] [--min-age-hours 24] [--batch-size 100]
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from images import references
+from images.models import UploadedImage
+from images.storage import release_objects
+from images.uploads import prune_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete uploaded images (and their renditions) that no section, page or site setting references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List what would be deleted')
+        parser.add_argument('--min-age-hours', type=float, default=24, help='Keep images uploaded more recently')
+        parser.add_argument('--batch-size', type=int, default=100, help='Originals deleted per transaction')
+        parser.add_argument('--no-reindex', action='store_true', help='Trust the incrementally maintained index')
+
+    def handle(self, *args, **options):
+        if not options['no_reindex']:
+            count = references.rebuild()
+            self.stdout.write(f"Indexed {count} image references")
+
+        min_age = timedelta(hours=options['min_age_hours'])
+        cutoff = timezone.now() - min_age
+        candidates = references.unreferenced_images().filter(uploaded_at__lt=cutoff).order_by('pk')
+
+        if options['dry_run']:
+            for filename, size in candidates.values_list('filename', 'size'):
+                self.stdout.write(f"{filename} ({size} bytes)")
+            self.stdout.write(self.style.SUCCESS(f"{candidates.count()} images would be deleted"))
+            return
+
+        deleted = freed = released = 0
+        while True:
+            with transaction.atomic():
+                batch = list(candidates.values_list('pk', flat=True)[:options['batch_size']])
+                if not batch:
+                    break
+                group = UploadedImage.objects.filter(Q(pk__in=batch) | Q(source__in=batch))
+                freed += group.aggregate(total=Sum('size'))['total'] or 0
+                names = list(group.values_list('storage_name', flat=True))
+                deleted += group.delete()[1].get('images.UploadedImage', 0)
+            # After commit, so a rollback never leaves rows without their objects
+            released += release_objects(names, min_age)
+
+        sessions = prune_sessions()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} images ({freed} bytes), {released} stored objects, "
+            f"{sessions} expired upload sessions"
+        ))
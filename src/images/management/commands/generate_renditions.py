@@ -0,0 +1,33 @@
+"""
+Create missing responsive renditions of uploaded images.
+
+New uploads get their renditions in the background; run this once for
+images uploaded before renditions existed, or after changing
+IMAGE_RENDITION_WIDTHS / IMAGE_RENDITION_FORMATS.
+
+Usage:
+    python manage.py generate_renditions [filename ...]
+"""
+from django.core.management.base import BaseCommand
+
+from images.models import UploadedImage
+from images.renditions import generate_renditions
+
+
+class Command(BaseCommand):
+    help = 'Create missing resized and WebP/AVIF renditions of uploaded images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filenames', nargs='*', help='Only these images (default: all originals)')
+
+    def handle(self, *args, **options):
+        filenames = options['filenames'] or (
+            UploadedImage.objects.filter(source__isnull=True).order_by('uploaded_at').values_list('filename', flat=True).iterator()
+        )
+        total = 0
+        for filename in filenames:
+            created = generate_renditions(filename)
+            if created:
+                self.stdout.write(f"{filename}: {created} renditions")
+            total += created
+        self.stdout.write(self.style.SUCCESS(f"Created {total} renditions"))
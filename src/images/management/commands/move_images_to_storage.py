@@ -0,0 +1,73 @@
+"""
+Move image blobs out of the database into IMAGE_STORAGE.
+
+Each blob is streamed out in IMAGE_STREAM_CHUNK_SIZE slices and written
+under its content hash, so duplicates are stored once; the row then points
+at the object and its image_data is cleared. Rows are processed in batches
+and committed one at a time, so the command can be interrupted and re-run.
+Run VACUUM (FULL) on images_uploadedimage afterwards to return the space.
+
+Usage:
+    python manage.py move_images_to_storage [--batch-size 50] [--limit N]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Length
+
+from images.delivery import iter_blob
+from images.models import UploadedImage
+from images.storage import get_image_storage, store_content
+
+
+class Command(BaseCommand):
+    help = 'Move UploadedImage blobs from the database to IMAGE_STORAGE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Rows selected per query')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after moving this many images')
+
+    def handle(self, *args, **options):
+        storage = get_image_storage()
+        if storage is None:
+            raise CommandError("Set IMAGE_STORAGE to 'filesystem' or 's3' first")
+
+        chunk_size = settings.IMAGE_STREAM_CHUNK_SIZE
+        limit = options['limit']
+        moved = written = moved_bytes = 0
+        failed = set()
+        while limit is None or moved < limit:
+            batch = list(
+                UploadedImage.objects.filter(storage_name='', image_data__isnull=False)
+                .exclude(pk__in=failed)
+                .annotate(blob_size=Length('image_data'))
+                .order_by('pk')
+                .values_list('pk', 'filename', 'blob_size')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            for pk, filename, blob_size in batch:
+                try:
+                    name, content_hash, size, created = store_content(
+                        storage, iter_blob(pk, 0, blob_size - 1, b'', chunk_size)
+                    )
+                except Exception as e:
+                    self.stderr.write(f"{filename}: {e}")
+                    failed.add(pk)
+                    continue
+                if size != blob_size:
+                    # Deleted or replaced while being read
+                    failed.add(pk)
+                    continue
+                UploadedImage.objects.filter(pk=pk, storage_name='').update(
+                    storage_name=name, content_hash=content_hash, image_data=None
+                )
+                moved += 1
+                written += created
+                moved_bytes += size
+                if limit is not None and moved >= limit:
+                    break
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} images ({moved_bytes} bytes) to {settings.IMAGE_STORAGE} storage: "
+            f"{written} new objects, {moved - written} deduplicated, {len(failed)} failed"
+        ))
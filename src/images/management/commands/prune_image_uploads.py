@@ -0,0 +1,20 @@
+"""
+Delete resumable image uploads that were never finished.
+
+Sessions older than IMAGE_UPLOAD_SESSION_TTL can no longer be resumed;
+this removes their rows and staging files. Run it daily, e.g. from cron.
+
+Usage:
+    python manage.py prune_image_uploads
+"""
+from django.core.management.base import BaseCommand
+
+from images.uploads import prune_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired resumable image upload sessions and their staging files'
+
+    def handle(self, *args, **options):
+        pruned = prune_sessions()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {pruned} expired upload sessions"))
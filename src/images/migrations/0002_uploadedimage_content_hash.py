@@ -0,0 +1,46 @@
+"""
+Store a SHA-256 of each image, computed once, for ETags.
+
+Existing rows are hashed in small batches since each one loads a blob.
+"""
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 20
+
+
+def hash_existing(apps, schema_editor):
+    UploadedImage = apps.get_model('images', 'UploadedImage')
+    rows = UploadedImage.objects.filter(content_hash='').only('pk', 'image_data').iterator(chunk_size=BATCH_SIZE)
+
+    batch = []
+    for image in rows:
+        image.content_hash = hashlib.sha256(image.image_data).hexdigest()
+        batch.append(image)
+        if len(batch) >= BATCH_SIZE:
+            UploadedImage.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    if batch:
+        UploadedImage.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("images", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="SHA-256 of image_data (hex), used as the ETag",
+                max_length=64,
+            ),
+        ),
+        migrations.RunPython(hash_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("images", "0002_uploadedimage_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="height",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Height in pixels", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="source",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Original image this is a rendition of",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="renditions",
+                to="images.uploadedimage",
+            ),
+        ),
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="width",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Width in pixels", null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="uploadedimage",
+            constraint=models.UniqueConstraint(
+                fields=("source", "width", "content_type"),
+                name="image_rendition_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.3 on 2026-10-18 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("images", "0003_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="storage_name",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                help_text="Object holding the image bytes in IMAGE_STORAGE, named by content hash",
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="uploadedimage",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="SHA-256 of the image bytes (hex), used as the ETag",
+                max_length=64,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="uploadedimage",
+            name="image_data",
+            field=models.BinaryField(
+                blank=True,
+                help_text="Actual image binary data stored in database (empty once moved to object storage)",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.3 on 2026-10-19 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("images", "0005_upload_session"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageReference",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("filename", models.CharField(db_index=True, max_length=255)),
+                (
+                    "owner_type",
+                    models.CharField(
+                        choices=[
+                            ("section", "Section"),
+                            ("page", "Page"),
+                            ("site_settings", "Site settings"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "owner_id",
+                    models.CharField(
+                        help_text="Primary key of the referencing object",
+                        max_length=100,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("owner_type", "owner_id", "filename"),
+                        name="image_reference_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,10 +1,12 @@
 from django.db import models
+import hashlib
 import uuid
 
 class UploadedImage(models.Model):
     """
-    Model to store uploaded images in the database for persistence across deployments.
-    Images are stored as binary data in PostgreSQL rather than on the filesystem.
+    Model to store uploaded images for persistence across deployments.
+    Image bytes live in PostgreSQL (image_data) or, with IMAGE_STORAGE set,
+    in content-addressed object storage (storage_name); see images.storage.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     filename = models.CharField(
@@ -24,11 +26,38 @@ class UploadedImage(models.Model):
         help_text="File size in bytes"
     )
     image_data = models.BinaryField(
-        help_text="Actual image binary data stored in database"
+        null=True,
+        blank=True,
+        help_text="Actual image binary data stored in database (empty once moved to object storage)"
+    )
+    storage_name = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text="Object holding the image bytes in IMAGE_STORAGE, named by content hash"
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="SHA-256 of the image bytes (hex), used as the ETag"
     )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
-    # Optional: Track which section uses this image
+    # Resized / re-encoded variants point at the upload they were made from
+    source = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='renditions',
+        help_text="Original image this is a rendition of"
+    )
+    width = models.PositiveIntegerField(null=True, blank=True, help_text="Width in pixels")
+    height = models.PositiveIntegerField(null=True, blank=True, help_text="Height in pixels")
+    
+    # Superseded by ImageReference (images.references); no longer maintained
     used_in_sections = models.JSONField(
         default=list,
         blank=True,
@@ -43,11 +72,67 @@ class UploadedImage(models.Model):
             models.Index(fields=['filename']),
             models.Index(fields=['-uploaded_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'width', 'content_type'], name='image_rendition_unique'),
+        ]
     
     def __str__(self):
         return f"{self.original_filename} ({self.filename})"
+
+    def save(self, *args, **kwargs):
+        # Hash once at upload; skipped when the blob was deferred and not loaded
+        if not self.content_hash and 'image_data' not in self.get_deferred_fields() and self.image_data:
+            self.content_hash = hashlib.sha256(self.image_data).hexdigest()
+        super().save(*args, **kwargs)
+
+    @property
+    def etag(self):
+        """Strong ETag for the image bytes"""
+        return f'"{self.content_hash or self.id.hex}"'
     
     @property
     def url(self):
         """Return the URL for accessing this image"""
         return f"/api/v1/images/{self.filename}"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload in progress (images.uploads).
+
+    The bytes received so far are in IMAGE_UPLOAD_DIR/<id>; the file's
+    length is the upload offset.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    original_filename = models.CharField(max_length=255)
+    size = models.PositiveIntegerField(help_text="Declared total size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.original_filename} ({self.id})"
+
+
+class ImageReference(models.Model):
+    """
+    A use of an uploaded image by site content, kept by images.references.
+
+    Rows name the image by filename, as content does, so references to images
+    that were never uploaded here (or are already gone) are indexed too.
+    """
+    OWNER_TYPES = [
+        ('section', 'Section'),
+        ('page', 'Page'),
+        ('site_settings', 'Site settings'),
+    ]
+
+    filename = models.CharField(max_length=255, db_index=True)
+    owner_type = models.CharField(max_length=20, choices=OWNER_TYPES)
+    owner_id = models.CharField(max_length=100, help_text="Primary key of the referencing object")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner_type', 'owner_id', 'filename'], name='image_reference_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} <- {self.owner_type}:{self.owner_id}"
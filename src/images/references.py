@@ -0,0 +1,116 @@
+"""
+Index of where uploaded images are used.
+
+Content refers to uploads by URL (``/api/v1/images/<filename>``, possibly
+absolute or with a ``?w=`` query) inside Section.content, Page.sections and
+the SiteSettings logo and favicon fields. Each save of those objects
+re-scans it and updates its ImageReference rows; deletes drop them.
+``rebuild`` re-scans everything, for the initial index and to repair
+changes made without signals (``QuerySet.update``, raw SQL, fixtures).
+
+``unreferenced_images`` is what ``manage.py gc_images`` deletes.
+"""
+import json
+import logging
+import re
+from typing import Callable, Dict, Iterable, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_delete, post_save
+
+from pages.models import Page
+from sections.models import Section
+from settings.models import SiteSettings
+
+from .models import ImageReference, UploadedImage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_URL_RE = re.compile(r'/api/v1/images/([\w.-]+)')
+
+# owner_type -> (model, text of the fields that may hold image URLs)
+INDEXED: Dict[str, Tuple[type, Callable]] = {
+    'section': (Section, lambda section: [json.dumps(section.content)]),
+    'page': (Page, lambda page: [json.dumps(page.sections)]),
+    'site_settings': (SiteSettings, lambda site: [
+        site.company_logo, site.company_logo_light, site.company_logo_dark, site.favicon,
+    ]),
+}
+
+
+def find_references(texts: Iterable[str]) -> Set[str]:
+    """Filenames of the uploaded images mentioned in ``texts``"""
+    return {filename for text in texts if text for filename in IMAGE_URL_RE.findall(text)}
+
+
+def index_object(owner_type: str, instance):
+    """Bring the references of one Section, Page or SiteSettings up to date"""
+    _, texts = INDEXED[owner_type]
+    found = find_references(texts(instance))
+    owner_id = str(instance.pk)
+    references = ImageReference.objects.filter(owner_type=owner_type, owner_id=owner_id)
+    with transaction.atomic():
+        current = set(references.values_list('filename', flat=True))
+        if current - found:
+            references.filter(filename__in=current - found).delete()
+        ImageReference.objects.bulk_create(
+            [ImageReference(filename=filename, owner_type=owner_type, owner_id=owner_id) for filename in found - current],
+            ignore_conflicts=True,
+        )
+
+
+def rebuild() -> int:
+    """
+    Re-scan all indexed content and replace the reference table.
+
+    Returns:
+        Number of references
+    """
+    references = []
+    for owner_type, (model, texts) in INDEXED.items():
+        for instance in model.objects.iterator():
+            references += [
+                ImageReference(filename=filename, owner_type=owner_type, owner_id=str(instance.pk))
+                for filename in find_references(texts(instance))
+            ]
+    with transaction.atomic():
+        ImageReference.objects.all().delete()
+        ImageReference.objects.bulk_create(references, batch_size=1000)
+    logger.info(f"Rebuilt image reference index: {len(references)} references")
+    return len(references)
+
+
+def unreferenced_images():
+    """
+    Original uploads that neither themselves nor any of their renditions are
+    referenced by content (renditions go with their original).
+    """
+    referenced = ImageReference.objects.filter(filename=OuterRef('filename'))
+    used_renditions = UploadedImage.objects.filter(source=OuterRef('pk')).filter(
+        Exists(ImageReference.objects.filter(filename=OuterRef('filename')))
+    )
+    return UploadedImage.objects.filter(~Exists(referenced), ~Exists(used_renditions), source__isnull=True)
+
+
+def _receivers(owner_type: str):
+    def saved(sender, instance, raw=False, **kwargs):
+        if raw:
+            # Fixture loading: the models may not all exist yet; run rebuild afterwards
+            return
+        try:
+            index_object(owner_type, instance)
+        except Exception as e:
+            # The index is rebuilt by gc_images; never fail the save over it
+            logger.error(f"Failed to index image references of {owner_type} {instance.pk}: {e}")
+
+    def deleted(sender, instance, **kwargs):
+        ImageReference.objects.filter(owner_type=owner_type, owner_id=str(instance.pk)).delete()
+
+    return saved, deleted
+
+
+for _owner_type, (_model, _) in INDEXED.items():
+    _saved, _deleted = _receivers(_owner_type)
+    post_save.connect(_saved, sender=_model, weak=False, dispatch_uid=f'image_references_saved_{_owner_type}')
+    post_delete.connect(_deleted, sender=_model, weak=False, dispatch_uid=f'image_references_deleted_{_owner_type}')
@@ -0,0 +1,269 @@
+"""
+Responsive renditions of uploaded images.
+
+Each upload gets width-bounded variants (IMAGE_RENDITION_WIDTHS narrower
+than the original) in its own format and in the modern formats of
+IMAGE_RENDITION_FORMATS, plus full-width modern-format copies. They are
+stored as UploadedImage rows linked to the original through ``source``,
+named ``<stem>-w<width>.<ext>`` (or ``<stem>.<ext>`` at full width), so the
+delivery path streams and caches them like any other image.
+
+Rendering is CPU-bound and kept off the request path: uploads schedule it
+on Celery when a broker is configured, otherwise on a background thread
+that encodes in a small process pool. A request for ``?w=`` on an image
+with no renditions yet is served the original and schedules them.
+
+``negotiate`` picks the variant for a request from ``?w=`` and ``Accept``.
+"""
+import logging
+import multiprocessing
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import FrozenSet, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from PIL import UnidentifiedImageError
+
+from . import imaging
+from .models import UploadedImage
+from .storage import blob_fields, read_image
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {
+    'image/avif': 'avif',
+    'image/webp': 'webp',
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+}
+
+# Width-bounded renditions keep the original's format; GIFs become PNG
+FALLBACK_FORMATS = {
+    'image/jpeg': 'image/jpeg',
+    'image/png': 'image/png',
+    'image/webp': 'image/webp',
+    'image/gif': 'image/png',
+}
+
+RENDITION_STEM_RE = re.compile(r'-w\d+$')
+
+# Source filenames whose rendition set is remembered per process
+AVAILABLE_CACHE_SIZE = 4096
+
+
+_formats: Optional[List[str]] = None
+
+
+def rendition_formats() -> List[str]:
+    """Modern formats to generate, in order of preference, that Pillow can encode here"""
+    global _formats
+    if _formats is None:
+        # Probing encoders initialises every Pillow plugin; do it once
+        _formats = [content_type for content_type in settings.IMAGE_RENDITION_FORMATS if imaging.can_encode(content_type)]
+    return _formats
+
+
+@receiver(setting_changed)
+def _reset_rendition_formats(setting, **kwargs):
+    global _formats
+    if setting == 'IMAGE_RENDITION_FORMATS':
+        _formats = None
+
+
+def rendition_filename(source_filename: str, width: Optional[int], content_type: str) -> str:
+    stem = source_filename.rsplit('.', 1)[0]
+    suffix = f'-w{width}' if width else ''
+    return f'{stem}{suffix}.{EXTENSIONS[content_type]}'
+
+
+def plan(image: UploadedImage, width: int) -> List[Tuple[Optional[int], str]]:
+    """
+    Renditions to make of an original ``width`` pixels wide.
+
+    Returns:
+        (bounded width, or None for full width; content type) pairs
+    """
+    modern = [content_type for content_type in rendition_formats() if content_type != image.content_type]
+    fallback = FALLBACK_FORMATS[image.content_type]
+    widths = sorted(w for w in settings.IMAGE_RENDITION_WIDTHS if w < width)
+    renditions = [(w, content_type) for w in widths for content_type in [*modern, fallback]]
+    return renditions + [(None, content_type) for content_type in modern]
+
+
+def generate_renditions(filename: str, executor=None) -> int:
+    """
+    Create the missing renditions of an uploaded image.
+
+    Args:
+        filename: Filename of the original
+        executor: Optional concurrent.futures executor to encode in
+
+    Returns:
+        Number of renditions created
+    """
+    image = UploadedImage.objects.filter(filename=filename, source__isnull=True).first()
+    if image is None or image.content_type not in FALLBACK_FORMATS:
+        return 0
+    data = read_image(image)
+    try:
+        width, height, frames = imaging.probe(data)
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"Cannot make renditions of {filename}: {e}")
+        return 0
+    if (image.width, image.height) != (width, height):
+        UploadedImage.objects.filter(pk=image.pk).update(width=width, height=height)
+    if frames > 1:
+        # Resizing would drop the animation
+        return 0
+
+    existing = set(image.renditions.values_list('filename', flat=True))
+    jobs = [
+        (bound, content_type) for bound, content_type in plan(image, width)
+        if rendition_filename(filename, bound, content_type) not in existing
+    ]
+    arguments = [(data, bound or width, content_type, settings.IMAGE_RENDITION_QUALITY) for bound, content_type in jobs]
+    if executor is not None:
+        results = executor.map(imaging.render, *zip(*arguments)) if arguments else []
+    else:
+        results = (imaging.render(*args) for args in arguments)
+
+    created = 0
+    for (bound, content_type), (encoded, out_width, out_height) in zip(jobs, results):
+        try:
+            UploadedImage.objects.create(
+                filename=rendition_filename(filename, bound, content_type),
+                original_filename=image.original_filename,
+                content_type=content_type,
+                size=len(encoded),
+                source=image,
+                width=out_width,
+                height=out_height,
+                **blob_fields([encoded]),
+            )
+            created += 1
+        except IntegrityError:
+            # Made concurrently by another worker
+            pass
+    logger.info(f"Created {created} renditions of {filename}")
+    return created
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executors() -> Tuple[ThreadPoolExecutor, ProcessPoolExecutor]:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forked children would inherit the web worker's database connections
+            _executor = (
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='renditions'),
+                ProcessPoolExecutor(settings.IMAGE_RENDITION_WORKERS, mp_context=multiprocessing.get_context('spawn')),
+            )
+    return _executor
+
+
+def _generate_in_background(filename: str, pool: ProcessPoolExecutor):
+    try:
+        generate_renditions(filename, executor=pool)
+    except Exception as e:
+        logger.error(f"Rendition generation failed for {filename}: {e}", exc_info=True)
+    finally:
+        connection.close()
+
+
+def schedule_renditions(filename: str):
+    """Generate an image's renditions off the request path (Celery, or a local process pool)"""
+    if getattr(settings, 'CELERY_BROKER_URL', ''):
+        from .tasks import generate_image_renditions
+        generate_image_renditions.delay(filename)
+        return
+    thread, pool = _get_executors()
+    thread.submit(_generate_in_background, filename, pool)
+
+
+_available: 'OrderedDict[str, Tuple[float, FrozenSet[str]]]' = OrderedDict()
+_available_lock = threading.Lock()
+# Originals this process already asked to render on demand
+_requested = set()
+_requested_lock = threading.Lock()
+
+
+def available_renditions(filename: str) -> FrozenSet[str]:
+    """Filenames of an image's renditions, remembered for IMAGE_CACHE_TTL seconds"""
+    now = time.monotonic()
+    with _available_lock:
+        cached = _available.get(filename)
+        if cached is not None and now - cached[0] < settings.IMAGE_CACHE_TTL:
+            _available.move_to_end(filename)
+            return cached[1]
+
+    names = frozenset(UploadedImage.objects.filter(source__filename=filename).values_list('filename', flat=True))
+    with _available_lock:
+        _available[filename] = (now, names)
+        _available.move_to_end(filename)
+        while len(_available) > AVAILABLE_CACHE_SIZE:
+            _available.popitem(last=False)
+    return names
+
+
+@receiver([post_save, post_delete], sender=UploadedImage)
+def _forget_renditions(sender, instance, **kwargs):
+    if instance.source_id is not None:
+        with _available_lock:
+            _available.clear()
+
+
+def negotiate(request, filename: str) -> Tuple[str, bool]:
+    """
+    Choose the variant of ``filename`` to serve for ``?w=`` and ``Accept``.
+
+    The width is rounded up to the next IMAGE_RENDITION_WIDTHS step, so
+    variants stay few and cacheable; the best accepted format that exists at
+    that width wins, then full-width modern formats, then the original.
+
+    Returns:
+        (filename to serve, whether the choice depends on the request's headers)
+    """
+    stem, _, extension = filename.rpartition('.')
+    if extension.lower() not in ('jpg', 'jpeg', 'png', 'gif', 'webp') or RENDITION_STEM_RE.search(stem):
+        return filename, False
+
+    try:
+        requested = int(request.GET.get('w', ''))
+    except ValueError:
+        requested = None
+    accept = request.headers.get('Accept', '')
+    accepted = [content_type for content_type in rendition_formats() if content_type in accept]
+    if not requested and not accepted:
+        return filename, True
+
+    available = available_renditions(filename)
+    if not available:
+        if requested:
+            with _requested_lock:
+                first = filename not in _requested
+                if first:
+                    if len(_requested) >= AVAILABLE_CACHE_SIZE:
+                        _requested.clear()
+                    _requested.add(filename)
+            if first:
+                schedule_renditions(filename)
+        return filename, True
+
+    candidates = []
+    bound = next((w for w in sorted(settings.IMAGE_RENDITION_WIDTHS) if w >= requested), None) if requested else None
+    if bound:
+        fallback_extension = extension.lower().replace('jpeg', 'jpg').replace('gif', 'png')
+        candidates += [rendition_filename(filename, bound, content_type) for content_type in accepted]
+        candidates.append(f'{stem}-w{bound}.{fallback_extension}')
+    candidates += [rendition_filename(filename, None, content_type) for content_type in accepted]
+    return next((name for name in candidates if name in available), filename), True
@@ -0,0 +1,412 @@
+"""
+Object storage for UploadedImage bytes.
+
+IMAGE_STORAGE selects where new images are written:
+
+- ``database``: in ``UploadedImage.image_data``, as before;
+- ``filesystem``: ContentAddressedStorage under IMAGE_STORAGE_ROOT;
+- ``s3``: S3Storage, any S3-compatible service (AWS, MinIO, R2...).
+
+Objects are named by the SHA-256 of their content (``ab/cd/abcd...``), so an
+image uploaded twice, or a rendition identical to another, is stored once.
+Rows record the object in ``storage_name``; rows without one still read their
+``image_data``, which ``manage.py move_images_to_storage`` moves out in batches.
+Objects are never overwritten. Deleting a row leaves its object in place,
+since other rows may share it; ``manage.py gc_images`` deletes objects once
+no row points at them. Storing content that already exists refreshes the
+object's modification time, and objects modified within the grace period
+are never released, so a new row cannot end up pointing at an object the
+collector judged unused a moment earlier.
+
+S3Storage signs requests with AWS Signature Version 4 over ``requests``;
+images.fake_s3 is a local stand-in for tests.
+"""
+import hashlib
+import hmac
+import io
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlsplit
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+# Images up to this size are hashed in memory before upload, larger ones on disk
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+EMPTY_PAYLOAD = hashlib.sha256(b'').hexdigest()
+
+
+def content_name(content_hash: str) -> str:
+    """Storage name of the object holding content with this SHA-256"""
+    return f'{content_hash[:2]}/{content_hash[2:4]}/{content_hash}'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage for content-addressed names.
+
+    A name that already exists holds the same bytes, so saving it again is a
+    no-op rather than a renamed copy. Files are written to a temporary name
+    and moved into place, so readers never see a partial object.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def touch(self, name, content):
+        """Mark an existing object as just written"""
+        os.utime(self.path(name))
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return name
+
+
+def sign_request(method: str, url: str, headers: dict, payload_hash: str, access_key: str, secret_key: str,
+                 region: str, now: Optional[datetime] = None) -> dict:
+    """
+    Sign an S3 request with AWS Signature Version 4.
+
+    Args:
+        method: HTTP method
+        url: Full request URL, path already percent-encoded
+        headers: Headers to sign and send
+        payload_hash: Hex SHA-256 of the body, or UNSIGNED-PAYLOAD
+        access_key: Access key id
+        secret_key: Secret access key
+        region: Signing region
+        now: Request time (default: now)
+
+    Returns:
+        ``headers`` plus Host, X-Amz-Date, X-Amz-Content-Sha256 and Authorization
+    """
+    parts = urlsplit(url)
+    amz_date = (now or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+    headers = {
+        **{k.lower(): str(v).strip() for k, v in headers.items()},
+        'host': parts.netloc,
+        'x-amz-date': amz_date,
+        'x-amz-content-sha256': payload_hash,
+    }
+    signed_headers = ';'.join(sorted(headers))
+    query = '&'.join(
+        f'{quote(k, safe="-_.~")}={quote(v, safe="-_.~")}'
+        for k, v in sorted(parse_qsl(parts.query, keep_blank_values=True))
+    )
+    canonical_request = '\n'.join([
+        method,
+        parts.path or '/',
+        query,
+        ''.join(f'{k}:{headers[k]}\n' for k in sorted(headers)),
+        signed_headers,
+        payload_hash,
+    ])
+    scope = f'{amz_date[:8]}/{region}/s3/aws4_request'
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+
+    key = f'AWS4{secret_key}'.encode()
+    for part in (amz_date[:8], region, 's3', 'aws4_request'):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    headers['authorization'] = (
+        f'AWS4-HMAC-SHA256 Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}'
+    )
+    return headers
+
+
+class S3ObjectReader(io.RawIOBase):
+    """
+    Seekable read-only view of an S3 object.
+
+    Reading opens one ranged GET from the current position and streams it;
+    seeking elsewhere drops the stream, so reading a byte range costs a
+    single request.
+    """
+
+    def __init__(self, storage: 'S3Storage', name: str):
+        super().__init__()
+        self.storage = storage
+        self.name = name
+        self._position = 0
+        self._response = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.storage.size(self.name)
+        if offset != self._position:
+            self._drop_stream()
+            self._position = offset
+        return self._position
+
+    def readinto(self, buffer):
+        if self._response is None:
+            response = self.storage._request('GET', self.name, headers={'Range': f'bytes={self._position}-'}, stream=True)
+            if response.status_code == 416:
+                response.close()
+                return 0
+            if response.status_code == 404:
+                response.close()
+                raise FileNotFoundError(self.name)
+            response.raise_for_status()
+            self._response = response
+        read = self._response.raw.readinto(buffer)
+        self._position += read
+        return read
+
+    def _drop_stream(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+    def close(self):
+        self._drop_stream()
+        super().close()
+
+
+@deconstructible
+class S3Storage(Storage):
+    """
+    Content-addressed storage in an S3-compatible bucket (path-style URLs).
+
+    Args:
+        endpoint_url: Service URL, e.g. https://s3.eu-west-1.amazonaws.com
+        bucket: Bucket name
+        access_key: Access key id
+        secret_key: Secret access key
+        region: Signing region
+        timeout: Per-request timeout in seconds
+    """
+
+    def __init__(self, endpoint_url=None, bucket=None, access_key=None, secret_key=None, region=None, timeout=30):
+        self.endpoint_url = (endpoint_url or settings.IMAGE_S3_ENDPOINT_URL).rstrip('/')
+        self.bucket = bucket or settings.IMAGE_S3_BUCKET
+        self.access_key = access_key or settings.IMAGE_S3_ACCESS_KEY
+        self.secret_key = secret_key or settings.IMAGE_S3_SECRET_KEY
+        self.region = region or settings.IMAGE_S3_REGION
+        self.timeout = timeout
+        if not self.endpoint_url or not self.bucket:
+            raise ImproperlyConfigured("S3 image storage needs IMAGE_S3_ENDPOINT_URL and IMAGE_S3_BUCKET")
+        self._session = requests.Session()
+
+    def _request(self, method: str, name: str, headers: dict = None, data=None, stream: bool = False,
+                 payload_hash: str = EMPTY_PAYLOAD) -> requests.Response:
+        url = f'{self.endpoint_url}/{self.bucket}/{quote(name, safe="/-_.~")}'
+        signed = sign_request(
+            method, url, headers or {}, payload_hash, self.access_key, self.secret_key, self.region
+        )
+        return self._session.request(method, url, headers=signed, data=data, stream=stream, timeout=self.timeout)
+
+    def _open(self, name, mode='rb'):
+        if 'w' in mode or '+' in mode:
+            raise ValueError("S3 image storage is read-only through open()")
+        return File(io.BufferedReader(S3ObjectReader(self, name), buffer_size=64 * 1024), name=name)
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        self._put(name, content)
+        return name
+
+    def touch(self, name, content):
+        """Mark an existing object as just written, by putting it again"""
+        self._put(name, content)
+
+    def _put(self, name, content):
+        content.seek(0)
+        response = self._request(
+            'PUT', name,
+            headers={'Content-Length': str(content.size), 'Content-Type': 'application/octet-stream'},
+            data=content,
+            payload_hash=UNSIGNED_PAYLOAD,
+        )
+        response.raise_for_status()
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def exists(self, name):
+        response = self._request('HEAD', name)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    def size(self, name):
+        response = self._request('HEAD', name)
+        if response.status_code == 404:
+            raise FileNotFoundError(name)
+        response.raise_for_status()
+        return int(response.headers['Content-Length'])
+
+    def get_modified_time(self, name):
+        response = self._request('HEAD', name)
+        if response.status_code == 404:
+            raise FileNotFoundError(name)
+        response.raise_for_status()
+        return parsedate_to_datetime(response.headers['Last-Modified'])
+
+    def delete(self, name):
+        response = self._request('DELETE', name)
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    def url(self, name):
+        return f'{self.endpoint_url}/{self.bucket}/{quote(name, safe="/-_.~")}'
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_image_storage() -> Optional[Storage]:
+    """The configured image storage, or None when images are kept in the database"""
+    global _storage
+    if settings.IMAGE_STORAGE == 'database':
+        return None
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if settings.IMAGE_STORAGE == 'filesystem':
+                    _storage = ContentAddressedStorage(location=settings.IMAGE_STORAGE_ROOT)
+                elif settings.IMAGE_STORAGE == 's3':
+                    _storage = S3Storage()
+                else:
+                    raise ImproperlyConfigured(f"Unknown IMAGE_STORAGE {settings.IMAGE_STORAGE!r}")
+    return _storage
+
+
+@receiver(setting_changed)
+def _reset_image_storage(setting, **kwargs):
+    global _storage
+    if setting.startswith('IMAGE_STORAGE') or setting.startswith('IMAGE_S3'):
+        _storage = None
+
+
+def store_content(storage: Storage, chunks: Iterable[bytes]) -> Tuple[str, str, int, bool]:
+    """
+    Write a stream of bytes to ``storage`` under its content hash.
+
+    Returns:
+        (storage name, SHA-256 hex, size, whether a new object was written)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        for chunk in chunks:
+            digest.update(chunk)
+            spool.write(chunk)
+            size += len(chunk)
+        content_hash = digest.hexdigest()
+        name = content_name(content_hash)
+        spool.seek(0)
+        if storage.exists(name):
+            # Keeps gc_images from releasing it before the new row is saved
+            storage.touch(name, File(spool, name=name))
+            return name, content_hash, size, False
+        storage.save(name, File(spool, name=name))
+    return name, content_hash, size, True
+
+
+def blob_fields(chunks: Iterable[bytes]) -> dict:
+    """UploadedImage fields for new image bytes, wherever IMAGE_STORAGE keeps them"""
+    storage = get_image_storage()
+    if storage is None:
+        return {'image_data': b''.join(chunks)}
+    name, content_hash, _, _ = store_content(storage, chunks)
+    return {'image_data': None, 'storage_name': name, 'content_hash': content_hash}
+
+
+def open_image(image):
+    """Open the stored object of an UploadedImage that has a ``storage_name``"""
+    storage = get_image_storage()
+    if storage is None:
+        raise ImproperlyConfigured(f"Image {image.filename} is in object storage but IMAGE_STORAGE is 'database'")
+    return storage.open(image.storage_name, 'rb')
+
+
+def read_image(image) -> bytes:
+    """All bytes of an UploadedImage, from object storage or the database"""
+    if image.storage_name:
+        with open_image(image) as f:
+            return f.read()
+    return bytes(image.image_data)
+
+
+def release_objects(names: Iterable[str], min_age: Optional[timedelta] = None) -> int:
+    """
+    Delete stored objects that no UploadedImage row points at any more.
+
+    Args:
+        names: Storage names of deleted rows
+        min_age: Keep objects modified more recently than this; content being
+            stored again touches its object before the new row is saved
+
+    Returns:
+        Number of objects deleted
+    """
+    from .models import UploadedImage
+
+    names = {name for name in names if name}
+    storage = get_image_storage()
+    if not names or storage is None:
+        return 0
+    in_use = set(UploadedImage.objects.filter(storage_name__in=names).values_list('storage_name', flat=True))
+    cutoff = datetime.now(timezone.utc) - min_age if min_age else None
+    released = []
+    for name in names - in_use:
+        try:
+            if cutoff is not None and storage.get_modified_time(name) > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        storage.delete(name)
+        released.append(name)
+
+    orphaned = UploadedImage.objects.filter(storage_name__in=released).values_list('filename', flat=True)
+    for filename in orphaned:
+        logger.error(f"Image {filename} was saved while its stored object was being released")
+    return len(released)
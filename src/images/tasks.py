@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .renditions import generate_renditions
+
+
+@shared_task(ignore_result=True)
+def generate_image_renditions(filename: str):
+    """Create the missing renditions of an uploaded image"""
+    return generate_renditions(filename)
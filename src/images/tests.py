@@ -1,3 +1,377 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import requests
+
+from django.core.management import call_command
+from django.db import connection
+from django.http import FileResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+
+from config.views import serve_media_file
+from sections.models import Section
+from settings.models import SiteSettings
+
+from .cache import LOOKUPS, get_image_cache
+from .fake_s3 import FakeS3
+from . import renditions
+from .renditions import generate_renditions
+from .storage import content_name, get_image_storage, release_objects
+
+from .models import ImageReference, UploadedImage, UploadSession
+
+
+def create_image(filename='photo.png', data=None, content_type='image/png'):
+    data = os.urandom(1000) if data is None else data
+    return UploadedImage.objects.create(
+        filename=filename,
+        original_filename=f'original-{filename}',
+        content_type=content_type,
+        size=len(data),
+        image_data=data,
+    )
+
+
+@override_settings(IMAGE_STREAM_CHUNK_SIZE=300, IMAGE_CACHE_MEMORY_BYTES=0)
+class ImageDeliveryTests(TestCase):
+    def setUp(self):
+        self.data = os.urandom(1000)
+        create_image(data=self.data)
+
+    def test_streams_whole_image_in_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/images/photo.png')
+            body = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+        self.assertEqual(response['Content-Length'], '1000')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        # Metadata + first chunk, then three more 300-byte slices
+        self.assertEqual(len(queries), 4)
+        # The blob column is only read through SUBSTR
+        self.assertNotRegex(queries[0]['sql'], r'(?<!SUBSTR\()"images_uploadedimage"\."image_data"')
+
+    def test_range_requests(self):
+        response = self.client.get('/api/v1/images/photo.png', HTTP_RANGE='bytes=250-649')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 250-649/1000')
+        self.assertEqual(b''.join(response.streaming_content), self.data[250:650])
+
+        response = self.client.get('/api/v1/images/photo.png', HTTP_RANGE='bytes=-100')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-100:])
+
+        response = self.client.get('/api/v1/images/photo.png', HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1000')
+
+        self.assertEqual(self.client.get('/api/v1/images/missing.png').status_code, 404)
+
+
+@override_settings(IMAGE_CACHE_MEMORY_BYTES=0)
+class ConditionalImageTests(TestCase):
+    def test_revalidation_answers_304_without_reading_the_blob(self):
+        data = os.urandom(500)
+        image = create_image(data=data)
+        self.assertEqual(image.content_hash, hashlib.sha256(data).hexdigest())
+
+        response = self.client.get('/api/v1/images/photo.png')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(etag, f'"{image.content_hash}"')
+
+        for headers in ({'HTTP_IF_NONE_MATCH': etag}, {'HTTP_IF_MODIFIED_SINCE': last_modified}):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/v1/images/photo.png', **headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn('image_data', queries[0]['sql'])
+
+        self.assertEqual(self.client.get('/api/v1/images/photo.png', HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+        # A Range whose If-Range no longer matches gets the whole image
+        response = self.client.get('/api/v1/images/photo.png', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, b''.join(response.streaming_content)), (200, data))
+        response = self.client.get('/api/v1/images/photo.png', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    def test_media_files_use_the_same_validators(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            path = os.path.join(media_root, 'logo.svg')
+            with open(path, 'wb') as f:
+                f.write(b'<svg/>')
+            stat = os.stat(path)
+
+            response = serve_media_file(RequestFactory().get('/media/logo.svg'), 'logo.svg')
+            response.close()
+            self.assertEqual(response['ETag'], f'"{int(stat.st_mtime):x}-{stat.st_size:x}"')
+
+            request = RequestFactory().get('/media/logo.svg', HTTP_IF_MODIFIED_SINCE=http_date(stat.st_mtime))
+            self.assertEqual(serve_media_file(request, 'logo.svg').status_code, 304)
+
+
+class ImageCacheTests(TestCase):
+    def setUp(self):
+        LOOKUPS.clear()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        settings = override_settings(
+            IMAGE_STREAM_CHUNK_SIZE=300,
+            IMAGE_CACHE_MEMORY_MAX_ITEM=1000,
+            IMAGE_CACHE_DIR=self.cache_dir.name,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def fetch(self, filename, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/v1/images/{filename}', **headers)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body, len(queries)
+
+    def test_small_images_are_served_from_memory(self):
+        logo = create_image('logo.png', os.urandom(800))
+        self.assertEqual(self.fetch('logo.png')[1:], (bytes(logo.image_data), 3))
+
+        response, body, queries = self.fetch('logo.png', HTTP_RANGE='bytes=10-19')
+        self.assertEqual((response.status_code, body, queries), (206, bytes(logo.image_data)[10:20], 0))
+
+        # Saving evicts the entry
+        logo.save()
+        self.assertEqual(self.fetch('logo.png')[2], 3)
+        self.assertEqual((LOOKUPS.value('memory_hit'), LOOKUPS.value('miss')), (1, 2))
+
+    def test_large_images_are_served_from_disk(self):
+        photo = create_image('photo.jpg', os.urandom(5000), 'image/jpeg')
+        self.fetch('photo.jpg')
+        self.assertEqual(os.listdir(self.cache_dir.name), [photo.content_hash])
+
+        response, body, queries = self.fetch('photo.jpg')
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual((body, queries), (bytes(photo.image_data), 0))
+
+        # Another worker finds the file after a metadata query
+        get_image_cache().clear()
+        response, body, queries = self.fetch('photo.jpg', HTTP_RANGE='bytes=4000-')
+        self.assertEqual((response.status_code, body, queries), (206, bytes(photo.image_data)[4000:], 1))
+        self.assertEqual(LOOKUPS.value('disk_hit'), 2)
+
+
+@override_settings(IMAGE_CACHE_MEMORY_BYTES=0, IMAGE_RENDITION_WIDTHS=[320, 640, 1600])
+class ImageRenditionTests(TestCase):
+    def png(self, width, height):
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, height), (200, 160, 40)).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_renditions_are_generated_and_negotiated(self):
+        create_image('poster.png', self.png(1000, 500))
+        self.assertEqual(generate_renditions('poster.png'), 5)
+        self.assertEqual(generate_renditions('poster.png'), 0)
+        self.assertEqual(
+            sorted(UploadedImage.objects.filter(source__filename='poster.png').values_list('filename', 'width', 'height')),
+            [('poster-w320.png', 320, 160), ('poster-w320.webp', 320, 160),
+             ('poster-w640.png', 640, 320), ('poster-w640.webp', 640, 320), ('poster.webp', 1000, 500)],
+        )
+
+        def fetch(query='', accept='*/*'):
+            response = self.client.get(f'/api/v1/images/poster.png{query}', HTTP_ACCEPT=accept)
+            self.assertIn('Accept', response['Vary'])
+            with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+                return response['Content-Type'], image.width
+
+        self.assertEqual(fetch('?w=500', 'image/webp,image/*'), ('image/webp', 640))
+        self.assertEqual(fetch('?w=500'), ('image/png', 640))
+        self.assertEqual(fetch('?w=1200', 'image/webp'), ('image/webp', 1000))
+        self.assertEqual(fetch('', 'image/webp'), ('image/webp', 1000))
+        self.assertEqual(fetch('?w=1200'), ('image/png', 1000))
+
+    def test_upload_schedules_renditions_after_commit(self):
+        upload = io.BytesIO(self.png(10, 10))
+        upload.name = 'icon.png'
+        with mock.patch('images.uploads.schedule_renditions') as schedule, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/upload/image/', {'image': upload})
+        self.assertEqual(response.status_code, 201, response.content)
+        schedule.assert_called_once_with(response.json()['filename'])
+
+    def test_concurrent_requests_schedule_one_rendition_job(self):
+        request = RequestFactory().get('/api/v1/images/wide.png?w=640', HTTP_ACCEPT='image/webp')
+        renditions._requested.clear()
+        with mock.patch('images.renditions.available_renditions', return_value=frozenset()), \
+                mock.patch('images.renditions.schedule_renditions') as schedule, \
+                ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: renditions.negotiate(request, 'wide.png'), range(32)))
+        schedule.assert_called_once_with('wide.png')
+
+
+@override_settings(IMAGE_STREAM_CHUNK_SIZE=300, IMAGE_CACHE_MEMORY_BYTES=0)
+class ObjectStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+
+    def upload(self, name, data):
+        upload = io.BytesIO(data)
+        upload.name = name
+        with mock.patch('images.uploads.schedule_renditions'):
+            response = self.client.post('/api/v1/upload/image/', {'image': upload})
+        self.assertEqual(response.status_code, 201, response.content)
+        return UploadedImage.objects.get(filename=response.json()['filename'])
+
+    def test_filesystem_storage_deduplicates_uploads(self):
+        data = b'\xff\xd8\xff' + os.urandom(997)
+        with override_settings(IMAGE_STORAGE='filesystem', IMAGE_STORAGE_ROOT=self.root.name):
+            first, second = self.upload('a.png', data), self.upload('b.png', data)
+            self.assertIsNone(first.image_data)
+            self.assertEqual(first.storage_name, content_name(hashlib.sha256(data).hexdigest()))
+            self.assertEqual(second.storage_name, first.storage_name)
+            self.assertEqual(sum(len(files) for _, _, files in os.walk(self.root.name)), 1)
+
+            response = self.client.get(f'/api/v1/images/{second.filename}', HTTP_RANGE='bytes=100-699')
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(b''.join(response.streaming_content), data[100:700])
+
+    def test_move_blobs_to_s3(self):
+        s3 = FakeS3()
+        endpoint = s3.start()
+        self.addCleanup(s3.stop)
+        data = os.urandom(1000)
+        create_image('one.png', data)
+        create_image('two.png', data)
+        create_image('three.png', os.urandom(10))
+
+        with override_settings(IMAGE_STORAGE='s3', IMAGE_S3_ENDPOINT_URL=endpoint, IMAGE_S3_BUCKET='images',
+                               IMAGE_S3_ACCESS_KEY='test-access', IMAGE_S3_SECRET_KEY='test-secret'):
+            output = io.StringIO()
+            call_command('move_images_to_storage', batch_size=2, stdout=output)
+            self.assertIn('Moved 3 images (2010 bytes)', output.getvalue())
+            self.assertIn('2 new objects, 1 deduplicated', output.getvalue())
+            self.assertEqual(len(s3.objects['images']), 2)
+            self.assertFalse(UploadedImage.objects.filter(image_data__isnull=False).exists())
+
+            response = self.client.get('/api/v1/images/two.png')
+            self.assertEqual(b''.join(response.streaming_content), data)
+            response = self.client.get('/api/v1/images/one.png', HTTP_RANGE='bytes=-250')
+            self.assertEqual(b''.join(response.streaming_content), data[-250:])
+
+        # Requests signed with the wrong secret are refused
+        with override_settings(IMAGE_STORAGE='s3', IMAGE_S3_ENDPOINT_URL=endpoint, IMAGE_S3_BUCKET='images',
+                               IMAGE_S3_ACCESS_KEY='test-access', IMAGE_S3_SECRET_KEY='wrong'):
+            with self.assertRaises(requests.HTTPError):
+                get_image_storage().exists(content_name(hashlib.sha256(data).hexdigest()))
+
+    def test_restored_content_survives_release_of_its_object(self):
+        data = b'\xff\xd8\xff' + os.urandom(997)
+        name = content_name(hashlib.sha256(data).hexdigest())
+        s3 = FakeS3()
+        endpoint = s3.start()
+        self.addCleanup(s3.stop)
+        week_ago = timezone.now() - timezone.timedelta(days=7)
+
+        for settings in (dict(IMAGE_STORAGE='filesystem', IMAGE_STORAGE_ROOT=self.root.name),
+                         dict(IMAGE_STORAGE='s3', IMAGE_S3_ENDPOINT_URL=endpoint, IMAGE_S3_BUCKET='images',
+                              IMAGE_S3_ACCESS_KEY='test-access', IMAGE_S3_SECRET_KEY='test-secret')):
+            with self.subTest(settings['IMAGE_STORAGE']), override_settings(**settings):
+                storage = get_image_storage()
+                self.upload('old.png', data).delete()
+                if settings['IMAGE_STORAGE'] == 'filesystem':
+                    os.utime(storage.path(name), (week_ago.timestamp(), week_ago.timestamp()))
+                else:
+                    s3.modified['images', name] = week_ago
+
+                # The same bytes are uploaded again while the collector runs
+                self.upload('new.png', data).delete()
+                self.assertEqual(release_objects([name], timezone.timedelta(hours=24)), 0)
+                self.assertTrue(storage.exists(name))
+
+                self.assertEqual(release_objects([name]), 1)
+                self.assertFalse(storage.exists(name))
+
+
+@override_settings(IMAGE_CACHE_MEMORY_BYTES=0)
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        self.upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.upload_dir.cleanup)
+        settings = override_settings(IMAGE_UPLOAD_DIR=self.upload_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.data = b'\x89PNG\r\n\x1a\n' + os.urandom(3000)
+
+    def send(self, url, offset, body):
+        return self.client.patch(url, body, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_upload_resumes_from_the_stored_offset(self):
+        session = self.client.post('/api/v1/upload/image/sessions/', {'filename': 'scan.txt', 'size': len(self.data)},
+                                   content_type='application/json').json()
+        url = session['url']
+
+        self.assertEqual(self.send(url, 0, self.data[:1000]).json()['offset'], 1000)
+        # A retried chunk for an old offset is told where to continue
+        response = self.send(url, 0, self.data[:1000])
+        self.assertEqual((response.status_code, response['Upload-Offset']), (409, '1000'))
+        self.assertEqual(self.client.get(url).json(), {'offset': 1000, 'size': len(self.data)})
+
+        with mock.patch('images.uploads.schedule_renditions'):
+            response = self.send(url, 1000, self.data[1000:])
+        self.assertEqual(response.status_code, 201, response.content)
+        image = UploadedImage.objects.get(filename=response.json()['filename'])
+        # Typed by content, not by the client's filename
+        self.assertEqual((image.content_type, image.filename[-4:]), ('image/png', '.png'))
+        self.assertEqual(bytes(image.image_data), self.data)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(self.upload_dir.name), [])
+
+    def test_non_images_are_rejected_by_magic_bytes(self):
+        session = self.client.post('/api/v1/upload/image/sessions/', {'filename': 'x.png', 'size': 100},
+                                   content_type='application/json').json()
+        response = self.send(session['url'], 0, b'<html><script>alert(1)</script>')
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(self.client.get(session['url']).status_code, 404)
+
+        upload = io.BytesIO(b'<svg onload="alert(1)"/>')
+        upload.name = 'logo.png'
+        response = self.client.post('/api/v1/upload/image/', {'image': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadedImage.objects.exists())
+
+
+class ImageReferenceTests(TestCase):
+    def test_references_follow_content_and_gc_deletes_orphans(self):
+        create_image('a.png')
+        create_image('b.png')
+        original = create_image('c.png')
+        create_image('c-w320.webp', content_type='image/webp')
+        UploadedImage.objects.filter(filename='c-w320.webp').update(source=original)
+        UploadedImage.objects.update(uploaded_at=timezone.now() - timezone.timedelta(days=2))
+        create_image('fresh.png')
+
+        section = Section.objects.create(section_id='hero', content={'image': '/api/v1/images/a.png', 'title': 'Hi'})
+        SiteSettings.objects.create(favicon='https://example.com/api/v1/images/c-w320.webp?w=32')
+        self.assertEqual(
+            sorted(ImageReference.objects.values_list('filename', 'owner_type', 'owner_id')),
+            [('a.png', 'section', 'hero'), ('c-w320.webp', 'site_settings', str(SiteSettings.objects.get().pk))],
+        )
+
+        section.content = {'title': 'Hi'}
+        section.save()
+        self.assertFalse(ImageReference.objects.filter(filename='a.png').exists())
+
+        output = io.StringIO()
+        call_command('gc_images', dry_run=True, stdout=output)
+        self.assertIn('2 images would be deleted', output.getvalue())
+        self.assertEqual(UploadedImage.objects.count(), 5)
+
+        call_command('gc_images', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(
+            sorted(UploadedImage.objects.values_list('filename', flat=True)),
+            ['c-w320.webp', 'c.png', 'fresh.png'],
+        )
@@ -0,0 +1,211 @@
+"""
+Image upload handling: magic-byte validation and resumable uploads.
+
+An upload's type is decided by its first bytes (imaging.sniff), never by the
+client's Content-Type or file extension, and the stored filename gets the
+extension of the detected type.
+
+Resumable protocol (``/api/v1/upload/image/sessions/``):
+
+1. ``POST`` ``{"filename": ..., "size": ...}`` opens a session and returns
+   its id and URL.
+2. ``PATCH <url>`` with an ``Upload-Offset`` header and a raw body appends
+   the bytes at that offset. A wrong offset is answered 409 with the
+   current one; bytes received before a dropped connection are kept.
+3. ``GET <url>`` returns the current offset, to resume from.
+4. The ``PATCH`` that completes the upload stores the image and answers 201
+   like the single-request upload.
+
+Chunks are appended to a staging file in IMAGE_UPLOAD_DIR without being
+held in memory, under an exclusive lock so two requests cannot write the
+same session at once. With several hosts the directory must be shared, or
+sessions pinned to a host. Sessions expire after IMAGE_UPLOAD_SESSION_TTL
+seconds; ``manage.py prune_image_uploads`` removes the leftovers.
+"""
+import fcntl
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+from functools import partial
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import imaging
+from .models import UploadedImage, UploadSession
+from .renditions import schedule_renditions
+from .storage import blob_fields
+
+logger = logging.getLogger(__name__)
+
+# Extension given to stored images, by detected type
+EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/avif': 'avif',
+    'image/x-icon': 'ico',
+}
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """A rejected upload; the message is safe to return to the client"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class OffsetMismatch(UploadError):
+    """A chunk was sent for an offset other than the session's current one"""
+
+    def __init__(self, offset: int):
+        super().__init__(f'Upload is at offset {offset}', status=409)
+        self.offset = offset
+
+
+def check_size(size: int):
+    if size <= 0:
+        raise UploadError('File is empty')
+    if size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise UploadError(f'File size exceeds {settings.IMAGE_UPLOAD_MAX_BYTES // (1024 * 1024)}MB limit', status=413)
+
+
+def detect_type(head: bytes) -> str:
+    """Image type from the first bytes of an upload, or UploadError (415)"""
+    content_type = imaging.sniff(head)
+    if content_type is None:
+        raise UploadError('File is not a supported image (JPEG, PNG, GIF, WebP, AVIF or ICO)', status=415)
+    return content_type
+
+
+def save_upload(original_filename: str, content_type: str, size: int, chunks: Iterable[bytes]) -> UploadedImage:
+    """
+    Store validated image bytes as a new UploadedImage and schedule its renditions.
+
+    Args:
+        original_filename: Client's filename, kept for Content-Disposition
+        content_type: Type detected by ``detect_type``
+        size: Length of ``chunks`` in bytes
+        chunks: The image bytes
+    """
+    image = UploadedImage.objects.create(
+        filename=f'{uuid.uuid4().hex}.{EXTENSIONS[content_type]}',
+        original_filename=original_filename[:255],
+        content_type=content_type,
+        size=size,
+        **blob_fields(chunks),
+    )
+    # Resized / WebP / AVIF variants are made in the background
+    transaction.on_commit(partial(schedule_renditions, image.filename))
+    return image
+
+
+def staging_path(session: UploadSession) -> str:
+    return os.path.join(settings.IMAGE_UPLOAD_DIR, session.id.hex)
+
+
+def create_session(original_filename: str, size: int) -> UploadSession:
+    check_size(size)
+    return UploadSession.objects.create(original_filename=original_filename[:255] or 'upload', size=size)
+
+
+def get_session(session_id) -> Optional[UploadSession]:
+    """An unexpired upload session, or None"""
+    cutoff = timezone.now() - timedelta(seconds=settings.IMAGE_UPLOAD_SESSION_TTL)
+    return UploadSession.objects.filter(pk=session_id, created_at__gte=cutoff).first()
+
+
+def session_offset(session: UploadSession) -> int:
+    try:
+        return os.path.getsize(staging_path(session))
+    except FileNotFoundError:
+        return 0
+
+
+def append_chunk(session: UploadSession, offset: int, chunks: Iterable[bytes]) -> Tuple[int, Optional[UploadedImage]]:
+    """
+    Append a request body to an upload session, completing it once all bytes are in.
+
+    Args:
+        session: The upload session
+        offset: Position the client sent the chunk for (Upload-Offset)
+        chunks: The request body
+
+    Returns:
+        (new offset, the stored image once the upload is complete)
+
+    Raises:
+        OffsetMismatch: ``offset`` is not the current offset, or another
+            request is writing to the session
+        UploadError: The bytes are not an image, or exceed the declared size
+    """
+    os.makedirs(settings.IMAGE_UPLOAD_DIR, exist_ok=True)
+    path = staging_path(session)
+    with open(path, 'ab') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise OffsetMismatch(os.path.getsize(path))
+        position = f.seek(0, os.SEEK_END)
+        if position != offset:
+            raise OffsetMismatch(position)
+
+        for chunk in chunks:
+            if position + len(chunk) > session.size:
+                raise UploadError(f'Upload exceeds its declared size of {session.size} bytes', status=413)
+            f.write(chunk)
+            position += len(chunk)
+        f.flush()
+
+        if offset < imaging.SNIFF_LENGTH and position >= min(imaging.SNIFF_LENGTH, session.size):
+            with open(path, 'rb') as staged:
+                head = staged.read(imaging.SNIFF_LENGTH)
+            try:
+                detect_type(head)
+            except UploadError:
+                # No point receiving the rest
+                discard_session(session)
+                raise
+        if position < session.size:
+            return position, None
+
+        with open(path, 'rb') as staged:
+            content_type = detect_type(staged.read(imaging.SNIFF_LENGTH))
+            staged.seek(0)
+            image = save_upload(session.original_filename, content_type, session.size, iter(partial(staged.read, READ_SIZE), b''))
+    discard_session(session)
+    logger.info(f"Resumable upload {session.id} stored as {image.filename}")
+    return position, image
+
+
+def discard_session(session: UploadSession):
+    try:
+        os.unlink(staging_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def prune_sessions() -> int:
+    """Delete expired upload sessions and their staging files"""
+    cutoff = timezone.now() - timedelta(seconds=settings.IMAGE_UPLOAD_SESSION_TTL)
+    expired = list(UploadSession.objects.filter(created_at__lt=cutoff))
+    for session in expired:
+        discard_session(session)
+
+    # Stale staging files whose session row is gone
+    if os.path.isdir(settings.IMAGE_UPLOAD_DIR):
+        live = {session_id.hex for session_id in UploadSession.objects.values_list('id', flat=True)}
+        stale = time.time() - settings.IMAGE_UPLOAD_SESSION_TTL
+        for entry in os.scandir(settings.IMAGE_UPLOAD_DIR):
+            if entry.is_file() and entry.name not in live and entry.stat().st_mtime < stale:
+                os.unlink(entry.path)
+    return len(expired)
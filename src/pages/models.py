@@ -89,3 +89,7 @@ class Page(models.Model):
         
     def get_absolute_url(self):
         return f"/{self.slug}/"
+
+    def section_ids(self):
+        """Ids of the sections the page lists, in order"""
+        return [entry['id'] for entry in self.sections if isinstance(entry, dict) and entry.get('id')]
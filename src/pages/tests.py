@@ -1,3 +1,95 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import re
+import tempfile
 
-# Create your tests here.
+import brotli
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from config.shell import shell_cache
+from sections.models import Section
+from settings.models import SiteSettings
+
+from .models import Page
+
+
+class IndexShellTests(TestCase):
+    def setUp(self):
+        shell_cache.clear()
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+        settings = override_settings(STATIC_ROOT=self.static_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.page = Page.objects.create(title='About us', slug='about', sections=[], is_published=True)
+        # Creating the default settings on first use would retire the first shell
+        SiteSettings.get_settings()
+
+    def write_manifest(self, script, mtime):
+        path = os.path.join(self.static_root.name, 'manifest.json')
+        with open(path, 'w') as f:
+            json.dump({'index.html': {'file': script}}, f)
+        os.utime(path, ns=(mtime, mtime))
+
+    def test_shell_is_cached_compressed_and_invalidated(self):
+        self.write_manifest('assets/index-1.js', 1_000_000_000)
+        response = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        html = brotli.decompress(response.content).decode()
+        self.assertIn('<title>About us</title>', html)
+        self.assertIn('assets/index-1.js', html)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(gzip.decompress(response.content).decode(), html)
+        self.assertEqual(self.client.get('/about/', HTTP_IF_NONE_MATCH=response['ETag'],
+                                         HTTP_ACCEPT_ENCODING='gzip').status_code, 304)
+
+        # Page edits and new builds show up at once
+        self.page.title = 'About'
+        self.page.save()
+        self.write_manifest('assets/index-2.js', 2_000_000_000)
+        html = self.client.get('/about/').content.decode()
+        self.assertIn('<title>About</title>', html)
+        self.assertIn('assets/index-2.js', html)
+
+    def test_unknown_paths_share_one_shell(self):
+        html = self.client.get('/no-such-page/').content.decode()
+        self.assertIn('<title>Welcome</title>', html)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/another/missing/path/').content.decode(), html)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(len(shell_cache._entries), 1)
+
+        # Publishing a page gives it a shell of its own
+        Page.objects.create(title='Pricing', slug='pricing', sections=[], is_published=True)
+        self.assertIn('<title>Pricing</title>', self.client.get('/pricing/').content.decode())
+
+    def test_bootstrap_payload_is_inlined(self):
+        self.page.sections = [{'id': 'hero', 'component_type': 'Hero1'}, {'id': 'faq', 'component_type': 'Faq1'}]
+        self.page.save()
+        Section.objects.create(section_id='hero', content={'title': 'Gold <b>now</b>'})
+
+        def payload():
+            html = self.client.get('/about/').content.decode()
+            match = re.search(r'<script id="bootstrap-data" type="application/json">(.*?)</script>', html, re.S)
+            return json.loads(match.group(1))
+
+        with CaptureQueriesContext(connection) as queries:
+            data = payload()
+        # Published slugs, page, sections, theme setting, fallback theme, site settings
+        self.assertEqual(len(queries), 6)
+        self.assertEqual(data['page']['slug'], 'about')
+        self.assertEqual(list(data['sections']), ['hero'])
+        self.assertEqual(data['sections']['hero']['content']['title'], 'Gold <b>now</b>')
+        self.assertEqual(data['settings']['company_name'], 'Your Company Name')
+
+        # Section edits reach the cached shell
+        Section.objects.filter(section_id='hero').get().delete()
+        self.assertEqual(payload()['sections'], {})
@@ -0,0 +1,87 @@
+"""
+Fetching many sections in one request.
+
+A page lists its section ids in ``Page.sections`` and renders each with its
+own ``GET /public/sections/<id>/``, so a page view cost one request per
+section. ``GET /public/sections/?ids=a,b,c`` and
+``GET /public/sections/by-page/<slug>/`` instead answer with all of them,
+loaded with a single ``section_id__in`` query:
+
+    {"sections": [{"section_id": ..., "content": ..., "etag": ...}, ...],
+     "missing": ["ids", "not", "created", "yet"]}
+
+Sections come back in the order requested (page order for ``by-page``).
+Each carries the ETag of its own content, and the response has an ETag
+derived from them, so clients revalidate the whole set with a single
+conditional request.
+"""
+import hashlib
+import json
+from typing import Iterable, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Section
+from .serializers import SectionSerializer
+
+# Most sections one request may ask for
+MAX_IDS = 200
+
+
+def parse_ids(value: str) -> List[str]:
+    """Section ids from a comma-separated ``ids`` parameter, deduplicated in order"""
+    ids = [section_id.strip() for section_id in value.split(',')]
+    return list(dict.fromkeys(section_id for section_id in ids if section_id))
+
+
+def section_etag(data: dict) -> str:
+    """ETag of a serialized section"""
+    encoded = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    return f'"{hashlib.sha256(encoded).hexdigest()[:32]}"'
+
+
+def sections_response(request, section_ids: Iterable[str]) -> Response:
+    """
+    Respond with the sections ``section_ids`` names, in order.
+
+    Args:
+        request: The request, whose If-None-Match is honoured
+        section_ids: Section ids, without duplicates
+
+    Returns:
+        The sections and the ids that do not exist, or 304 when the client's
+        copy is current; 400 when more than MAX_IDS are asked for
+    """
+    section_ids = list(section_ids)
+    if len(section_ids) > MAX_IDS:
+        return Response(
+            {'error': f'At most {MAX_IDS} sections can be fetched at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    found = {section.section_id: section for section in Section.objects.filter(section_id__in=section_ids)}
+    sections = []
+    missing = []
+    for section_id in section_ids:
+        if section_id not in found:
+            missing.append(section_id)
+            continue
+        data = SectionSerializer(found[section_id]).data
+        data['etag'] = section_etag(data)
+        sections.append(data)
+
+    digest = hashlib.sha256()
+    for data in sections:
+        digest.update(f"{data['section_id']}={data['etag']};".encode())
+    for section_id in missing:
+        digest.update(f'{section_id}=;'.encode())
+    etag = f'"{digest.hexdigest()[:32]}"'
+
+    response = Response({'sections': sections, 'missing': missing})
+    response['ETag'] = etag
+    # Cacheable, but revalidated every time so edits show up at once
+    response['Cache-Control'] = 'no-cache'
+    return get_conditional_response(request, etag=etag, response=response)
@@ -1,3 +1,44 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from pages.models import Page
+
+from .models import Section
+
+
+class BulkSectionTests(TestCase):
+    def setUp(self):
+        for section_id in ('hero', 'faq', 'cta'):
+            Section.objects.create(section_id=section_id, content={'title': section_id})
+        Page.objects.create(title='About', slug='about', is_published=True, sections=[
+            {'id': 'cta', 'component_type': 'CTA1'},
+            {'id': 'pricing', 'component_type': 'Pricing1'},
+            {'id': 'hero', 'component_type': 'Hero1'},
+        ])
+
+    def test_ids_in_requested_order_with_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/public/sections/?ids=faq,nope,hero,faq')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([s['section_id'] for s in data['sections']], ['faq', 'hero'])
+        self.assertEqual(data['missing'], ['nope'])
+        self.assertEqual(data['sections'][1]['content'], {'title': 'hero'})
+
+        # The set revalidates as a unit; one section changing changes only its own ETag
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/public/sections/?ids=faq,nope,hero', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Section.objects.filter(section_id='hero').update(content={'title': 'Hero'})
+        response = self.client.get('/public/sections/?ids=faq,nope,hero', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['sections'][0]['etag'], data['sections'][0]['etag'])
+        self.assertNotEqual(response.json()['sections'][1]['etag'], data['sections'][1]['etag'])
+
+    def test_by_page_and_plain_list(self):
+        response = self.client.get('/public/sections/by-page/about/')
+        self.assertEqual([s['section_id'] for s in response.json()['sections']], ['cta', 'hero'])
+        self.assertEqual(response.json()['missing'], ['pricing'])
+        self.assertEqual(self.client.get('/public/sections/by-page/missing/').status_code, 404)
+        self.assertEqual(len(self.client.get('/public/sections/').json()), 3)
@@ -5,5 +5,6 @@ app_name = 'sections'
 
 urlpatterns = [
     path('', views.SectionListView.as_view(), name='section-list'),
+    path('by-page/<slug:slug>/', views.SectionsByPageView.as_view(), name='section-by-page'),
     path('<str:section_id>/', views.SectionDetailView.as_view(), name='section-detail'),
 ] 
\ No newline at end of file
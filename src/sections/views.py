@@ -4,6 +4,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.permissions import AllowAny
+from pages.models import Page
+from . import bulk
 from .models import Section
 from .serializers import SectionSerializer
 
@@ -86,8 +88,32 @@ class SectionDetailView(APIView):
 
 
 class SectionListView(generics.ListAPIView):
-    """List all sections"""
+    """
+    List all sections, or with ``?ids=a,b,c`` just those sections, in that
+    order (see sections.bulk).
+    """
     queryset = Section.objects.all()
     serializer_class = SectionSerializer
     authentication_classes = []
     permission_classes = [AllowAny]
+
+    def list(self, request, *args, **kwargs):
+        ids = request.query_params.get('ids')
+        if ids is None:
+            return super().list(request, *args, **kwargs)
+        return bulk.sections_response(request, bulk.parse_ids(ids))
+
+
+class SectionsByPageView(APIView):
+    """All sections a published page lists, in page order (see sections.bulk)"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, slug):
+        page = Page.objects.filter(slug=slug, is_published=True).only('sections').first()
+        if page is None:
+            return Response(
+                {'error': 'Page not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return bulk.sections_response(request, dict.fromkeys(page.section_ids()))